@@ -1,8 +1,10 @@
+import re
+import time
 import uuid
 import logging
 import datetime
-import copy
-from typing import Optional, List, Literal, Dict, Any, Tuple, Set
+import contextlib
+from typing import Optional, List, Literal, Dict, Any, Tuple
 
 from fastapi import FastAPI, HTTPException, Body, Path, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
@@ -10,23 +12,81 @@ from pydantic import BaseModel, Field
 
 from core.deterministic_queue import DeterministicQueue, MoveQueue
 from core.random_queue import RandomQueue
-from core.goboard import GameState, Move, Board, IllegalMoveError, GoString
+from core.goboard import GameState, Move, Board, IllegalMoveError
+from core import instrumentation, tracing
+from core.arrayboard import ArrayBoard
 from core.gotypes import Player, Point
-from core.setup_mode import SetupState
+from core.start_positions import start_state
+import api_logging
+import api_metrics
+import api_profiling
 
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
+_access_logger = logging.getLogger("api.access")
+_api_trace = tracing.tracer('api')
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Логи уходят в очередь и пишутся фоновым потоком; при остановке очередь дописывается до конца.
+    api_logging.setup_logging_from_env()
+    try:
+        yield
+    finally:
+        api_logging.shutdown_logging()
+
 
 app = FastAPI(
     title="Go Game with non standart queues API",
     description="API для управления игрой Го с настраиваемыми правилами.",
-    version="1.5.2"
+    version="1.5.2",
+    lifespan=lifespan
 )
 
 origins = [
     "http://localhost:5173",
     "http://127.0.0.1:5173"
 ]
+
+_GAME_PATH = re.compile(r"^/game/([^/]+)")
+
+class RequestContextMiddleware:
+    # Трассировка ядра во время запроса привязывается к партии из пути /game/{game_id}/...,
+    # а записи логов получают game_id и endpoint. По завершении пишется строка с задержкой запроса.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        match = _GAME_PATH.match(scope.get("path", ""))
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        token = api_logging.request_context(scope)
+        try:
+            with tracing.game_context(match.group(1) if match else None):
+                await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            route = scope.get("route")
+            api_metrics.REQUEST_METRICS.observe_request(scope["method"], getattr(route, "path", "unmatched"),
+                                                        status, elapsed)
+            if _access_logger.isEnabledFor(logging.INFO):
+                latency_ms = round(elapsed * 1000, 3)
+                _access_logger.info("%s %s %d", scope["method"], scope["path"], status,
+                                    extra={"latency_ms": latency_ms, "status": status})
+            api_logging.reset_request_context(token)
+
+
+app.add_middleware(api_profiling.ProfilingMiddleware)
+app.add_middleware(RequestContextMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -93,6 +153,16 @@ class GameStateResponse(BaseModel):
                                                         description="Существует ли группа игрока, ожидающая снятия")
 
 
+class EngineMeasurement(BaseModel):
+    count: int
+    seconds: float
+
+
+class EngineStatsResponse(BaseModel):
+    enabled: bool
+    measurements: Dict[str, EngineMeasurement]
+
+
 class MoveHistoryItem(BaseModel):
     player: Literal['black', 'white']
     action: Literal['play', 'pass', 'resign']
@@ -114,7 +184,7 @@ def serialize_board(board: Board) -> List[List[Literal['empty', 'black', 'white'
 
 async def get_game_data_dependency(game_id: str = Path(..., description="ID игры")) -> Dict[str, Any]:
     if game_id not in active_games:
-        logger.warning(f"Game not found: {game_id}")
+        logger.warning("Game not found: %s", game_id)
         raise HTTPException(status_code=404, detail=f"Игра с ID '{game_id}' не найдена.")
     return active_games[game_id]
 
@@ -122,7 +192,7 @@ async def get_game_data_dependency(game_id: str = Path(..., description="ID иг
 @app.post("/start", response_model=StartGameResponse, status_code=201, tags=["Game Management"])
 async def start_new_game(req: StartGameRequest):
     game_id = str(uuid.uuid4())
-    logger.info(f"Starting new game ({game_id}) with parameters: {req.dict()}")
+    logger.info("Starting new game (%s) with parameters: %s", game_id, req.model_dump(), extra={"game_id": game_id})
     try:
         if req.queue_type == 'deterministic':
             if not req.queue_pattern: raise ValueError("Queue pattern is required for 'deterministic' queue type.")
@@ -130,15 +200,16 @@ async def start_new_game(req: StartGameRequest):
         else:
             turn_queue: MoveQueue = RandomQueue(chunk_size=req.queue_depth or 20)
 
-        setup = SetupState(req.board_size, req.board_size)
+        stones = []
         for pos in req.initial_stones:
             if not (1 <= pos.row <= req.board_size and 1 <= pos.col <= req.board_size):
                 raise ValueError(
                     f"Initial stone at ({pos.row},{pos.col}) is outside board ({req.board_size}x{req.board_size}).")
             player_color = Player.black if pos.color == 'black' else Player.white
-            setup.place_stone(player_color, Point(pos.row, pos.col))
+            stones.append((Point(pos.row, pos.col), player_color))
 
-        game_state = GameState.from_setup(setup)
+        # Одинаковые расстановки делят одно неизменяемое начальное состояние.
+        game_state = start_state(req.board_size, req.board_size, stones, board_cls=ArrayBoard)
         game_config = req.model_dump(exclude={'initial_stones'})
 
         active_games[game_id] = {
@@ -147,21 +218,23 @@ async def start_new_game(req: StartGameRequest):
         }
 
         first_player = turn_queue.peek_next_player()
-        logger.info(f"Game {game_id} created. Config: {game_config}. First turn: {first_player.name}")
+        logger.info("Game %s created. Config: %s. First turn: %s", game_id, game_config, first_player.name,
+                    extra={"game_id": game_id})
         return StartGameResponse(game_id=game_id)
 
     except ValueError as ve:
-        logger.error(f"Validation error starting game {game_id}: {ve}")
+        logger.error("Validation error starting game %s: %s", game_id, ve)
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
-        logger.exception(f"Unexpected error starting game {game_id}: {e}")
+        logger.exception("Unexpected error starting game %s: %s", game_id, e)
         raise HTTPException(status_code=500, detail="Internal server error creating game.")
 
 
 @app.get("/game/{game_id}/state", response_model=GameStateResponse, tags=["Game State"])
 async def get_game_state(game_id: str = Path(..., description="ID игры"),
                          game_data: Dict[str, Any] = Depends(get_game_data_dependency)):
-    logger.debug(f"Requesting state for game {game_id}")
+    if _api_trace.debug_enabled:
+        _api_trace.debug("Requesting state for game %s", game_id)
     game_state: GameState = game_data["state"]
     turn_queue: MoveQueue = game_data["queue"]
     game_config = game_data["config"]
@@ -200,7 +273,7 @@ async def get_game_state(game_id: str = Path(..., description="ID игры"),
             pending_self_capture_exists=pending_self_exists
         )
     except Exception as e:
-        logger.exception(f"Error getting state for game {game_id}: {e}")
+        logger.exception("Error getting state for game %s: %s", game_id, e)
         raise HTTPException(status_code=500, detail="Internal server error getting game state.")
 
 
@@ -208,6 +281,18 @@ async def _process_player_action(
         game_id: str,
         game_data: Dict[str, Any],
         move: Move
+):
+    api_metrics.REQUEST_METRICS.move_started()
+    try:
+        return await _apply_player_action(game_id, game_data, move)
+    finally:
+        api_metrics.REQUEST_METRICS.move_finished()
+
+
+async def _apply_player_action(
+        game_id: str,
+        game_data: Dict[str, Any],
+        move: Move
 ):
     current_game_state: GameState = game_data["state"]
     turn_queue: MoveQueue = game_data["queue"]
@@ -216,159 +301,59 @@ async def _process_player_action(
     simultaneous_rule = game_config["simultaneous_capture_rule"]
 
     if current_game_state.is_over:
-        logger.warning(f"Game {game_id}: Action '{move}' attempted but game is already over.")
+        logger.warning("Game %s: Action '%s' attempted but game is already over.", game_id, move)
         raise HTTPException(status_code=400, detail="Игра уже завершена.")
 
     player_whose_turn_it_is: Player = turn_queue.peek_next_player()
-    logger.info(
-        f"Game {game_id}: Turn for {player_whose_turn_it_is.name}. Received action: '{move}'. Delayed capture: {delayed_capture_enabled}")
+    if _api_trace.info_enabled:
+        _api_trace.info("Game %s: Turn for %s. Received action: '%s'. Delayed capture: %s",
+                        game_id, player_whose_turn_it_is.name, move, delayed_capture_enabled)
 
     state_to_play_on = current_game_state
 
     if delayed_capture_enabled:
-        logger.debug(f"Checking for delayed captures before {player_whose_turn_it_is.name}'s move.")
-        pending_opponent_groups = current_game_state.pending_opponent_captures
-        pending_self_capture_group = current_game_state.pending_self_capture
-        groups_to_remove_now: Set[GoString] = set()
-
-        if pending_opponent_groups or pending_self_capture_group:
-            is_simultaneous = bool(pending_opponent_groups) and bool(pending_self_capture_group)
-            player_color = player_whose_turn_it_is
-
-            logger.debug(f"Checking Pending Opponent: {pending_opponent_groups}")
-            logger.debug(f"Checking Pending Self: {pending_self_capture_group}")
-            logger.debug(
-                f"Player Turn: {player_color}, Sim: {is_simultaneous}, SimRule: {simultaneous_rule}")  # Removed CapMode
-
-            if is_simultaneous:
-                for group in pending_opponent_groups:
-                    if group.color == player_color:
-                        if simultaneous_rule in ('opponent', 'both'):
-                            groups_to_remove_now.add(group)
-                            logger.debug(
-                                f"Marking Opponent group {repr(group)} for removal (Sim rule={simultaneous_rule})")
-                if pending_self_capture_group and pending_self_capture_group.color == player_color:
-                    if simultaneous_rule in ('self', 'both'):
-                        groups_to_remove_now.add(pending_self_capture_group)
-                        logger.debug(
-                            f"Marking Self group {repr(pending_self_capture_group)} for removal (Sim rule={simultaneous_rule})")
-            else:
-                if pending_opponent_groups:
-                    for group in pending_opponent_groups:
-                        if group.color == player_color:
-                            groups_to_remove_now.add(group)
-                            logger.debug(f"Marking Opponent group {repr(group)} for removal (Opponent only)")
-                elif pending_self_capture_group:
-                    if pending_self_capture_group.color == player_color:
-                        groups_to_remove_now.add(pending_self_capture_group)
-                        logger.debug(f"Marking Self group {repr(pending_self_capture_group)} for removal (Self only)")
-
-            if groups_to_remove_now:
-                board_after_cleanup_copy = copy.deepcopy(current_game_state.board)
-                logger.info(
-                    f"Performing delayed removal for {player_whose_turn_it_is.name}: {[repr(g) for g in groups_to_remove_now]}")
-                successfully_removed_count = 0
-                for group in groups_to_remove_now:
-                    representative_point = next(iter(group.stones), None)
-                    if not representative_point: continue
-                    string_on_copied_board = board_after_cleanup_copy.get_go_string(representative_point)
-
-                    if string_on_copied_board and string_on_copied_board == group:
-                        current_liberties = {n for p in string_on_copied_board.stones for n in p.neighbors() if
-                                             board_after_cleanup_copy.is_on_grid(n) and board_after_cleanup_copy.get(
-                                                 n) is None}
-                        if not current_liberties:
-                            logger.debug(f"Removing group {repr(string_on_copied_board)} from copied board.")
-                            board_after_cleanup_copy._remove_string(string_on_copied_board)
-                            successfully_removed_count += 1
-                        else:
-                            logger.warning(
-                                f"Group {repr(string_on_copied_board)} marked for delayed removal now has {len(current_liberties)} liberties. Skipping.")
-                    else:
-                        logger.warning(
-                            f"Group {repr(group)} not found or changed before removal. Found: {repr(string_on_copied_board)}")
-
-                if successfully_removed_count > 0:
-                    remaining_pending_opponent_set = set(pending_opponent_groups) - groups_to_remove_now
-                    new_remaining_pending_self = None
-                    if pending_self_capture_group and pending_self_capture_group not in groups_to_remove_now:
-                        new_remaining_pending_self = pending_self_capture_group
-
-                    state_after_cleanup = GameState(
-                        board=board_after_cleanup_copy,
-                        previous=current_game_state,
-                        move=None,
-                        move_history=current_game_state.move_history,
-                        pending_opponent_captures=frozenset(remaining_pending_opponent_set),
-                        pending_self_capture=new_remaining_pending_self
-                    )
-                    state_after_cleanup.previous_states = current_game_state.previous_states | {
-                        current_game_state.board.zobrist_hash()}
-
-                    state_to_play_on = state_after_cleanup
-                    logger.debug(
-                        f"Created intermediate state after cleanup. Hash: {state_after_cleanup.board.zobrist_hash()}. Remaining pending: Opponent={len(remaining_pending_opponent_set)}, Self={bool(new_remaining_pending_self)}")
-                else:
-                    logger.debug(
-                        "Groups matching player color found for delayed capture but none actually removed (e.g., they gained liberties). Playing on original state.")
-                    current_player_pending_opponent = {g for g in pending_opponent_groups if g.color == player_color}
-                    current_player_pending_self = {
-                        pending_self_capture_group} if pending_self_capture_group and pending_self_capture_group.color == player_color else set()
-
-                    survived_groups = current_player_pending_opponent.union(current_player_pending_self)
-
-                    if survived_groups:
-                        remaining_pending_opponent_set = set(pending_opponent_groups) - survived_groups
-                        new_remaining_pending_self = None
-                        if pending_self_capture_group and pending_self_capture_group not in survived_groups:
-                            new_remaining_pending_self = pending_self_capture_group
-
-                        state_with_cleared_pending = GameState(
-                            board=current_game_state.board,
-                            previous=current_game_state.previous_state,
-                            move=current_game_state.last_move,
-                            move_history=current_game_state.move_history,
-                            pending_opponent_captures=frozenset(remaining_pending_opponent_set),
-                            pending_self_capture=new_remaining_pending_self
-                        )
-                        state_with_cleared_pending.previous_states = current_game_state.previous_states
-                        state_to_play_on = state_with_cleared_pending
-                        logger.debug(
-                            f"Cleared pending captures for surviving groups. State hash {state_to_play_on.board.zobrist_hash()}. Pending: Opponent={len(state_to_play_on.pending_opponent_captures)}, Self={bool(state_to_play_on.pending_self_capture)}")
+        state_to_play_on = current_game_state.resolve_pending_captures(player_whose_turn_it_is, simultaneous_rule)
 
     try:
-        if not state_to_play_on.is_valid_move(player_whose_turn_it_is, move):
-            logger.warning(
-                f"Invalid action {move} for player {player_whose_turn_it_is.name} (checked on state hash {state_to_play_on.board.zobrist_hash()}).")
+        analysis = state_to_play_on.analyze_move(player_whose_turn_it_is, move,
+                                                 simultaneous_capture_rule=simultaneous_rule,
+                                                 delayed_capture=delayed_capture_enabled)
+        if not analysis.is_legal:
+            logger.warning("Invalid action %s for player %s (checked on state hash %s): %s.",
+                           move, player_whose_turn_it_is.name, state_to_play_on.board.zobrist_hash(), analysis.reason)
             raise IllegalMoveError(f"Недопустимый ход: {move}")
 
         final_state = state_to_play_on.apply_move(
             player_making_move=player_whose_turn_it_is,
             move=move,
             simultaneous_capture_rule=simultaneous_rule,
-            delayed_capture=delayed_capture_enabled
+            delayed_capture=delayed_capture_enabled,
+            analysis=analysis
         )
         action_type = "played stone" if move.is_play else "passed" if move.is_pass else "resigned"
 
         active_games[game_id]["state"] = final_state
-        logger.info(
-            f"Game {game_id}: Player {player_whose_turn_it_is.name} {action_type} successful. Final state hash: {final_state.board.zobrist_hash()}. Final Pending: Opponent={len(final_state.pending_opponent_captures)}, Self={bool(final_state.pending_self_capture)}")
+        if _api_trace.info_enabled:
+            _api_trace.info("Game %s: Player %s %s successful. Final state hash: %d. Final Pending: Opponent=%d, Self=%s",
+                            game_id, player_whose_turn_it_is.name, action_type, final_state.board.zobrist_hash(),
+                            len(final_state.pending_opponent_captures), bool(final_state.pending_self_capture))
 
         turn_queue.advance_turn()
         next_player_in_queue = turn_queue.peek_next_player()
-        logger.debug(f"Game {game_id}: Turn queue advanced. Next player in queue: {next_player_in_queue.name}")
+        if _api_trace.debug_enabled:
+            _api_trace.debug("Game %s: Turn queue advanced. Next player in queue: %s", game_id, next_player_in_queue.name)
 
         return {"status": f"Действие '{move}' игрока {player_whose_turn_it_is.name.lower()} успешно принято."}
 
     except IllegalMoveError as illegal_move:
-        logger.warning(
-            f"Game {game_id}: Illegal move error processing action {move} for {player_whose_turn_it_is.name}: {illegal_move}")
+        logger.warning("Game %s: Illegal move error processing action %s for %s: %s",
+                       game_id, move, player_whose_turn_it_is.name, illegal_move)
         raise HTTPException(status_code=400, detail=f"Недопустимый ход: {illegal_move}")
     except HTTPException as http_err:
         raise http_err
     except Exception as e:
-        logger.exception(
-            f"Game {game_id}: Internal server error processing action {move} for {player_whose_turn_it_is.name}: {e}")
+        logger.exception("Game %s: Internal server error processing action %s for %s: %s",
+                         game_id, move, player_whose_turn_it_is.name, e)
         raise HTTPException(status_code=500, detail=f"Внутренняя ошибка сервера при обработке действия: {e}")
 
 
@@ -417,101 +402,7 @@ async def get_legal_moves(
         state_for_legal_moves = game_state
 
         if delayed_capture_enabled:
-            logger.debug(f"Simulating delayed capture cleanup for legal moves check (player: {player_to_move.name})")
-            pending_opponent_groups = game_state.pending_opponent_captures
-            pending_self_capture_group = game_state.pending_self_capture
-            groups_to_remove_now: Set[GoString] = set()
-
-            if pending_opponent_groups or pending_self_capture_group:
-                is_simultaneous = bool(pending_opponent_groups) and bool(pending_self_capture_group)
-                player_color = player_to_move
-
-                logger.debug(f"Sim Pending Opponent: {pending_opponent_groups}")
-                logger.debug(f"Sim Pending Self: {pending_self_capture_group}")
-                logger.debug(f"Sim Player Turn: {player_color}, Sim: {is_simultaneous}, SimRule: {simultaneous_rule}")
-
-                if is_simultaneous:
-                    for group in pending_opponent_groups:
-                        if group.color == player_color:
-                            if simultaneous_rule in ('opponent', 'both'):
-                                groups_to_remove_now.add(group)
-                    if pending_self_capture_group and pending_self_capture_group.color == player_color:
-                        if simultaneous_rule in ('self', 'both'):
-                            groups_to_remove_now.add(pending_self_capture_group)
-                else:
-                    if pending_opponent_groups:
-                        for group in pending_opponent_groups:
-                            if group.color == player_color:
-                                groups_to_remove_now.add(group)
-                    elif pending_self_capture_group:
-                        if pending_self_capture_group.color == player_color:
-                            groups_to_remove_now.add(pending_self_capture_group)
-
-                if groups_to_remove_now:
-                    temp_board = copy.deepcopy(game_state.board)
-                    removed_count = 0
-                    logger.debug(f"Simulating removal of: {[repr(g) for g in groups_to_remove_now]}")
-                    for group in groups_to_remove_now:
-                        rep_point = next(iter(group.stones), None)
-                        if not rep_point: continue
-                        string_on_temp = temp_board.get_go_string(rep_point)
-                        if string_on_temp and string_on_temp == group:
-                            libs = {n for p in string_on_temp.stones for n in p.neighbors() if
-                                    temp_board.is_on_grid(n) and temp_board.get(n) is None}
-                            if not libs:
-                                temp_board._remove_string(string_on_temp)
-                                removed_count += 1
-                            else:
-                                logger.debug(f"Sim: Group {repr(string_on_temp)} survived, has {len(libs)} liberties.")
-                        else:
-                            logger.debug(f"Sim: Group {repr(group)} not found or changed.")
-
-                    if removed_count > 0:
-                        remaining_pending_opp_set = set(pending_opponent_groups) - groups_to_remove_now
-                        new_remaining_pending_self = None
-                        if pending_self_capture_group and pending_self_capture_group not in groups_to_remove_now:
-                            new_remaining_pending_self = pending_self_capture_group
-
-                        state_after_sim_cleanup = GameState(
-                            board=temp_board,
-                            previous=game_state,
-                            move=None,
-                            move_history=game_state.move_history,
-                            pending_opponent_captures=frozenset(remaining_pending_opp_set),
-                            pending_self_capture=new_remaining_pending_self
-                        )
-                        state_after_sim_cleanup.previous_states = game_state.previous_states | {
-                            game_state.board.zobrist_hash()}
-                        state_for_legal_moves = state_after_sim_cleanup
-                        logger.debug(
-                            f"Using simulated state after cleanup for legal moves. Hash: {state_after_sim_cleanup.board.zobrist_hash()}")
-                    else:
-                        logger.debug(
-                            "Simulated cleanup resulted in no removals. Using original state but clearing relevant pending captures.")
-                        current_player_pending_opponent = {g for g in pending_opponent_groups if
-                                                           g.color == player_color}
-                        current_player_pending_self = {
-                            pending_self_capture_group} if pending_self_capture_group and pending_self_capture_group.color == player_color else set()
-                        survived_groups = current_player_pending_opponent.union(current_player_pending_self)
-
-                        if survived_groups:
-                            remaining_pending_opponent_set = set(pending_opponent_groups) - survived_groups
-                            new_remaining_pending_self = None
-                            if pending_self_capture_group and pending_self_capture_group not in survived_groups:
-                                new_remaining_pending_self = pending_self_capture_group
-
-                            state_with_cleared_pending = GameState(
-                                board=game_state.board,  # Same board
-                                previous=game_state.previous_state,
-                                move=game_state.last_move,
-                                move_history=game_state.move_history,
-                                pending_opponent_captures=frozenset(remaining_pending_opponent_set),
-                                pending_self_capture=new_remaining_pending_self
-                            )
-                            state_with_cleared_pending.previous_states = game_state.previous_states
-                            state_for_legal_moves = state_with_cleared_pending
-                            logger.debug(
-                                f"Using state with cleared pending captures. Hash {state_for_legal_moves.board.zobrist_hash()}. Pending: Opponent={len(state_for_legal_moves.pending_opponent_captures)}, Self={bool(state_for_legal_moves.pending_self_capture)}")
+            state_for_legal_moves = game_state.resolve_pending_captures(player_to_move, simultaneous_rule)
 
         all_legal_actions = state_for_legal_moves.legal_moves(player_to_move)
 
@@ -520,10 +411,11 @@ async def get_legal_moves(
             for move in all_legal_actions
             if move.is_play
         ]
-        logger.debug(f"Found {len(legal_placements)} legal placement moves for {player_to_move.name}.")
+        if _api_trace.debug_enabled:
+            _api_trace.debug("Found %d legal placement moves for %s.", len(legal_placements), player_to_move.name)
         return legal_placements
     except Exception as e:
-        logger.exception(f"Error getting legal moves for game {game_id}: {e}")
+        logger.exception("Error getting legal moves for game %s: %s", game_id, e)
         raise HTTPException(status_code=500, detail="Internal server error getting legal moves.")
 
 
@@ -545,22 +437,38 @@ async def get_game_history(game_id: str = Path(..., description="ID игры"),
             history.append(item)
         return history
     except Exception as e:
-        logger.exception(f"Error getting history for game {game_id}: {e}")
+        logger.exception("Error getting history for game %s: %s", game_id, e)
         raise HTTPException(status_code=500, detail="Internal server error getting game history.")
 
 
 @app.delete("/game/{game_id}", status_code=204, tags=["Game Management"])
 async def delete_game(game_id: str = Path(..., description="ID игры для удаления")):
-    logger.info(f"Request to delete game {game_id}")
+    logger.info("Request to delete game %s", game_id)
     if game_id in active_games:
         del active_games[game_id]
-        logger.info(f"Game {game_id} deleted successfully.")
+        logger.info("Game %s deleted successfully.", game_id)
         return Response(status_code=204)
     else:
-        logger.warning(f"Attempted to delete non-existent game: {game_id}")
+        logger.warning("Attempted to delete non-existent game: %s", game_id)
         raise HTTPException(status_code=404, detail=f"Игра с ID '{game_id}' не найдена.")
 
 
+@app.get("/engine_stats", response_model=EngineStatsResponse, tags=["Diagnostics"])
+async def get_engine_stats():
+    # Накопленные замеры ядра; включаются через GO_INSTRUMENT=1 или instrumentation.enable().
+    measurements = {name: EngineMeasurement(count=m.count, seconds=m.seconds)
+                    for name, m in instrumentation.snapshot().items()}
+    return EngineStatsResponse(enabled=instrumentation.is_enabled(), measurements=measurements)
+
+
+@app.get("/metrics", tags=["Diagnostics"], include_in_schema=False)
+async def get_metrics():
+    # Формат Prometheus text 0.0.4 для локального скрейпа.
+    body = api_metrics.render_metrics(list(active_games.values()), instrumentation.snapshot(),
+                                      instrumentation_enabled=instrumentation.is_enabled())
+    return Response(content=body, media_type=api_metrics.CONTENT_TYPE)
+
+
 @app.get("/", tags=["Root"], include_in_schema=False)
 async def read_root():
     return {"message": "Welcome to the Go Game API! See /docs for details."}
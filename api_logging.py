@@ -0,0 +1,182 @@
+import contextvars
+import json
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Mapping, Optional, TextIO
+
+__all__ = [
+    'JsonFormatter',
+    'RequestContextFilter',
+    'SamplingFilter',
+    'request_context',
+    'reset_request_context',
+    'parse_sample_rates',
+    'setup_logging',
+    'shutdown_logging',
+    'setup_logging_from_env'
+]
+
+# Поля запроса, которые переносятся в каждую JSON-строку. Записи форматируются в потоке слушателя,
+# поэтому контекст нужно снять в потоке обработчика — это делает RequestContextFilter на QueueHandler.
+CONTEXT_FIELDS = ('game_id', 'endpoint', 'latency_ms', 'status')
+
+_TRACE_PREFIX = 'core.trace.'
+
+_request_scope: contextvars.ContextVar = contextvars.ContextVar('go_request_scope', default=None)
+
+
+def request_context(scope: Optional[dict]) -> contextvars.Token:
+    # scope — ASGI scope запроса. Роутер дописывает в него endpoint после сопоставления маршрута,
+    # поэтому имя обработчика читается лениво, в момент записи в лог.
+    return _request_scope.set(scope)
+
+
+def reset_request_context(token: contextvars.Token):
+    _request_scope.reset(token)
+
+
+def _scope_fields(scope: dict) -> Dict[str, Optional[str]]:
+    path_params = scope.get('path_params') or {}
+    endpoint = scope.get('endpoint')
+    return {
+        'game_id': path_params.get('game_id'),
+        'endpoint': getattr(endpoint, '__name__', None) or scope.get('path')
+    }
+
+
+class RequestContextFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        scope = _request_scope.get()
+        if scope is not None:
+            for field, value in _scope_fields(scope).items():
+                if getattr(record, field, None) is None:
+                    setattr(record, field, value)
+        return True
+
+
+def _category(logger_name: str) -> str:
+    # Для трассировки ядра категория совпадает с категорией core.tracing, иначе — имя логгера.
+    return logger_name[len(_TRACE_PREFIX):] if logger_name.startswith(_TRACE_PREFIX) else logger_name
+
+
+class SamplingFilter(logging.Filter):
+    # Прореживает только DEBUG-записи: rate=0.1 пропускает каждую десятую запись категории.
+    # Выборка детерминированная (накопитель), чтобы доля не зависела от генератора случайных чисел.
+    def __init__(self, rates: Mapping[str, float]):
+        super().__init__()
+        for category, rate in rates.items():
+            if not 0.0 <= rate <= 1.0:
+                raise ValueError(f"Sample rate for '{category}' must be between 0 and 1, got {rate}")
+        self.rates = dict(rates)
+        self._credit: Dict[str, float] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        category = _category(record.name)
+        rate = self.rates.get(category)
+        if rate is None or rate >= 1.0:
+            return True
+        credit = self._credit.get(category, 0.0) + rate
+        if credit >= 1.0:
+            self._credit[category] = credit - 1.0
+            return True
+        self._credit[category] = credit
+        return False
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 6),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+_previous_level: Optional[int] = None
+
+
+def setup_logging(level: int = logging.INFO,
+                  stream: Optional[TextIO] = None,
+                  sample_rates: Optional[Mapping[str, float]] = None) -> QueueListener:
+    # Корневой логгер получает только QueueHandler: обработчик запроса кладёт запись в очередь,
+    # а форматирование в JSON и запись в поток идут в фоновом потоке QueueListener.
+    global _listener, _queue_handler, _previous_level
+    if _listener is not None:
+        return _listener
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(stream if stream is not None else sys.stderr)
+    stream_handler.setFormatter(JsonFormatter())
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+    if sample_rates:
+        queue_handler.addFilter(SamplingFilter(sample_rates))
+
+    root = logging.getLogger()
+    _previous_level = root.level
+    root.setLevel(level)
+    # Трассировка ядра уже отфильтрована core.tracing по уровню и категориям.
+    logging.getLogger(_TRACE_PREFIX.rstrip('.')).setLevel(logging.DEBUG)
+    root.addHandler(queue_handler)
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    _queue_handler = queue_handler
+    return _listener
+
+
+def shutdown_logging():
+    # Останавливает слушателя после того, как он запишет всё, что уже в очереди.
+    global _listener, _queue_handler, _previous_level
+    if _listener is None:
+        return
+    root = logging.getLogger()
+    root.removeHandler(_queue_handler)
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.flush()
+    if _previous_level is not None:
+        root.setLevel(_previous_level)
+    logging.getLogger(_TRACE_PREFIX.rstrip('.')).setLevel(logging.NOTSET)
+    _listener = None
+    _queue_handler = None
+    _previous_level = None
+
+
+def parse_sample_rates(value: Optional[str]) -> Dict[str, float]:
+    # "board=0.01,captures=0.1"
+    rates = {}
+    if not value:
+        return rates
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        category, sep, rate = item.partition('=')
+        if not sep:
+            raise ValueError(f"Sample rate must look like category=rate, got '{item}'")
+        rates[category.strip()] = float(rate)
+    return rates
+
+
+def setup_logging_from_env(environ: Mapping[str, str] = os.environ) -> QueueListener:
+    # GO_LOG_LEVEL=INFO, GO_LOG_SAMPLE=board=0.01,captures=0.1
+    level_name = environ.get('GO_LOG_LEVEL', 'INFO').upper()
+    level = logging.getLevelName(level_name)
+    if not isinstance(level, int):
+        raise ValueError(f"Unknown log level: {level_name}")
+    return setup_logging(level=level, sample_rates=parse_sample_rates(environ.get('GO_LOG_SAMPLE')))
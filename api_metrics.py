@@ -0,0 +1,185 @@
+import bisect
+import os
+import threading
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+try:
+    import psutil
+except ImportError:  # psutil необязателен: без него память читается из /proc
+    psutil = None
+
+__all__ = [
+    'CONTENT_TYPE',
+    'LATENCY_BUCKETS',
+    'Histogram',
+    'RequestMetrics',
+    'REQUEST_METRICS',
+    'process_memory_bytes',
+    'render_metrics'
+]
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Границы в секундах: от дешёвых /state до тяжёлых /legal_moves на больших досках с отложенным снятием.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        position = bisect.bisect_left(self.buckets, value)
+        if position < len(self.counts):
+            self.counts[position] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        # Бакеты Prometheus накопительные, последний — +Inf со всеми наблюдениями.
+        result = []
+        running = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            running += bucket_count
+            result.append((_format_value(bound), running))
+        result.append(('+Inf', self.count))
+        return result
+
+
+class RequestMetrics:
+    # Запросы по маршруту (шаблон пути, а не сам путь — иначе каждая партия даст свою серию) и ходы в обработке.
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self._buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._requests: Dict[Labels, int] = {}
+        self._latency: Dict[Labels, Histogram] = {}
+        self.moves_in_flight = 0
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float):
+        route_labels = (('method', method), ('route', route))
+        with self._lock:
+            key = route_labels + (('status', str(status)),)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            histogram = self._latency.get(route_labels)
+            if histogram is None:
+                histogram = self._latency[route_labels] = Histogram(self._buckets)
+            histogram.observe(seconds)
+
+    def move_started(self):
+        with self._lock:
+            self.moves_in_flight += 1
+
+    def move_finished(self):
+        with self._lock:
+            self.moves_in_flight -= 1
+
+    def reset(self):
+        with self._lock:
+            self._requests.clear()
+            self._latency.clear()
+            self.moves_in_flight = 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            requests = sorted(self._requests.items())
+            latency = [(labels, histogram.cumulative(), histogram.total, histogram.count)
+                       for labels, histogram in sorted(self._latency.items())]
+            moves_in_flight = self.moves_in_flight
+        lines = _header('go_http_requests_total', 'counter', 'HTTP requests by method, route and status.')
+        lines.extend(_sample('go_http_requests_total', labels, value) for labels, value in requests)
+        lines.extend(_header('go_http_request_duration_seconds', 'histogram', 'HTTP request latency by route.'))
+        for labels, buckets, total, count in latency:
+            for bound, value in buckets:
+                lines.append(_sample('go_http_request_duration_seconds_bucket', labels + (('le', bound),), value))
+            lines.append(_sample('go_http_request_duration_seconds_sum', labels, total))
+            lines.append(_sample('go_http_request_duration_seconds_count', labels, count))
+        lines.extend(_header('go_moves_in_flight', 'gauge', 'Moves currently being processed.'))
+        lines.append(_sample('go_moves_in_flight', (), moves_in_flight))
+        return lines
+
+
+REQUEST_METRICS = RequestMetrics()
+
+
+def _format_value(value) -> str:
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _sample(name: str, labels: Labels, value) -> str:
+    if not labels:
+        return f"{name} {_format_value(value)}"
+    label_text = ','.join(f'{key}="{_escape(str(label))}"' for key, label in labels)
+    return f"{name}{{{label_text}}} {_format_value(value)}"
+
+
+def _header(name: str, metric_type: str, help_text: str) -> List[str]:
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+
+
+def process_memory_bytes() -> Optional[int]:
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _game_lines(games: Iterable[Mapping]) -> List[str]:
+    by_config: Dict[Labels, int] = {}
+    total = 0
+    for game in games:
+        config = game.get('config', {})
+        labels = (('queue_type', str(config.get('queue_type'))),
+                  ('capture_rule', str(config.get('simultaneous_capture_rule'))),
+                  ('delayed_capture', 'true' if config.get('delayed_capture') else 'false'))
+        by_config[labels] = by_config.get(labels, 0) + 1
+        total += 1
+    lines = _header('go_active_games', 'gauge', 'Games currently held in memory.')
+    lines.append(_sample('go_active_games', (), total))
+    lines.extend(_header('go_games', 'gauge', 'Active games by queue type and capture rule.'))
+    lines.extend(_sample('go_games', labels, count) for labels, count in sorted(by_config.items()))
+    return lines
+
+
+def _engine_lines(measurements: Mapping, enabled: bool) -> List[str]:
+    # Счётчики ядра из core.instrumentation; скорость (копий доски в секунду и т.п.) считает rate() в Prometheus.
+    lines = _header('go_engine_instrumentation_enabled', 'gauge', 'Whether core.instrumentation probes are on.')
+    lines.append(_sample('go_engine_instrumentation_enabled', (), enabled))
+    lines.extend(_header('go_engine_calls_total', 'counter', 'Core engine operations counted by core.instrumentation.'))
+    lines.extend(_sample('go_engine_calls_total', (('probe', name),), m.count)
+                 for name, m in measurements.items())
+    lines.extend(_header('go_engine_seconds_total', 'counter', 'Wall time spent in timed core engine operations.'))
+    lines.extend(_sample('go_engine_seconds_total', (('probe', name),), m.seconds)
+                 for name, m in measurements.items())
+    return lines
+
+
+def render_metrics(games: Iterable[Mapping],
+                   measurements: Mapping,
+                   instrumentation_enabled: bool = False,
+                   request_metrics: RequestMetrics = REQUEST_METRICS) -> str:
+    lines = request_metrics.render()
+    lines.extend(_game_lines(games))
+    lines.extend(_engine_lines(measurements, instrumentation_enabled))
+    memory = process_memory_bytes()
+    if memory is not None:
+        lines.extend(_header('process_resident_memory_bytes', 'gauge', 'Resident memory size in bytes.'))
+        lines.append(_sample('process_resident_memory_bytes', (), memory))
+    return '\n'.join(lines) + '\n'
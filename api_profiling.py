@@ -0,0 +1,216 @@
+import asyncio
+import cProfile
+import collections
+import logging
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+from typing import Counter, NamedTuple, Optional
+
+__all__ = [
+    'ProfilingSettings',
+    'StackSampler',
+    'ProfilingMiddleware',
+    'configure',
+    'configure_from_env',
+    'settings'
+]
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('pstats', 'collapsed')
+
+_GAME_PATH = re.compile(r"^/game/([^/]+)")
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class ProfilingSettings(NamedTuple):
+    directory: str
+    header: str = 'x-go-profile'
+    rate: float = 0.0
+    slow_ms: Optional[float] = None
+    output_format: str = 'pstats'
+    interval: float = 0.001
+
+
+_settings: Optional[ProfilingSettings] = None
+
+
+def configure(directory: Optional[str] = None,
+              header: str = 'x-go-profile',
+              rate: float = 0.0,
+              slow_ms: Optional[float] = None,
+              output_format: str = 'pstats',
+              interval: float = 0.001) -> Optional[ProfilingSettings]:
+    # directory=None выключает профилирование: middleware сразу передаёт запрос дальше.
+    global _settings
+    if directory is None:
+        _settings = None
+        return None
+    if output_format not in FORMATS:
+        raise ValueError(f"Unknown profile format: {output_format}. Expected one of {FORMATS}")
+    if not 0.0 <= rate <= 1.0:
+        raise ValueError(f"Profile rate must be between 0 and 1, got {rate}")
+    if interval <= 0:
+        raise ValueError(f"Sampling interval must be positive, got {interval}")
+    os.makedirs(directory, exist_ok=True)
+    _settings = ProfilingSettings(directory, header.lower(), rate, slow_ms, output_format, interval)
+    return _settings
+
+
+def configure_from_env(environ=os.environ) -> Optional[ProfilingSettings]:
+    # GO_PROFILE_DIR=<dir> включает профилирование. Отбор запросов: заголовок GO_PROFILE_HEADER (по умолчанию
+    # X-Go-Profile), доля GO_PROFILE_RATE, порог GO_PROFILE_SLOW_MS. GO_PROFILE_FORMAT=pstats|collapsed
+    # относится к запросам по заголовку и rate; порог slow_ms сэмплирует каждый запрос без других в обработке
+    # (сэмплер, а не cProfile) и пишет только свёрнутые стеки. Запросы по заголовку и rate профилируются и под
+    # нагрузкой: при уже идущем профиле такой запрос ждёт его окончания (задержка ответа), а число
+    # параллельных запросов попадает в имя файла (_c<n>).
+    slow_ms = environ.get('GO_PROFILE_SLOW_MS')
+    return configure(directory=environ.get('GO_PROFILE_DIR') or None,
+                     header=environ.get('GO_PROFILE_HEADER', 'x-go-profile'),
+                     rate=float(environ.get('GO_PROFILE_RATE', 0.0)),
+                     slow_ms=float(slow_ms) if slow_ms else None,
+                     output_format=environ.get('GO_PROFILE_FORMAT', 'pstats'),
+                     interval=float(environ.get('GO_PROFILE_INTERVAL', 0.001)))
+
+
+def settings() -> Optional[ProfilingSettings]:
+    return _settings
+
+
+class StackSampler:
+    # Сэмплирующий профайлер: фоновый поток раз в interval снимает стек потока цикла событий
+    # и копит свёрнутые стеки в формате flamegraph.pl / speedscope ("f1;f2;f3 count").
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[str] = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='go-stack-sampler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if self._stop.is_set():
+                # Стек уже в stop() — такой сэмпл относится к самому профайлеру.
+                break
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Counter[str]:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+
+def _write_pstats(profiler: cProfile.Profile, path: str):
+    pstats.Stats(profiler).dump_stats(path)
+
+
+def _write_collapsed(stacks: Counter[str], path: str):
+    with open(path, 'w') as output:
+        for stack, count in sorted(stacks.items()):
+            output.write(f"{stack} {count}\n")
+
+
+class ProfilingMiddleware:
+    # Профилирует отобранные запросы целиком (обработчик и ядро). cProfile и сэмплер видят весь поток цикла
+    # событий, поэтому в профиль попадают и другие запросы в обработке — их пиковое число пишется в имя
+    # файла (_c<n>). Профиль в один момент только один: запрос, отобранный по заголовку или rate, ждёт
+    # окончания текущего профиля. По порогу slow_ms (без заголовка и rate) профилируется только запрос без
+    # других в обработке, и всегда сэмплером: cProfile на каждом запросе замедлил бы все ответы.
+    def __init__(self, app):
+        self.app = app
+        self._in_flight = 0
+        self._profiling = False
+        self._profile_done: Optional[asyncio.Event] = None
+        self._concurrent = 0
+
+    async def __call__(self, scope, receive, send):
+        profile_settings = _settings
+        if profile_settings is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        self._in_flight += 1
+        try:
+            if self._profiling:
+                self._concurrent = max(self._concurrent, self._in_flight - 1)
+            requested = self._requested(scope, profile_settings)
+            if requested or (profile_settings.slow_ms is not None and self._in_flight == 1):
+                await self._profile(scope, receive, send, profile_settings, requested)
+            else:
+                await self.app(scope, receive, send)
+        finally:
+            self._in_flight -= 1
+
+    async def _profile(self, scope, receive, send, profile_settings: ProfilingSettings, requested: bool):
+        if self._profiling:
+            logger.info("Profile of %s %s waits for the running profile to finish", scope['method'], scope['path'])
+        while self._profiling:
+            await self._profile_done.wait()
+
+        self._profiling = True
+        self._profile_done = asyncio.Event()
+        self._concurrent = self._in_flight - 1
+        profiler = sampler = None
+        if requested and profile_settings.output_format == 'pstats':
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            sampler = StackSampler(threading.get_ident(), profile_settings.interval)
+            sampler.start()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if profiler is not None:
+                profiler.disable()
+            stacks = sampler.stop() if sampler is not None else None
+            concurrent = self._concurrent
+            self._profiling = False
+            self._profile_done.set()
+        if requested or elapsed_ms >= profile_settings.slow_ms:
+            path = self._output_path(scope, profile_settings, elapsed_ms, concurrent, profiler is not None)
+            # Запись файла — в пуле потоков, чтобы не держать цикл событий на диске.
+            loop = asyncio.get_running_loop()
+            if profiler is not None:
+                await loop.run_in_executor(None, _write_pstats, profiler, path)
+            else:
+                await loop.run_in_executor(None, _write_collapsed, stacks, path)
+            logger.info("Profiled %s %s in %.1f ms -> %s", scope['method'], scope['path'], elapsed_ms, path)
+
+    @staticmethod
+    def _requested(scope, profile_settings: ProfilingSettings) -> bool:
+        header = profile_settings.header.encode('latin-1')
+        for name, value in scope.get("headers", ()):
+            if name == header and value not in (b"", b"0"):
+                return True
+        return profile_settings.rate > 0 and random.random() < profile_settings.rate
+
+    @staticmethod
+    def _output_path(scope, profile_settings: ProfilingSettings, elapsed_ms: float, concurrent: int,
+                     pstats_output: bool) -> str:
+        match = _GAME_PATH.match(scope.get("path", ""))
+        game_id = match.group(1) if match else 'nogame'
+        route = getattr(scope.get("route"), "path", None) or scope.get("path", "")
+        route_name = scope['method'] + _UNSAFE.sub('_', route).rstrip('_')
+        extension = 'prof' if pstats_output else 'collapsed'
+        stamp = f"{time.strftime('%Y%m%dT%H%M%S')}.{time.time_ns() % 1_000_000_000:09d}"
+        filename = f"{stamp}_{int(elapsed_ms)}ms_c{concurrent}_{_UNSAFE.sub('_', game_id)}_{route_name}.{extension}"
+        return os.path.join(profile_settings.directory, filename)
+
+
+configure_from_env()
@@ -1,31 +1,23 @@
-from core.gotypes import Point
+from core.geometry import geometry
 
 
 def is_point_an_eye(board, point, color):
     if board.get(point) is not None:
         return False
-    for neighbor in point.neighbors():
-        if board.is_on_grid(neighbor):
-            neighbor_color = board.get(neighbor)
-            if neighbor_color == color:
-                return True
+    board_geometry = geometry(board.num_rows, board.num_cols)
+    for neighbor in board_geometry.neighbors[point]:
+        neighbor_color = board.get(neighbor)
+        if neighbor_color == color:
+            return True
 
     friendly_corners = 0
-    off_board_corners = 0
-    corners = [
-        Point(point.row - 1, point.col - 1),
-        Point(point.row - 1, point.col + 1),
-        Point(point.row + 1, point.col - 1),
-        Point(point.row + 1, point.col + 1),
-    ]
+    corners = board_geometry.diagonals[point]
+    off_board_corners = 4 - len(corners)
 
     for corner in corners:
-        if board.is_on_grid(corner):
-            corner_color = board.get(corner)
-            if corner_color == color:
-                friendly_corners += 1
-        else:
-            off_board_corners += 1
+        corner_color = board.get(corner)
+        if corner_color == color:
+            friendly_corners += 1
     if off_board_corners > 0:
         return off_board_corners + friendly_corners == 4
     return friendly_corners >= 3
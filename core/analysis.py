@@ -0,0 +1,110 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from core import zobrist
+from core.gotypes import Player
+
+__all__ = [
+    'MoveMasks',
+    'move_masks'
+]
+
+EMPTY = 0
+BORDER = 3
+
+
+class MoveMasks(NamedTuple):
+    legal: np.ndarray
+    atari: np.ndarray
+    self_atari: np.ndarray
+
+
+def _neighbor_views(padded: np.ndarray):
+    # Соседи внутренних точек: сдвиги доски с рамкой вверх, вниз, влево и вправо.
+    return (padded[:-2, 1:-1], padded[2:, 1:-1], padded[1:-1, :-2], padded[1:-1, 2:])
+
+
+def _label_strings(padded: np.ndarray) -> np.ndarray:
+    # Метка камня — минимальный индекс в его строке; у пустых точек и рамки метка равна size.
+    size = padded.size
+    center = padded[1:-1, 1:-1]
+    stones = (padded == Player.black.value) | (padded == Player.white.value)
+    labels = np.where(stones, np.arange(size).reshape(padded.shape), size)
+    while True:
+        updated = labels.copy()
+        inner = updated[1:-1, 1:-1]
+        for neighbor_colors, neighbor_labels in zip(_neighbor_views(padded), _neighbor_views(labels)):
+            np.minimum(inner, np.where(neighbor_colors == center, neighbor_labels, size), out=inner)
+        # Перескок по указателям: метка метки тоже принадлежит этой строке.
+        flat = updated.ravel()
+        updated = np.where(stones, flat[np.minimum(flat, size - 1)].reshape(padded.shape), size)
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def move_masks(game_state, player: Player) -> MoveMasks:
+    board = game_state.board
+    num_rows, num_cols = board.num_rows, board.num_cols
+    shape = (num_rows, num_cols)
+    if game_state.is_over:
+        nothing = np.zeros(shape, dtype=bool)
+        return MoveMasks(nothing, nothing.copy(), nothing.copy())
+
+    padded = np.pad(board.to_array(), 1, constant_values=BORDER)
+    size = padded.size
+    own, opponent = player.value, player.other.value
+    labels = _label_strings(padded)
+    indexes = np.arange(size).reshape(padded.shape)
+    center = padded[1:-1, 1:-1]
+    empty = center == EMPTY
+
+    # Точные свободы строк: уникальные пары (метка строки, пустая точка).
+    neighbor_colors = _neighbor_views(padded)
+    neighbor_labels = _neighbor_views(labels)
+    pairs = []
+    for colors, string_labels in zip(neighbor_colors, neighbor_labels):
+        touching = empty & (colors != EMPTY) & (colors != BORDER)
+        pairs.append(string_labels[touching].astype(np.int64) * size + indexes[1:-1, 1:-1][touching])
+    pairs = np.unique(np.concatenate(pairs))
+    liberty_counts = np.bincount(pairs // size, minlength=size + 1)
+    liberty_sums = np.bincount(pairs // size, weights=pairs % size, minlength=size + 1).astype(np.int64)
+
+    has_empty_neighbor = np.zeros(shape, dtype=bool)
+    captures = np.zeros(shape, dtype=bool)
+    own_safe = np.zeros(shape, dtype=bool)
+    own_roomy = np.zeros(shape, dtype=bool)
+    remaining_liberties = []
+    for colors, string_labels, offset in zip(neighbor_colors, neighbor_labels,
+                                             (-padded.shape[1], padded.shape[1], -1, 1)):
+        counts = liberty_counts[string_labels]
+        has_empty_neighbor |= colors == EMPTY
+        captures |= (colors == opponent) & (counts == 1)
+        own_safe |= (colors == own) & (counts >= 2)
+        own_roomy |= (colors == own) & (counts >= 3)
+        remaining_liberties.append(np.where(colors == EMPTY, indexes[1:-1, 1:-1] + offset, -1))
+        other_liberty = liberty_sums[string_labels] - indexes[1:-1, 1:-1]
+        remaining_liberties.append(np.where((colors == own) & (counts == 2), other_liberty, -1))
+
+    legal = empty & (has_empty_neighbor | captures | own_safe)
+    atari = empty & captures
+
+    if game_state.previous_states:
+        hash_codes = zobrist.table(num_rows, num_cols)
+        position_hash = np.uint64(board.zobrist_hash())
+        next_hashes = hash_codes[indexes[1:-1, 1:-1], own] ^ position_hash
+        history = np.fromiter(game_state.previous_states, dtype=np.uint64, count=len(game_state.previous_states))
+        for r, c in zip(*np.nonzero(legal & captures)):
+            captured_labels = {labels_view[r, c] for colors, labels_view in zip(neighbor_colors, neighbor_labels)
+                               if colors[r, c] == opponent and liberty_counts[labels_view[r, c]] == 1}
+            captured_stones = np.isin(labels, list(captured_labels))
+            next_hashes[r, c] ^= np.bitwise_xor.reduce(hash_codes[indexes[captured_stones], opponent])
+        legal &= ~np.isin(next_hashes, history)
+
+    # Самоатари: после хода без взятия у получившейся строки остаётся ровно одна свобода.
+    remaining = np.sort(np.stack(remaining_liberties, axis=-1), axis=-1)
+    distinct = (remaining >= 0) & np.concatenate(
+        [np.ones(shape + (1,), dtype=bool), remaining[..., 1:] != remaining[..., :-1]], axis=-1)
+    self_atari = legal & ~captures & ~own_roomy & (distinct.sum(axis=-1) == 1)
+    return MoveMasks(legal, atari, self_atari)
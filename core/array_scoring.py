@@ -0,0 +1,107 @@
+from typing import List, Tuple
+
+import numpy as np
+from numba import njit
+
+from core.geometry import geometry
+from core.scoring import DEFAULT_KOMI, GameResult, Territory
+
+__all__ = [
+    'evaluate_territory_array',
+    'area_scores',
+    'compute_game_results'
+]
+
+EMPTY = 0
+BORDER = 3
+DAME = 0
+NOT_EMPTY = -1
+
+
+@njit(cache=True)
+def label_territory(colors, stride, owners) -> Tuple[int, int, int, int]:
+    # colors — доска с рамкой в виде плоского int8-массива. Для пустых точек owners получает владельца
+    # области (0 — дамэ, 1 — чёрные, 2 — белые), для остальных -1.
+    offsets = np.array([-stride, stride, -1, 1], np.int64)
+    black_stones = 0
+    white_stones = 0
+    black_territory = 0
+    white_territory = 0
+    owners[:] = NOT_EMPTY
+    visited = np.zeros(colors.size, np.bool_)
+    stack = np.empty(colors.size, np.int64)
+    members = np.empty(colors.size, np.int64)
+    for start in range(colors.size):
+        color = colors[start]
+        if color == 1:
+            black_stones += 1
+        elif color == 2:
+            white_stones += 1
+        elif color == EMPTY and not visited[start]:
+            visited[start] = True
+            stack[0] = start
+            top = 1
+            region_size = 0
+            borders = 0
+            while top:
+                top -= 1
+                point = stack[top]
+                members[region_size] = point
+                region_size += 1
+                for offset in offsets:
+                    neighbor = point + offset
+                    neighbor_color = colors[neighbor]
+                    if neighbor_color == EMPTY:
+                        if not visited[neighbor]:
+                            visited[neighbor] = True
+                            stack[top] = neighbor
+                            top += 1
+                    elif neighbor_color != BORDER:
+                        borders |= neighbor_color
+            owner = borders if borders == 1 or borders == 2 else DAME
+            for i in range(region_size):
+                owners[members[i]] = owner
+            if owner == 1:
+                black_territory += region_size
+            elif owner == 2:
+                white_territory += region_size
+    return black_stones, white_stones, black_territory, white_territory
+
+
+@njit(cache=True)
+def _area_scores(padded_boards, stride):
+    scores = np.empty((padded_boards.shape[0], 2), np.int64)
+    owners = np.empty(padded_boards.shape[1], np.int8)
+    for game in range(padded_boards.shape[0]):
+        black_stones, white_stones, black_territory, white_territory = \
+            label_territory(padded_boards[game], stride, owners)
+        scores[game, 0] = black_stones + black_territory
+        scores[game, 1] = white_stones + white_territory
+    return scores
+
+
+def _padded(colors: np.ndarray) -> np.ndarray:
+    pad = [(0, 0)] * (colors.ndim - 2) + [(1, 1), (1, 1)]
+    return np.pad(colors.astype(np.int8, copy=False), pad, constant_values=BORDER)
+
+
+def evaluate_territory_array(colors: np.ndarray) -> Territory:
+    # Тот же результат, что scoring.evaluate_territory, но по int8-массиву (rows, cols) из board.to_array().
+    num_rows, num_cols = colors.shape
+    padded = _padded(colors).ravel()
+    owners = np.empty(padded.size, np.int8)
+    black_stones, white_stones, black_territory, white_territory = label_territory(padded, num_cols + 2, owners)
+    point_at = geometry(num_rows, num_cols).point_at
+    dame_points = [point_at[index] for index in np.flatnonzero(owners == DAME)]
+    return Territory.from_counts(black_territory, white_territory, black_stones, white_stones, dame_points)
+
+
+def area_scores(boards: np.ndarray) -> np.ndarray:
+    # Пакетный подсчёт: boards формы (n, rows, cols) -> массив (n, 2) площадей чёрных и белых.
+    num_boards, num_rows, num_cols = boards.shape
+    padded = _padded(boards).reshape(num_boards, -1)
+    return _area_scores(padded, num_cols + 2)
+
+
+def compute_game_results(boards: np.ndarray, komi: float = DEFAULT_KOMI) -> List[GameResult]:
+    return [GameResult(int(black), int(white), komi=komi) for black, white in area_scores(boards)]
@@ -0,0 +1,545 @@
+import logging
+from array import array
+from typing import Optional, List, Literal, Set, Tuple, FrozenSet
+
+import numpy as np
+
+from core import instrumentation, tracing, zobrist
+from core.geometry import geometry
+from core.goboard import GoString, PotentialCaptures, PlayProbe, IllegalMoveError
+from core.legality import LegalPointTracker
+from core.liberties import LibertyIndex
+from core.position import Position, position_colors, position_strings
+from core.scoring import AreaTracker, Territory
+from core.gotypes import Player, Point
+
+logger = logging.getLogger(__name__)
+_board_trace = tracing.tracer('board')
+_captures_trace = tracing.tracer('captures')
+_copy_probe = instrumentation.probe('board.copy')
+
+__all__ = [
+    'ArrayBoard'
+]
+
+EMPTY = 0
+BORDER = 3
+
+_COLORS, _STRING_IDS, _NEXT, _SIZES, _LIBERTIES, _SUMS, _SQUARES = range(7)
+_NO_CAPTURES = PotentialCaptures(frozenset(), None)
+
+class ArrayBoard:
+    def __init__(self, num_rows, num_cols):
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self._stride = num_cols + 2
+        self._size = (num_rows + 2) * self._stride
+        self._offsets = (-self._stride, self._stride, -1, 1)
+        self._colors = bytearray([BORDER]) * self._size
+        for r in range(1, num_rows + 1):
+            start = r * self._stride + 1
+            self._colors[start:start + num_cols] = bytes(num_cols)
+        # Строки камней: id строки (индекс корня) и кольцевой список камней строки.
+        self._string_ids = array('i', [0]) * self._size
+        self._next_stone = array('i', [0]) * self._size
+        # Статистика по корням: число камней и псевдо-свободы (количество, сумма, сумма квадратов).
+        self._string_sizes = array('i', [0]) * self._size
+        self._pseudo_liberties = array('i', [0]) * self._size
+        self._liberty_sums = array('q', [0]) * self._size
+        self._liberty_square_sums = array('q', [0]) * self._size
+        self._num_stones = 0
+        self._hash = zobrist.EMPTY_BOARD
+        self._hash_codes = zobrist.padded_table(num_rows, num_cols)
+        self._point_at = geometry(num_rows, num_cols).point_at
+        self._area = AreaTracker(num_rows, num_cols)
+        self._legal = LegalPointTracker(num_rows, num_cols)
+        self._liberties = LibertyIndex(num_rows, num_cols)
+        # После копирования трекеры общие с исходной доской и копируются только перед первым изменением.
+        self._trackers_shared = False
+        self.pending_opponent_captures: FrozenSet[GoString] = frozenset()
+        self.pending_self_capture: Optional[GoString] = None
+        self._reset_undo()
+
+    def _reset_undo(self):
+        self._tables = (self._colors, self._string_ids, self._next_stone, self._string_sizes,
+                        self._pseudo_liberties, self._liberty_sums, self._liberty_square_sums)
+        # Журнал перезаписанных ячеек: тройки (таблица, индекс, старое значение).
+        self._trail = array('q')
+        self._recording = False
+        # Записи отката: отметка журнала и число камней, хеш, отложенные захваты.
+        self._undo_marks = array('q')
+        self._undo_hashes = array('Q')
+        self._undo_pending: List[Tuple[FrozenSet[GoString], Optional[GoString]]] = []
+
+    @classmethod
+    def from_position(cls, position: Position, num_rows: Optional[int] = None,
+                      num_cols: Optional[int] = None) -> 'ArrayBoard':
+        # Вся позиция сразу: таблицы строк, псевдо-свободы и хеш заполняются за один проход по строкам.
+        num_rows, num_cols, colors = position_colors(position, num_rows, num_cols)
+        board = cls(num_rows, num_cols)
+        board._colors[:] = colors
+        board._area.load(colors)
+        string_ids = board._string_ids
+        next_stone = board._next_stone
+        pseudo_liberties = board._pseudo_liberties
+        liberty_sums = board._liberty_sums
+        liberty_square_sums = board._liberty_square_sums
+        offsets = board._offsets
+        position_hash = board._hash
+        for string in position_strings(num_rows, num_cols, colors):
+            stones = string.stones
+            root = stones[0]
+            codes = board._hash_codes[string.color]
+            for i, stone in enumerate(stones):
+                string_ids[stone] = root
+                next_stone[stone] = stones[i + 1] if i + 1 < len(stones) else root
+                position_hash ^= codes[stone]
+                for offset in offsets:
+                    neighbor = stone + offset
+                    if colors[neighbor] == EMPTY:
+                        pseudo_liberties[root] += 1
+                        liberty_sums[root] += neighbor
+                        liberty_square_sums[root] += neighbor * neighbor
+            board._string_sizes[root] = len(stones)
+            board._num_stones += len(stones)
+        board._hash = position_hash
+        return board
+
+    def _index(self, point: Point) -> int:
+        return point.row * self._stride + point.col
+
+    def _point(self, index: int) -> Point:
+        return self._point_at[index]
+
+    def is_on_grid(self, point: Point) -> bool:
+        return 1 <= point.row <= self.num_rows and \
+            1 <= point.col <= self.num_cols
+
+    def get(self, point: Point) -> Optional[Player]:
+        if not self.is_on_grid(point):
+            return None
+        color = self._colors[self._index(point)]
+        return Player(color) if color else None
+
+    def get_go_string(self, point: Point) -> Optional[GoString]:
+        if not self.is_on_grid(point):
+            return None
+        index = self._index(point)
+        if not self._colors[index]:
+            return None
+        return self._materialize(self._string_ids[index])
+
+    def _string_stones(self, root: int) -> List[int]:
+        next_stone = self._next_stone
+        stones = [root]
+        stone = next_stone[root]
+        while stone != root:
+            stones.append(stone)
+            stone = next_stone[stone]
+        return stones
+
+    def _string_liberties(self, root: int) -> Set[int]:
+        colors = self._colors
+        liberties = set()
+        for stone in self._string_stones(root):
+            for offset in self._offsets:
+                if colors[stone + offset] == EMPTY:
+                    liberties.add(stone + offset)
+        return liberties
+
+    def _string_liberty_indexes(self, index: int) -> Set[int]:
+        color = self._colors[index]
+        if color == EMPTY or color == BORDER:
+            return set()
+        return self._string_liberties(self._string_ids[index])
+
+    def _string_stones_and_liberties(self, index: int) -> Tuple[List[int], Set[int]]:
+        color = self._colors[index]
+        if color == EMPTY or color == BORDER:
+            return [], set()
+        root = self._string_ids[index]
+        return self._string_stones(root), self._string_liberties(root)
+
+    def _materialize(self, root: int) -> GoString:
+        return GoString(Player(self._colors[root]),
+                        [self._point(i) for i in self._string_stones(root)],
+                        [self._point(i) for i in self._string_liberties(root)])
+
+    def _is_in_atari(self, root: int) -> bool:
+        # Все псевдо-свободы совпадают с одной точкой: sum^2 == count * sum(x^2)
+        count = self._pseudo_liberties[root]
+        total = self._liberty_sums[root]
+        return count > 0 and total * total == count * self._liberty_square_sums[root]
+
+    def _xor_string(self, root: int, position_hash: int) -> int:
+        codes = self._hash_codes[self._colors[root]]
+        next_stone = self._next_stone
+        stone = root
+        while True:
+            position_hash ^= codes[stone]
+            stone = next_stone[stone]
+            if stone == root:
+                return position_hash
+
+    def probe_play(self, player: Player, point: Point) -> PlayProbe:
+        if not self.is_on_grid(point):
+            return PlayProbe(True, False, False, self._hash)
+        index = self._index(point)
+        colors = self._colors
+        if colors[index] != EMPTY:
+            return PlayProbe(True, False, False, self._hash)
+
+        string_ids = self._string_ids
+        color = player.value
+        has_liberty = False
+        own_roots = []
+        captured_roots = []
+        for offset in self._offsets:
+            neighbor = index + offset
+            neighbor_color = colors[neighbor]
+            if neighbor_color == EMPTY:
+                has_liberty = True
+            elif neighbor_color == BORDER:
+                continue
+            elif neighbor_color == color:
+                neighbor_root = string_ids[neighbor]
+                if neighbor_root not in own_roots:
+                    own_roots.append(neighbor_root)
+                # Точка — свобода соседней строки; если строка не в атари, у неё есть другая свобода.
+                if not self._is_in_atari(neighbor_root):
+                    has_liberty = True
+            else:
+                neighbor_root = string_ids[neighbor]
+                if neighbor_root not in captured_roots and self._is_in_atari(neighbor_root):
+                    captured_roots.append(neighbor_root)
+
+        next_hash = self._hash ^ self._hash_codes[color][index]
+        if captured_roots:
+            for root in captured_roots:
+                next_hash = self._xor_string(root, next_hash)
+        elif not has_liberty:
+            next_hash ^= self._hash_codes[color][index]
+            for root in own_roots:
+                next_hash = self._xor_string(root, next_hash)
+        return PlayProbe(False, not has_liberty and not captured_roots, bool(captured_roots), next_hash)
+
+    def _own_trackers(self):
+        self._area = self._area.copy()
+        self._legal = self._legal.copy()
+        self._liberties = self._liberties.copy()
+        self._trackers_shared = False
+
+    def _record_root_stats(self, root: int):
+        self._trail.extend((_SIZES, root, self._string_sizes[root],
+                            _LIBERTIES, root, self._pseudo_liberties[root],
+                            _SUMS, root, self._liberty_sums[root],
+                            _SQUARES, root, self._liberty_square_sums[root]))
+
+    def _merge_strings(self, root: int, other: int) -> int:
+        sizes = self._string_sizes
+        if sizes[root] < sizes[other]:
+            root, other = other, root
+        string_ids = self._string_ids
+        next_stone = self._next_stone
+        trail = self._trail if self._recording else None
+        if trail is not None:
+            self._record_root_stats(root)
+            trail.extend((_NEXT, root, next_stone[root], _NEXT, other, next_stone[other]))
+        stone = other
+        while True:
+            if trail is not None:
+                trail.extend((_STRING_IDS, stone, string_ids[stone]))
+            string_ids[stone] = root
+            stone = next_stone[stone]
+            if stone == other:
+                break
+        next_stone[root], next_stone[other] = next_stone[other], next_stone[root]
+        sizes[root] += sizes[other]
+        self._pseudo_liberties[root] += self._pseudo_liberties[other]
+        self._liberty_sums[root] += self._liberty_sums[other]
+        self._liberty_square_sums[root] += self._liberty_square_sums[other]
+        return root
+
+    def _remove_root(self, root: int):
+        if self._trackers_shared:
+            self._own_trackers()
+        colors = self._colors
+        string_ids = self._string_ids
+        pseudo_liberties = self._pseudo_liberties
+        liberty_sums = self._liberty_sums
+        liberty_square_sums = self._liberty_square_sums
+        trail = self._trail if self._recording else None
+        codes = self._hash_codes[colors[root]]
+        stones = self._string_stones(root)
+        for stone in stones:
+            if trail is not None:
+                trail.extend((_COLORS, stone, colors[stone], _STRING_IDS, stone, string_ids[stone]))
+            self._hash ^= codes[stone]
+            colors[stone] = EMPTY
+            self._area.set_color(stone, EMPTY)
+            self._legal.mark(stone)
+            self._liberties.mark(stone)
+        for stone in stones:
+            string_ids[stone] = 0
+            for offset in self._offsets:
+                neighbor = stone + offset
+                if colors[neighbor] == EMPTY or colors[neighbor] == BORDER:
+                    continue
+                neighbor_root = string_ids[neighbor]
+                if trail is not None:
+                    self._record_root_stats(neighbor_root)
+                pseudo_liberties[neighbor_root] += 1
+                liberty_sums[neighbor_root] += stone
+                liberty_square_sums[neighbor_root] += stone * stone
+        self._num_stones -= len(stones)
+
+    @instrumentation.timed('board.remove_string')
+    def _remove_string(self, string_to_remove: GoString):
+        if _captures_trace.debug_enabled:
+            _captures_trace.debug("Physically removing string: %r", string_to_remove)
+        color = string_to_remove.color.value
+        roots = set()
+        for point in string_to_remove.stones:
+            index = self._index(point)
+            if self._colors[index] == color:
+                roots.add(self._string_ids[index])
+            else:
+                logger.warning("Attempted to remove point %s which is not occupied by the string in _remove_string.", point)
+        for root in roots:
+            if self._string_sizes[root] > len(string_to_remove.stones):
+                logger.warning("String %r has grown since it was read. Removing the whole string.", string_to_remove)
+            self._remove_root(root)
+
+    def _place(self, index: int, color: int) -> Tuple[int, List[int]]:
+        if self._trackers_shared:
+            self._own_trackers()
+        colors = self._colors
+        string_ids = self._string_ids
+        pseudo_liberties = self._pseudo_liberties
+        liberty_sums = self._liberty_sums
+        liberty_square_sums = self._liberty_square_sums
+        trail = self._trail if self._recording else None
+        if trail is not None:
+            trail.extend((_COLORS, index, EMPTY,
+                          _STRING_IDS, index, string_ids[index],
+                          _NEXT, index, self._next_stone[index]))
+            self._record_root_stats(index)
+        colors[index] = color
+        self._area.set_color(index, color)
+        self._legal.mark(index)
+        self._liberties.mark(index)
+        self._num_stones += 1
+        self._hash ^= self._hash_codes[color][index]
+
+        string_ids[index] = index
+        self._next_stone[index] = index
+        self._string_sizes[index] = 1
+        liberties = total = square_total = 0
+        for offset in self._offsets:
+            neighbor = index + offset
+            neighbor_color = colors[neighbor]
+            if neighbor_color == EMPTY:
+                liberties += 1
+                total += neighbor
+                square_total += neighbor * neighbor
+            elif neighbor_color != BORDER:
+                neighbor_root = string_ids[neighbor]
+                if trail is not None:
+                    self._record_root_stats(neighbor_root)
+                pseudo_liberties[neighbor_root] -= 1
+                liberty_sums[neighbor_root] -= index
+                liberty_square_sums[neighbor_root] -= index * index
+        pseudo_liberties[index] = liberties
+        liberty_sums[index] = total
+        liberty_square_sums[index] = square_total
+
+        root = index
+        captured_roots: List[int] = []
+        for offset in self._offsets:
+            neighbor = index + offset
+            neighbor_color = colors[neighbor]
+            if neighbor_color == color:
+                neighbor_root = string_ids[neighbor]
+                if neighbor_root != root:
+                    root = self._merge_strings(root, neighbor_root)
+            elif neighbor_color != EMPTY and neighbor_color != BORDER:
+                neighbor_root = string_ids[neighbor]
+                if pseudo_liberties[neighbor_root] == 0 and neighbor_root not in captured_roots:
+                    captured_roots.append(neighbor_root)
+        return root, captured_roots
+
+    def _resolve_captures(self, root: int, captured_roots: List[int],
+                          simultaneous_capture_rule: str, delayed_capture: bool):
+        if delayed_capture:
+            return
+        player_zero_libs = self._pseudo_liberties[root] == 0
+        remove_opponent = False
+        remove_self = False
+        if captured_roots and player_zero_libs:
+            remove_opponent = simultaneous_capture_rule in ('opponent', 'both')
+            remove_self = simultaneous_capture_rule in ('self', 'both')
+        elif captured_roots:
+            remove_opponent = True
+        elif player_zero_libs:
+            remove_self = True
+
+        if remove_opponent:
+            for captured_root in captured_roots:
+                self._remove_root(captured_root)
+        if remove_self:
+            self._remove_root(root)
+
+    @instrumentation.timed('board.place_stone')
+    def place_stone(self,
+                    player: Player,
+                    point: Point,
+                    simultaneous_capture_rule: Literal['opponent', 'both', 'self'] = 'opponent',
+                    delayed_capture: bool = False
+                    ) -> PotentialCaptures:
+        assert self.is_on_grid(point), f"Point {point} is off the board ({self.num_rows}x{self.num_cols})"
+        index = self._index(point)
+        if self._colors[index] != EMPTY:
+            raise IllegalMoveError(f"Point {point} is already occupied by {self.get(point)}")
+
+        if _board_trace.info_enabled:
+            _board_trace.info("Attempting to place %s at %s. Sim Rule: %s, Delayed: %s",
+                              player.name, point, simultaneous_capture_rule, delayed_capture)
+
+        root, captured_roots = self._place(index, player.value)
+        player_zero_libs = self._pseudo_liberties[root] == 0
+        if not captured_roots and not player_zero_libs:
+            return _NO_CAPTURES
+
+        opponent_groups = frozenset(self._materialize(r) for r in captured_roots)
+        player_group = self._materialize(root) if player_zero_libs else None
+        if not delayed_capture:
+            if captured_roots and player_zero_libs:
+                if _captures_trace.info_enabled:
+                    _captures_trace.info("Immediate simultaneous capture scenario. Applying rule: '%s'",
+                                         simultaneous_capture_rule)
+            elif player_zero_libs:
+                logger.warning("Self-capture move detected for %s at %s (non-simultaneous). Removing player group.",
+                               player.name, point)
+        self._resolve_captures(root, captured_roots, simultaneous_capture_rule, delayed_capture)
+        return PotentialCaptures(opponent_groups=opponent_groups, player_group=player_group)
+
+    def play(self,
+             player: Player,
+             point: Point,
+             simultaneous_capture_rule: Literal['opponent', 'both', 'self'] = 'opponent',
+             delayed_capture: bool = False
+             ) -> PotentialCaptures:
+        index = self._index(point)
+        if not self.is_on_grid(point) or self._colors[index] != EMPTY:
+            raise IllegalMoveError(f"Point {point} is off the board or already occupied")
+
+        self._undo_marks.extend((len(self._trail), self._num_stones))
+        self._undo_hashes.append(self._hash)
+        self._undo_pending.append((self.pending_opponent_captures, self.pending_self_capture))
+        self._recording = True
+        try:
+            root, captured_roots = self._place(index, player.value)
+            player_zero_libs = self._pseudo_liberties[root] == 0
+            if not captured_roots and not player_zero_libs:
+                return _NO_CAPTURES
+            captures = PotentialCaptures(
+                opponent_groups=frozenset(self._materialize(r) for r in captured_roots),
+                player_group=self._materialize(root) if player_zero_libs else None)
+            self._resolve_captures(root, captured_roots, simultaneous_capture_rule, delayed_capture)
+        finally:
+            self._recording = False
+
+        if delayed_capture:
+            self.pending_opponent_captures = self.pending_opponent_captures | captures.opponent_groups
+            if captures.player_group is not None:
+                self.pending_self_capture = captures.player_group
+        return captures
+
+    def undo(self):
+        if not self._undo_hashes:
+            raise IndexError("No moves to undo")
+        if self._trackers_shared:
+            self._own_trackers()
+        tables = self._tables
+        trail = self._trail
+        num_stones = self._undo_marks.pop()
+        mark = self._undo_marks.pop()
+        area = self._area
+        legal = self._legal
+        liberties = self._liberties
+        while len(trail) > mark:
+            old_value = trail.pop()
+            index = trail.pop()
+            table = trail.pop()
+            tables[table][index] = old_value
+            if table == _COLORS:
+                area.set_color(index, old_value)
+                legal.mark(index)
+                liberties.mark(index)
+        self._num_stones = num_stones
+        self._hash = self._undo_hashes.pop()
+        self.pending_opponent_captures, self.pending_self_capture = self._undo_pending.pop()
+
+    def to_array(self) -> np.ndarray:
+        colors = np.frombuffer(self._colors, dtype=np.int8).reshape(self.num_rows + 2, self.num_cols + 2)
+        return colors[1:-1, 1:-1].copy()
+
+    def area_scores(self) -> Tuple[int, int]:
+        return self._area.scores()
+
+    def territory(self) -> Territory:
+        return self._area.territory()
+
+    def strings_by_liberties(self, num_liberties: int, color: Optional[Player] = None) -> List[GoString]:
+        # num_liberties: 0, 1 или 2 — две и больше.
+        anchors = self._liberties.anchors(self, num_liberties)
+        return [self._materialize(self._string_ids[anchor]) for anchor in anchors
+                if color is None or self._colors[anchor] == color.value]
+
+    def liberty_class(self, point: Point) -> Optional[int]:
+        if not self.is_on_grid(point):
+            return None
+        return self._liberties.liberty_class(self, self._index(point))
+
+    def legal_indexes(self, player: Player) -> Tuple[Set[int], Set[int]]:
+        return self._legal.legal_indexes(self, player)
+
+    def zobrist_hash(self):
+        return self._hash
+
+    def __deepcopy__(self, memodict=None):
+        if memodict is None: memodict = {}
+        if id(self) in memodict: return memodict[id(self)]
+
+        if _copy_probe.enabled:
+            _copy_probe.add()
+        new_board = ArrayBoard.__new__(ArrayBoard)
+        new_board.__dict__.update(self.__dict__)
+        new_board._colors = self._colors[:]
+        new_board._string_ids = self._string_ids[:]
+        new_board._next_stone = self._next_stone[:]
+        new_board._string_sizes = self._string_sizes[:]
+        new_board._pseudo_liberties = self._pseudo_liberties[:]
+        new_board._liberty_sums = self._liberty_sums[:]
+        new_board._liberty_square_sums = self._liberty_square_sums[:]
+        # Копия — это семь плоских таблиц; трекеры (_area, _legal, _liberties) остаются общими, пока
+        # одна из досок не изменится. Ленивый пересчёт общего трекера безопасен: позиции у досок совпадают.
+        self._trackers_shared = True
+        new_board._trackers_shared = True
+        new_board._reset_undo()
+
+        memodict[id(self)] = new_board
+        return new_board
+
+    def is_full(self):
+        return self._num_stones == self.num_rows * self.num_cols
+
+    @property
+    def count_empty_points(self):
+        return self.num_rows * self.num_cols - self._num_stones
+
+    def __eq__(self, other):
+        if not isinstance(other, ArrayBoard): return NotImplemented
+        if self.num_rows != other.num_rows or self.num_cols != other.num_cols: return False
+        if self._hash != other._hash: return False
+        return self._colors == other._colors
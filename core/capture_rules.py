@@ -18,10 +18,7 @@ def apply_capture_rules(board, player, adjacent_opposite_color, capture_mode):
 
 
 def cleanup_delayed_captures(board, color):
-    groups_to_remove = set()
-    for pos, string in board._grid.items():
-        if string is not None and string.color == color and string.num_liberties == 0:
-            groups_to_remove.add(string)
+    groups_to_remove = board.strings_by_liberties(0, color)
 
     for group in groups_to_remove:
         board._remove_string(group)
@@ -0,0 +1,56 @@
+from typing import Dict, List, Optional, Tuple
+
+from core.gotypes import Point
+
+__all__ = [
+    'Geometry',
+    'geometry'
+]
+
+_GEOMETRIES = {}
+
+
+class Geometry:
+    # Неизменяемая геометрия доски данного размера; один экземпляр на (num_rows, num_cols).
+    __slots__ = ('num_rows', 'num_cols', 'stride', 'points', 'neighbors', 'diagonals',
+                 'is_edge', 'is_corner', 'index_of', 'point_at', 'indexes')
+
+    def __init__(self, num_rows, num_cols):
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        # Индексы в раскладке с рамкой, как в ArrayBoard: row * (num_cols + 2) + col.
+        self.stride = num_cols + 2
+        self.points: Tuple[Point, ...] = tuple(Point(r, c) for r in range(1, num_rows + 1)
+                                               for c in range(1, num_cols + 1))
+        interned = {point: point for point in self.points}
+        self.neighbors: Dict[Point, Tuple[Point, ...]] = {}
+        self.diagonals: Dict[Point, Tuple[Point, ...]] = {}
+        self.is_edge: Dict[Point, bool] = {}
+        self.is_corner: Dict[Point, bool] = {}
+        self.index_of: Dict[Point, int] = {}
+        self.point_at: List[Optional[Point]] = [None] * ((num_rows + 2) * self.stride)
+        for point in self.points:
+            r, c = point
+            self.neighbors[point] = tuple(interned[p] for p in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1))
+                                          if p in interned)
+            self.diagonals[point] = tuple(interned[p] for p in ((r - 1, c - 1), (r - 1, c + 1),
+                                                                 (r + 1, c - 1), (r + 1, c + 1))
+                                          if p in interned)
+            self.is_edge[point] = len(self.neighbors[point]) < 4
+            self.is_corner[point] = len(self.neighbors[point]) < 3
+            index = r * self.stride + c
+            self.index_of[point] = index
+            self.point_at[index] = point
+        self.indexes: Tuple[int, ...] = tuple(self.index_of[point] for point in self.points)
+
+    def __repr__(self):
+        return f"<Geometry {self.num_rows}x{self.num_cols}>"
+
+
+def geometry(num_rows, num_cols) -> Geometry:
+    key = (num_rows, num_cols)
+    board_geometry = _GEOMETRIES.get(key)
+    if board_geometry is None:
+        board_geometry = Geometry(num_rows, num_cols)
+        _GEOMETRIES[key] = board_geometry
+    return board_geometry
@@ -1,31 +1,53 @@
 import copy
 import logging
+import time
 from typing import Optional, List, Literal, Set, Tuple, FrozenSet, Dict, NamedTuple
-from core import zobrist
+
+import numpy as np
+
+from core import instrumentation, tracing, zobrist
+from core.geometry import geometry
 from core.gotypes import Player, Point
-from core.scoring import compute_game_result
+from core.history import MoveHistory, PositionHistory
+from core.legality import LegalPointTracker
+from core.liberties import LibertyIndex
+from core.position import Position, position_colors, position_strings
+from core.scoring import AreaTracker, Territory, compute_game_result
 from core.setup_mode import SetupState
 
 logger = logging.getLogger(__name__)
+_board_trace = tracing.tracer('board')
+_captures_trace = tracing.tracer('captures')
+_state_trace = tracing.tracer('state')
+_copy_probe = instrumentation.probe('board.copy')
+_self_capture_probe = instrumentation.probe('state.self_capture_check')
+_ko_probe = instrumentation.probe('state.ko_check')
 
 __all__ = [
     'Board',
     'GameState',
     'Move',
     'GoString',
+    'PlayProbe',
+    'MoveAnalysis',
     'IllegalMoveError'
 ]
 
+EMPTY = 0
+
 
 class IllegalMoveError(Exception):
     pass
 
 
 class GoString:
+    __slots__ = ('color', 'stones', 'liberties', '_hash')
+
     def __init__(self, color, stones, liberties):
         self.color: Player = color
         self.stones: FrozenSet[Point] = frozenset(stones)
         self.liberties: FrozenSet[Point] = frozenset(liberties)
+        self._hash: Optional[int] = None
 
     def without_liberty(self, point: Point) -> 'GoString':
         new_liberties = self.liberties - {point}
@@ -46,12 +68,18 @@ class GoString:
         return len(self.liberties)
 
     def __eq__(self, other):
+        if self is other:
+            return True
         return isinstance(other, GoString) and \
             self.color == other.color and \
+            hash(self) == hash(other) and \
             self.stones == other.stones
 
     def __hash__(self):
-        return hash((self.color, self.stones))
+        # Строка неизменяема, поэтому хеш считается один раз.
+        if self._hash is None:
+            self._hash = hash((self.color.value, self.stones))
+        return self._hash
 
     def __str__(self):
         stone_coords = sorted([(p.row, p.col) for p in self.stones])
@@ -69,12 +97,63 @@ class PotentialCaptures(NamedTuple):
     player_group: Optional[GoString]
 
 
+class PlayProbe(NamedTuple):
+    is_occupied: bool
+    is_self_capture: bool
+    captures_opponent: bool
+    next_hash: int
+
+
+class MoveAnalysis(NamedTuple):
+    # Результат однократной симуляции хода: GameState.apply_move принимает его вместо повторного розыгрыша.
+    player: Player
+    move: 'Move'
+    simultaneous_capture_rule: str
+    delayed_capture: bool
+    source_hash: int
+    is_legal: bool
+    reason: Optional[str]
+    board: Optional['Board']
+    captures: PotentialCaptures
+    next_hash: int
+
+
 class Board:
     def __init__(self, num_rows, num_cols):
         self.num_rows = num_rows
         self.num_cols = num_cols
         self._grid: Dict[Point, GoString] = {}
         self._hash = zobrist.EMPTY_BOARD
+        self._geometry = geometry(num_rows, num_cols)
+        self._stride = num_cols + 2
+        self._hash_codes = zobrist.padded_table(num_rows, num_cols)
+        self._area = AreaTracker(num_rows, num_cols)
+        self._legal = LegalPointTracker(num_rows, num_cols)
+        self._liberties = LibertyIndex(num_rows, num_cols)
+        self.pending_opponent_captures: FrozenSet[GoString] = frozenset()
+        self.pending_self_capture: Optional[GoString] = None
+        # Журнал записей в _grid: пары (точка, прежняя строка или None). Пишется только внутри play().
+        self._trail: List = []
+        self._recording = False
+        # Записи отката: отметка журнала, хеш и отложенные захваты до хода.
+        self._undo_stack: List[Tuple[int, int, FrozenSet[GoString], Optional[GoString]]] = []
+
+    @classmethod
+    def from_position(cls, position: Position, num_rows: Optional[int] = None,
+                      num_cols: Optional[int] = None) -> 'Board':
+        # Вся позиция сразу, без розыгрыша камней по одному: строки и свободы из одной заливки.
+        num_rows, num_cols, colors = position_colors(position, num_rows, num_cols)
+        board = cls(num_rows, num_cols)
+        board._area.load(colors)
+        point_at = board._geometry.point_at
+        for string in position_strings(num_rows, num_cols, colors):
+            codes = board._hash_codes[string.color]
+            go_string = GoString(Player(string.color), [point_at[index] for index in string.stones],
+                                 [point_at[index] for index in string.liberties])
+            for index in string.stones:
+                board._grid[point_at[index]] = go_string
+                board._hash ^= codes[index]
+        return board
 
     def is_on_grid(self, point: Point) -> bool:
         return 1 <= point.row <= self.num_rows and \
@@ -91,29 +170,41 @@ class Board:
         return self._grid.get(point)
 
     def _replace_string(self, new_string: GoString):
-        logger.debug(f"Replacing string(s) with: {repr(new_string)}")
-        for point in new_string.stones:
-            self._grid[point] = new_string
+        if _board_trace.debug_enabled:
+            _board_trace.debug("Replacing string(s) with: %r", new_string)
+        grid = self._grid
+        if self._recording:
+            trail = self._trail
+            for point in new_string.stones:
+                trail.append(point)
+                trail.append(grid.get(point))
+                grid[point] = new_string
+        else:
+            for point in new_string.stones:
+                grid[point] = new_string
 
+    @instrumentation.timed('board.remove_string')
     def _remove_string(self, string_to_remove: GoString):
-        logger.debug(f"Physically removing string: {repr(string_to_remove)}")
+        if _captures_trace.debug_enabled:
+            _captures_trace.debug("Physically removing string: %r", string_to_remove)
 
         neighboring_strings_to_update: Dict[GoString, Set[Point]] = {}
 
         for point in string_to_remove.stones:
-            if (point, string_to_remove.color) in zobrist.HASH_CODE:
-                self._hash ^= zobrist.HASH_CODE[(point, string_to_remove.color)]
-            else:
-                logger.warning(f"Zobrist hash code not found for {(point, string_to_remove.color)}")
+            self._hash ^= self._hash_codes[string_to_remove.color.value][point.row * self._stride + point.col]
 
             if point in self._grid:
+                if self._recording:
+                    self._trail.append(point)
+                    self._trail.append(self._grid[point])
                 del self._grid[point]
+                self._area.set_color(point.row * self._stride + point.col, EMPTY)
+                self._legal.mark(point.row * self._stride + point.col)
+                self._liberties.mark(point.row * self._stride + point.col)
             else:
-                logger.warning(f"Attempted to remove point {point} which is already empty in _remove_string.")
-
-            for neighbor in point.neighbors():
-                if not self.is_on_grid(neighbor): continue
+                logger.warning("Attempted to remove point %s which is already empty in _remove_string.", point)
 
+            for neighbor in self._geometry.neighbors[point]:
                 neighbor_string = self._grid.get(neighbor)
                 if neighbor_string is not None:
                     if neighbor_string not in neighboring_strings_to_update:
@@ -128,12 +219,14 @@ class Board:
                                             neighbor_string.stones,
                                             neighbor_string.liberties | new_liberties)
                 self._replace_string(updated_neighbor)
-                logger.debug(
-                    f"String at {list(updated_neighbor.stones)[0]} gained liberties {new_liberties}, now has {updated_neighbor.num_liberties}")
+                if _board_trace.debug_enabled:
+                    _board_trace.debug("String at %s gained liberties %s, now has %d", representative_point,
+                                       new_liberties, updated_neighbor.num_liberties)
             else:
-                logger.warning(
-                    f"Neighbor string {repr(neighbor_string)} intended for liberty update was not found or changed.")
+                logger.warning("Neighbor string %r intended for liberty update was not found or changed.",
+                               neighbor_string)
 
+    @instrumentation.timed('board.place_stone')
     def place_stone(self,
                     player: Player,
                     point: Point,
@@ -144,15 +237,15 @@ class Board:
         if self._grid.get(point) is not None:
             raise IllegalMoveError(f"Point {point} is already occupied by {self.get(point)}")
 
-        logger.info(
-            f"Attempting to place {player.name} at {point}. Sim Rule: {simultaneous_capture_rule}, Delayed: {delayed_capture}")
+        if _board_trace.info_enabled:
+            _board_trace.info("Attempting to place %s at %s. Sim Rule: %s, Delayed: %s",
+                              player.name, point, simultaneous_capture_rule, delayed_capture)
 
         adjacent_same: List[GoString] = []
         adjacent_other: List[GoString] = []
         liberties: List[Point] = []
 
-        for neighbor in point.neighbors():
-            if not self.is_on_grid(neighbor): continue
+        for neighbor in self._geometry.neighbors[point]:
             neighbor_string = self._grid.get(neighbor)
             if neighbor_string is None:
                 liberties.append(neighbor)
@@ -166,10 +259,10 @@ class Board:
             new_string = new_string.merged_with(same_color_string)
 
         self._replace_string(new_string)
-        if (point, player) in zobrist.HASH_CODE:
-            self._hash ^= zobrist.HASH_CODE[(point, player)]
-        else:
-            logger.warning(f"Zobrist hash code not found for {(point, player)}")
+        self._area.set_color(point.row * self._stride + point.col, player.value)
+        self._legal.mark(point.row * self._stride + point.col)
+        self._liberties.mark(point.row * self._stride + point.col)
+        self._hash ^= self._hash_codes[player.value][point.row * self._stride + point.col]
 
         opponent_groups_losing_last_lib: Set[GoString] = set()
         other_strings_updated: Dict[GoString, GoString] = {}
@@ -177,8 +270,7 @@ class Board:
         for other_string in adjacent_other:
             rep_point_other = next(iter(other_string.stones), None)
             if not rep_point_other or self._grid.get(rep_point_other) != other_string:
-                logger.warning(
-                    f"Opponent string {repr(other_string)} changed/removed before liberty update calculation.")
+                logger.warning("Opponent string %r changed/removed before liberty update calculation.", other_string)
                 continue
 
             replacement = other_string.without_liberty(point)
@@ -186,10 +278,12 @@ class Board:
 
             if replacement.num_liberties == 0:
                 opponent_groups_losing_last_lib.add(other_string)
-                logger.debug(f"Opponent group {repr(other_string)} potentially captured (0 liberties after move).")
-            else:
-                logger.debug(
-                    f"Opponent group {repr(other_string)} loses liberty at {point}, now has {replacement.num_liberties}.")
+                if _captures_trace.debug_enabled:
+                    _captures_trace.debug("Opponent group %r potentially captured (0 liberties after move).",
+                                          other_string)
+            elif _board_trace.debug_enabled:
+                _board_trace.debug("Opponent group %r loses liberty at %s, now has %d.",
+                                   other_string, point, replacement.num_liberties)
 
         for original_string, updated_string in other_strings_updated.items():
             if original_string not in opponent_groups_losing_last_lib:
@@ -197,13 +291,13 @@ class Board:
                 if rep_point_orig and self._grid.get(rep_point_orig) == original_string:
                     self._replace_string(updated_string)
                 else:
-                    logger.warning(
-                        f"String {repr(original_string)} intended for liberty update was already changed/removed.")
+                    logger.warning("String %r intended for liberty update was already changed/removed.", original_string)
 
         player_group_zero_libs = new_string.num_liberties == 0
         potential_self_capture_group: Optional[GoString] = new_string if player_group_zero_libs else None
-        if player_group_zero_libs:
-            logger.debug(f"Player group {repr(new_string)} potentially captured itself (0 liberties after placement).")
+        if player_group_zero_libs and _captures_trace.debug_enabled:
+            _captures_trace.debug("Player group %r potentially captured itself (0 liberties after placement).",
+                                  new_string)
         groups_to_remove_immediately: Set[GoString] = set()
         pending_opponent_for_return = frozenset(opponent_groups_losing_last_lib)
         pending_self_for_return = potential_self_capture_group
@@ -211,7 +305,9 @@ class Board:
         if not delayed_capture:
             is_simultaneous = bool(opponent_groups_losing_last_lib) and player_group_zero_libs
             if is_simultaneous:
-                logger.info(f"Immediate simultaneous capture scenario. Applying rule: '{simultaneous_capture_rule}'")
+                if _captures_trace.info_enabled:
+                    _captures_trace.info("Immediate simultaneous capture scenario. Applying rule: '%s'",
+                                         simultaneous_capture_rule)
                 if simultaneous_capture_rule == 'opponent':
                     groups_to_remove_immediately.update(opponent_groups_losing_last_lib)
                     pending_self_for_return = None
@@ -223,32 +319,34 @@ class Board:
                     pending_opponent_for_return = frozenset()
 
             elif opponent_groups_losing_last_lib:
-                logger.debug("Standard opponent capture scenario.")
+                if _captures_trace.debug_enabled:
+                    _captures_trace.debug("Standard opponent capture scenario.")
                 groups_to_remove_immediately.update(opponent_groups_losing_last_lib)
                 pending_self_for_return = None
 
             elif player_group_zero_libs:
-                logger.warning(
-                    f"Self-capture move detected for {player.name} at {point} (non-simultaneous). Removing player group.")
+                logger.warning("Self-capture move detected for %s at %s (non-simultaneous). Removing player group.",
+                               player.name, point)
                 if potential_self_capture_group: groups_to_remove_immediately.add(potential_self_capture_group)
                 pending_opponent_for_return = frozenset()
 
             if groups_to_remove_immediately:
-                logger.info(
-                    f"Groups determined for immediate removal: {[repr(g) for g in groups_to_remove_immediately]}")
+                if _captures_trace.info_enabled:
+                    _captures_trace.info("Groups determined for immediate removal: %r", groups_to_remove_immediately)
                 for group in groups_to_remove_immediately:
                     representative_point = next(iter(group.stones), None)
                     if representative_point:
                         current_string_at_pos = self.get_go_string(representative_point)
                         if current_string_at_pos == group:
-                            logger.info(f"Finalizing immediate removal of {repr(group)}")
+                            if _captures_trace.info_enabled:
+                                _captures_trace.info("Finalizing immediate removal of %r", group)
                             self._remove_string(group)  # Perform removal
                         else:
-                            logger.warning(
-                                f"Group {repr(group)} decided for immediate removal, but is no longer on board at its position or has changed ({repr(current_string_at_pos)}). Skipping removal.")
+                            logger.warning("Group %r decided for immediate removal, but is no longer on board at its position "
+                                           "or has changed (%r). Skipping removal.", group, current_string_at_pos)
                     else:
-                        logger.warning(
-                            f"Group {repr(group)} decided for immediate removal, but has no representative point? Should not happen.")
+                        logger.warning("Group %r decided for immediate removal, but has no representative point? "
+                                       "Should not happen.", group)
             pending_opponent_for_return = frozenset()
             pending_self_for_return = None
 
@@ -258,6 +356,126 @@ class Board:
             player_group=pending_self_for_return if delayed_capture else potential_self_capture_group
         )
 
+    def probe_play(self, player: Player, point: Point) -> PlayProbe:
+        if not self.is_on_grid(point) or point in self._grid:
+            return PlayProbe(True, False, False, self._hash)
+
+        has_liberty = False
+        own_strings: Set[GoString] = set()
+        captured_strings: Set[GoString] = set()
+        for neighbor in self._geometry.neighbors[point]:
+            neighbor_string = self._grid.get(neighbor)
+            if neighbor_string is None:
+                has_liberty = True
+            elif neighbor_string.color == player:
+                own_strings.add(neighbor_string)
+                if neighbor_string.liberties - {point}:
+                    has_liberty = True
+            elif not neighbor_string.liberties - {point}:
+                captured_strings.add(neighbor_string)
+
+        stride = self._stride
+        own_codes = self._hash_codes[player.value]
+        next_hash = self._hash ^ own_codes[point.row * stride + point.col]
+        if captured_strings:
+            for string in captured_strings:
+                codes = self._hash_codes[string.color.value]
+                for stone in string.stones:
+                    next_hash ^= codes[stone.row * stride + stone.col]
+        elif not has_liberty:
+            next_hash ^= own_codes[point.row * stride + point.col]
+            for string in own_strings:
+                for stone in string.stones:
+                    next_hash ^= own_codes[stone.row * stride + stone.col]
+        return PlayProbe(False, not has_liberty and not captured_strings, bool(captured_strings), next_hash)
+
+    def play(self,
+             player: Player,
+             point: Point,
+             simultaneous_capture_rule: Literal['opponent', 'both', 'self'] = 'opponent',
+             delayed_capture: bool = False
+             ) -> PotentialCaptures:
+        if not self.is_on_grid(point) or point in self._grid:
+            raise IllegalMoveError(f"Point {point} is off the board or already occupied")
+
+        # Как в ArrayBoard: запись отката — только то, что ход меняет (точка, снятые и изменённые строки).
+        self._undo_stack.append((len(self._trail), self._hash,
+                                 self.pending_opponent_captures, self.pending_self_capture))
+        self._recording = True
+        try:
+            captures = self.place_stone(player, point,
+                                        simultaneous_capture_rule=simultaneous_capture_rule,
+                                        delayed_capture=delayed_capture)
+        finally:
+            self._recording = False
+        if delayed_capture:
+            self.pending_opponent_captures = self.pending_opponent_captures | captures.opponent_groups
+            if captures.player_group is not None:
+                self.pending_self_capture = captures.player_group
+        return captures
+
+    def undo(self):
+        if not self._undo_stack:
+            raise IndexError("No moves to undo")
+        mark, self._hash, self.pending_opponent_captures, self.pending_self_capture = self._undo_stack.pop()
+        grid = self._grid
+        trail = self._trail
+        stride = self._stride
+        while len(trail) > mark:
+            old_string = trail.pop()
+            point = trail.pop()
+            current = grid.get(point)
+            if old_string is None:
+                del grid[point]
+            else:
+                grid[point] = old_string
+            if (current is None) != (old_string is None):
+                index = point.row * stride + point.col
+                self._area.set_color(index, EMPTY if old_string is None else old_string.color.value)
+                self._legal.mark(index)
+                self._liberties.mark(index)
+
+    def to_array(self) -> np.ndarray:
+        colors = np.zeros((self.num_rows, self.num_cols), dtype=np.int8)
+        for point, string in self._grid.items():
+            colors[point.row - 1, point.col - 1] = string.color.value
+        return colors
+
+    def area_scores(self) -> Tuple[int, int]:
+        return self._area.scores()
+
+    def territory(self) -> Territory:
+        return self._area.territory()
+
+    def _string_liberty_indexes(self, index: int) -> List[int]:
+        string = self._grid.get(self._geometry.point_at[index])
+        if string is None:
+            return []
+        return [liberty.row * self._stride + liberty.col for liberty in string.liberties]
+
+    def _string_stones_and_liberties(self, index: int) -> Tuple[List[int], Set[Point]]:
+        string = self._grid.get(self._geometry.point_at[index])
+        if string is None:
+            return [], set()
+        # Свободы считаются по доске: при отложенном взятии у строки может остаться устаревшая свобода.
+        neighbors = self._geometry.neighbors
+        liberties = {neighbor for point in string.stones for neighbor in neighbors[point] if neighbor not in self._grid}
+        return [point.row * self._stride + point.col for point in string.stones], liberties
+
+    def strings_by_liberties(self, num_liberties: int, color: Optional[Player] = None) -> List[GoString]:
+        # num_liberties: 0, 1 или 2 — две и больше.
+        point_at = self._geometry.point_at
+        strings = [self._grid[point_at[anchor]] for anchor in self._liberties.anchors(self, num_liberties)]
+        return [string for string in strings if color is None or string.color == color]
+
+    def liberty_class(self, point: Point) -> Optional[int]:
+        if not self.is_on_grid(point):
+            return None
+        return self._liberties.liberty_class(self, point.row * self._stride + point.col)
+
+    def legal_indexes(self, player: Player) -> Tuple[Set[int], Set[int]]:
+        return self._legal.legal_indexes(self, player)
+
     def zobrist_hash(self):
         return self._hash
 
@@ -265,9 +483,16 @@ class Board:
         if memodict is None: memodict = {}
         if id(self) in memodict: return memodict[id(self)]
 
+        if _copy_probe.enabled:
+            _copy_probe.add()
         new_board = Board(self.num_rows, self.num_cols)
         new_board._hash = self._hash
         new_board._grid = self._grid.copy()
+        new_board._area = self._area.copy()
+        new_board._legal = self._legal.copy()
+        new_board._liberties = self._liberties.copy()
+        new_board.pending_opponent_captures = self.pending_opponent_captures
+        new_board.pending_self_capture = self.pending_self_capture
 
         memodict[id(self)] = new_board
         return new_board
@@ -287,6 +512,8 @@ class Board:
 
 
 class Move:
+    __slots__ = ('point', 'is_play', 'is_pass', 'is_resign')
+
     def __init__(self, point: Optional[Point] = None, is_pass: bool = False, is_resign: bool = False):
         assert point is not None or is_pass or is_resign, "Move must be play, pass, or resign"
         self.point = point
@@ -296,15 +523,19 @@ class Move:
 
     @classmethod
     def play(cls, point: Point) -> 'Move':
-        return Move(point=point)
+        # Ходы неизменяемы: один экземпляр на точку, общий для всех досок.
+        move = _PLAY_MOVES.get(point)
+        if move is None:
+            move = _PLAY_MOVES[point] = Move(point=point)
+        return move
 
     @classmethod
     def pass_turn(cls) -> 'Move':
-        return Move(is_pass=True)
+        return _PASS_MOVE
 
     @classmethod
     def resign(cls) -> 'Move':
-        return Move(is_resign=True)
+        return _RESIGN_MOVE
 
     def __str__(self):
         if self.is_pass: return 'pass'
@@ -334,6 +565,11 @@ class Move:
         return "Move()"
 
 
+_PLAY_MOVES: Dict[Point, Move] = {}
+_PASS_MOVE = Move(is_pass=True)
+_RESIGN_MOVE = Move(is_resign=True)
+
+
 class GameState:
     def __init__(self,
                  board: Board,
@@ -346,24 +582,45 @@ class GameState:
         self.board = board
         self.previous_state = previous
         self.last_move = move
-        self.move_history: List[Tuple[Move, Player]] = move_history if move_history is not None else []
+        self.move_history: MoveHistory = MoveHistory.from_iterable(move_history if move_history is not None else [])
         self.pending_opponent_captures = pending_opponent_captures
         self.pending_self_capture = pending_self_capture
+        # (хэш позиции, значение): доску могут изменить на месте, тогда кэш устаревает.
+        self._is_over_cache: Optional[Tuple[int, bool]] = None
+        self._winner_cache: Optional[Tuple[int, Optional[Player]]] = None
+        # (игрок, правило) -> (хэш позиции, состояние после снятия отложенных захватов)
+        self._resolved: Dict[Tuple[Player, str], Tuple[int, 'GameState']] = {}
 
         if self.previous_state is None:
-            self.previous_states: FrozenSet[int] = frozenset()
+            self._previous_states = PositionHistory()
         else:
-            self.previous_states = frozenset(
-                previous.previous_states | {previous.board.zobrist_hash()}
-            )
+            self._previous_states = previous.previous_states.with_hash(previous.board.zobrist_hash())
+
+    @property
+    def previous_states(self) -> PositionHistory:
+        return self._previous_states
+
+    @previous_states.setter
+    def previous_states(self, hashes):
+        self._previous_states = PositionHistory.from_hashes(hashes)
 
     def apply_move(self,
                    player_making_move: Player,
                    move: Move,
                    simultaneous_capture_rule: Literal['opponent', 'both', 'self'] = 'opponent',
-                   delayed_capture: bool = False
+                   delayed_capture: bool = False,
+                   analysis: Optional[MoveAnalysis] = None
                    ) -> 'GameState':
-        if move.is_play:
+        if analysis is not None:
+            if (analysis.player, analysis.move, analysis.simultaneous_capture_rule, analysis.delayed_capture,
+                    analysis.source_hash) != (player_making_move, move, simultaneous_capture_rule, delayed_capture,
+                                              self.board.zobrist_hash()):
+                raise ValueError(f"Move analysis for {analysis.move} does not match this state or move")
+            if not analysis.is_legal:
+                raise IllegalMoveError(analysis.reason)
+            next_board = analysis.board
+            potential_captures = analysis.captures
+        elif move.is_play:
             next_board = copy.deepcopy(self.board)
             try:
                 potential_captures = next_board.place_stone(
@@ -372,7 +629,7 @@ class GameState:
                     delayed_capture=delayed_capture
                 )
             except IllegalMoveError as e:
-                logger.error(f"Illegal move {move} by {player_making_move.name} in apply_move (Board level): {e}")
+                logger.error("Illegal move %s by %s in apply_move (Board level): %s", move, player_making_move.name, e)
                 raise e
         elif move.is_pass or move.is_resign:
             next_board = self.board
@@ -380,15 +637,16 @@ class GameState:
         else:
             raise ValueError(f"Invalid move type received in apply_move: {move}")
 
-        new_move_history = self.move_history + [(move, player_making_move)]
+        new_move_history = self.move_history.append((move, player_making_move))
 
         new_pending_opponent_this_move = frozenset()
         new_pending_self_this_move = None
         if delayed_capture:
             new_pending_opponent_this_move = potential_captures.opponent_groups
             new_pending_self_this_move = potential_captures.player_group
-            logger.debug(
-                f"Move {move} resulted in pending captures: Opponent={len(new_pending_opponent_this_move)}, Self={bool(new_pending_self_this_move)}")
+            if _captures_trace.debug_enabled:
+                _captures_trace.debug("Move %s resulted in pending captures: Opponent=%d, Self=%s", move,
+                                      len(new_pending_opponent_this_move), bool(new_pending_self_this_move))
 
         combined_pending_opponent = self.pending_opponent_captures.union(new_pending_opponent_this_move)
         combined_pending_self = new_pending_self_this_move if new_pending_self_this_move is not None else self.pending_self_capture
@@ -401,129 +659,261 @@ class GameState:
             pending_opponent_captures=combined_pending_opponent,
             pending_self_capture=combined_pending_self
         )
-        logger.debug(
-            f"Applied move {move}. New state hash: {new_state.board.zobrist_hash()}. Combined Pending captures: Opponent={len(new_state.pending_opponent_captures)}, Self={bool(new_state.pending_self_capture)}")
+        if _state_trace.debug_enabled:
+            _state_trace.debug("Applied move %s. New state hash: %d. Combined Pending captures: Opponent=%d, Self=%s",
+                               move, new_state.board.zobrist_hash(), len(new_state.pending_opponent_captures),
+                               bool(new_state.pending_self_capture))
         return new_state
 
+    def resolve_pending_captures(self,
+                                 player: Player,
+                                 simultaneous_capture_rule: Literal['opponent', 'both', 'self'] = 'opponent'
+                                 ) -> 'GameState':
+        # Отложенные захваты снимаются в начале хода игрока. Результат запоминается для состояния и игрока,
+        # так что /legal_moves и следующий /play используют одно и то же разрешение.
+        key = (player, simultaneous_capture_rule)
+        position_hash = self.board.zobrist_hash()
+        cached = self._resolved.get(key)
+        if cached is not None and cached[0] == position_hash:
+            return cached[1]
+        resolved = self._resolve_pending_captures(player, simultaneous_capture_rule)
+        self._resolved[key] = (position_hash, resolved)
+        return resolved
+
+    def _resolve_pending_captures(self, player: Player, simultaneous_capture_rule: str) -> 'GameState':
+        pending_opponent_groups = self.pending_opponent_captures
+        pending_self_capture_group = self.pending_self_capture
+        if not pending_opponent_groups and not pending_self_capture_group:
+            return self
+
+        if _captures_trace.debug_enabled:
+            _captures_trace.debug("Checking for delayed captures before %s's move.", player.name)
+        is_simultaneous = bool(pending_opponent_groups) and bool(pending_self_capture_group)
+        own_pending_opponent = {group for group in pending_opponent_groups if group.color == player}
+        own_pending_self = pending_self_capture_group \
+            if pending_self_capture_group and pending_self_capture_group.color == player else None
+        if _captures_trace.debug_enabled:
+            _captures_trace.debug("Player Turn: %s, Sim: %s, SimRule: %s", player, is_simultaneous,
+                                  simultaneous_capture_rule)
+
+        groups_to_remove_now: Set[GoString] = set()
+        if is_simultaneous:
+            if simultaneous_capture_rule in ('opponent', 'both'):
+                groups_to_remove_now.update(own_pending_opponent)
+            if own_pending_self is not None and simultaneous_capture_rule in ('self', 'both'):
+                groups_to_remove_now.add(own_pending_self)
+        elif pending_opponent_groups:
+            groups_to_remove_now.update(own_pending_opponent)
+        elif own_pending_self is not None:
+            groups_to_remove_now.add(own_pending_self)
+        if not groups_to_remove_now:
+            return self
+
+        board_after_cleanup = copy.deepcopy(self.board)
+        if _captures_trace.info_enabled:
+            _captures_trace.info("Performing delayed removal for %s: %r", player.name, groups_to_remove_now)
+        successfully_removed_count = 0
+        for group in groups_to_remove_now:
+            representative_point = next(iter(group.stones), None)
+            if not representative_point: continue
+            string_on_board = board_after_cleanup.get_go_string(representative_point)
+            if string_on_board and string_on_board == group:
+                if board_after_cleanup.liberty_class(representative_point) == 0:
+                    if _captures_trace.debug_enabled:
+                        _captures_trace.debug("Removing group %r from copied board.", string_on_board)
+                    board_after_cleanup._remove_string(string_on_board)
+                    successfully_removed_count += 1
+                else:
+                    logger.warning("Group %r marked for delayed removal now has liberties. Skipping.", string_on_board)
+            else:
+                logger.warning("Group %r not found or changed before removal. Found: %r", group, string_on_board)
+
+        if successfully_removed_count > 0:
+            removed = groups_to_remove_now
+            resolved = GameState(
+                board=board_after_cleanup,
+                previous=self,
+                move=None,
+                move_history=self.move_history,
+                pending_opponent_captures=frozenset(set(pending_opponent_groups) - removed),
+                pending_self_capture=pending_self_capture_group if pending_self_capture_group not in removed else None
+            )
+            if _captures_trace.debug_enabled:
+                _captures_trace.debug("Created intermediate state after cleanup. Hash: %d. Remaining pending: "
+                                      "Opponent=%d, Self=%s", resolved.board.zobrist_hash(),
+                                      len(resolved.pending_opponent_captures), bool(resolved.pending_self_capture))
+            return resolved
+
+        # Ни одна группа не снята (например, получила свободы): отложенные захваты этого игрока сбрасываются.
+        if _captures_trace.debug_enabled:
+            _captures_trace.debug("Groups matching player color found for delayed capture but none actually removed. "
+                                  "Playing on original state.")
+        survived_groups = own_pending_opponent | ({own_pending_self} if own_pending_self is not None else set())
+        resolved = GameState(
+            board=self.board,
+            previous=self.previous_state,
+            move=self.last_move,
+            move_history=self.move_history,
+            pending_opponent_captures=frozenset(set(pending_opponent_groups) - survived_groups),
+            pending_self_capture=pending_self_capture_group if pending_self_capture_group not in survived_groups else None
+        )
+        resolved.previous_states = self.previous_states
+        if _captures_trace.debug_enabled:
+            _captures_trace.debug("Cleared pending captures for surviving groups. State hash %d. Pending: Opponent=%d, "
+                                  "Self=%s", resolved.board.zobrist_hash(), len(resolved.pending_opponent_captures),
+                                  bool(resolved.pending_self_capture))
+        return resolved
+
     @classmethod
-    def from_setup(cls, setup_state: SetupState) -> 'GameState':
-        board = Board(setup_state.num_rows, setup_state.num_cols)
+    def from_setup(cls, setup_state: SetupState, board_cls: Optional[type] = None) -> 'GameState':
         try:
-            for point, color in setup_state.get_positions().items():
-                board.place_stone(color, point, simultaneous_capture_rule='opponent', delayed_capture=False)
-        except IllegalMoveError as e:
-            logger.error(f"Error placing initial stone from setup: {e}")
+            return cls.from_position(setup_state, board_cls=board_cls)
+        except ValueError as e:
+            logger.error("Error loading initial setup: %s", e)
             raise ValueError(f"Invalid initial setup: {e}") from e
-        return GameState(board, None, None, [], frozenset(), None)
+
+    @classmethod
+    def from_position(cls,
+                      position: Position,
+                      board_cls: Optional[type] = None,
+                      num_rows: Optional[int] = None,
+                      num_cols: Optional[int] = None) -> 'GameState':
+        board_cls = board_cls or Board
+        board = board_cls.from_position(position, num_rows=num_rows, num_cols=num_cols)
+        return GameState(board, None, None, None, frozenset(), None)
 
     def is_move_self_capture(self, player: Player, move: Move) -> bool:
         if not move.is_play:
             return False
-        next_board = copy.deepcopy(self.board)
-        try:
-            potential_captures = next_board.place_stone(player, move.point,
-                                                        simultaneous_capture_rule='opponent',
-                                                        delayed_capture=False)
-            if potential_captures.player_group:
-                player_string_after_move = next_board.get_go_string(move.point)
-                if player_string_after_move is None:
-                    sim_board_delayed = copy.deepcopy(self.board)
-                    pot_delayed = sim_board_delayed.place_stone(player, move.point,
-                                                                simultaneous_capture_rule='opponent',
-                                                                delayed_capture=True)
-
-                    if pot_delayed.player_group and not pot_delayed.opponent_groups:
-                        logger.debug(f"Move {move} by {player.name} IS self-capture.")
-                        return True
-                    else:
-                        logger.debug(
-                            f"Move {move} by {player.name} is NOT pure self-capture (opponent groups also captured or player group survived).")
-                        return False
-                else:
-                    return False
-            else:
-                return False
-        except IllegalMoveError:
-            return False
+        probe = self.board.probe_play(player, move.point)
+        return not probe.is_occupied and probe.is_self_capture
 
     def does_move_violate_ko(self, player: Player, move: Move) -> bool:
         if not move.is_play:
             return False
-
-        board_after_move = copy.deepcopy(self.board)
-        try:
-            board_after_move.place_stone(player, move.point,
-                                         simultaneous_capture_rule='opponent',
-                                         delayed_capture=False)
-
-            next_situation_hash = board_after_move.zobrist_hash()
-
-            logger.debug(
-                f"Checking Ko for move {move}: next hash {next_situation_hash}. Previous states hashes in current context: {self.previous_states}")
-            return next_situation_hash in self.previous_states
-
-        except IllegalMoveError:
+        probe = self.board.probe_play(player, move.point)
+        if probe.is_occupied:
             return False
+        return probe.next_hash in self.previous_states
 
-    def is_valid_move(self, player: Player, move: Move) -> bool:
+    def _move_violation(self, player: Player, move: Move) -> Optional[str]:
         if self.is_over:
-            logger.debug(f"Move {move} invalid: Game is over.")
-            return False
-
+            return "Game is over"
         if move.is_pass or move.is_resign:
-            return True
+            return None
         if not move.is_play:
-            logger.warning(f"is_valid_move called with invalid move type: {move}")
-            return False
+            logger.warning("is_valid_move called with invalid move type: %s", move)
+            return f"Invalid move type {move}"
 
         point = move.point
         if not self.board.is_on_grid(point):
-            logger.debug(f"Move {move} invalid: Point {point} off grid.")
-            return False
-
-        if self.board.get(point) is not None:
-            logger.debug(f"Move {move} invalid: Point {point} is occupied by {self.board.get(point)}.")
-            return False
+            return f"Point {point} off grid"
+
+        # Проба хода отвечает за занятость и самоубийство, проверка по истории — за ко.
+        measure = _self_capture_probe.enabled
+        if measure:
+            started = time.perf_counter()
+        probe = self.board.probe_play(player, point)
+        if measure:
+            probed = time.perf_counter()
+            _self_capture_probe.add(probed - started)
+        if probe.is_occupied:
+            return f"Point {point} is occupied by {self.board.get(point)}"
+        if probe.is_self_capture:
+            return "Self-capture"
+        violates_ko = probe.next_hash in self.previous_states
+        if measure:
+            _ko_probe.add(time.perf_counter() - probed)
+        if violates_ko:
+            return "Violates Ko"
+        return None
 
-        if self.is_move_self_capture(player, move):
-            logger.debug(f"Move {move} invalid: Self-capture.")
-            return False
-
-        if self.does_move_violate_ko(player, move):
-            logger.debug(f"Move {move} invalid: Violates Ko.")
+    def is_valid_move(self, player: Player, move: Move) -> bool:
+        reason = self._move_violation(player, move)
+        if reason is not None:
+            if _state_trace.debug_enabled:
+                _state_trace.debug("Move %s invalid: %s.", move, reason)
             return False
-
         return True
 
+    def analyze_move(self,
+                     player: Player,
+                     move: Move,
+                     simultaneous_capture_rule: Literal['opponent', 'both', 'self'] = 'opponent',
+                     delayed_capture: bool = False
+                     ) -> MoveAnalysis:
+        # Проверка через probe_play и ровно одна копия доски для допустимого хода камнем.
+        source_hash = self.board.zobrist_hash()
+        no_captures = PotentialCaptures(frozenset(), None)
+        reason = self._move_violation(player, move)
+        if reason is not None:
+            if _state_trace.debug_enabled:
+                _state_trace.debug("Move %s invalid: %s.", move, reason)
+            return MoveAnalysis(player, move, simultaneous_capture_rule, delayed_capture, source_hash,
+                                False, reason, None, no_captures, source_hash)
+        if not move.is_play:
+            return MoveAnalysis(player, move, simultaneous_capture_rule, delayed_capture, source_hash,
+                                True, None, self.board, no_captures, source_hash)
+        next_board = copy.deepcopy(self.board)
+        captures = next_board.place_stone(player, move.point,
+                                          simultaneous_capture_rule=simultaneous_capture_rule,
+                                          delayed_capture=delayed_capture)
+        return MoveAnalysis(player, move, simultaneous_capture_rule, delayed_capture, source_hash,
+                            True, None, next_board, captures, next_board.zobrist_hash())
+
     @property
     def is_over(self) -> bool:
+        position_hash = self.board.zobrist_hash()
+        if self._is_over_cache is not None and self._is_over_cache[0] == position_hash:
+            return self._is_over_cache[1]
+        is_over = self._compute_is_over()
+        self._is_over_cache = (position_hash, is_over)
+        return is_over
+
+    def _compute_is_over(self) -> bool:
         if self.board.count_empty_points == 0:
-            logger.info("Game is over: board is full.")
+            if _state_trace.info_enabled:
+                _state_trace.info("Game is over: board is full.")
             return True
 
         if self.last_move and self.last_move.is_resign:
-            logger.info("Game is over: last move was resign.")
+            if _state_trace.info_enabled:
+                _state_trace.info("Game is over: last move was resign.")
             return True
 
         if len(self.move_history) >= 2:
             last_move_info = self.move_history[-1]
             second_last_move_info = self.move_history[-2]
             if last_move_info[0].is_pass and second_last_move_info[0].is_pass and last_move_info[1] != second_last_move_info[1]:
-                logger.info("Game is over: two consecutive passes.")
+                if _state_trace.info_enabled:
+                    _state_trace.info("Game is over: two consecutive passes.")
                 return True
         return False
 
+    @instrumentation.timed('state.legal_moves')
     def legal_moves(self, player: Player) -> List[Move]:
         if self.is_over:
             return []
 
-        moves = []
-        for row in range(1, self.board.num_rows + 1):
-            for col in range(1, self.board.num_cols + 1):
-                point = Point(row, col)
-                move = Move.play(point)
-                if self.is_valid_move(player, move):
-                    moves.append(move)
+        # Доска поддерживает множество допустимых точек сама; здесь остаётся только проверка по истории.
+        board = self.board
+        legal, capturing = board.legal_indexes(player)
+        point_at = geometry(board.num_rows, board.num_cols).point_at
+        previous_states = self.previous_states
+        if previous_states:
+            position_hash = board.zobrist_hash()
+            own_codes = zobrist.padded_table(board.num_rows, board.num_cols)[player.value]
+            moves = []
+            for index in sorted(legal):
+                point = point_at[index]
+                if index in capturing:
+                    next_hash = board.probe_play(player, point).next_hash
+                else:
+                    next_hash = position_hash ^ own_codes[index]
+                if next_hash not in previous_states:
+                    moves.append(Move.play(point))
+        else:
+            moves = [Move.play(point_at[index]) for index in sorted(legal)]
 
         moves.append(Move.pass_turn())
         moves.append(Move.resign())
@@ -531,16 +921,26 @@ class GameState:
         return moves
 
     def winner(self) -> Optional[Player]:
+        position_hash = self.board.zobrist_hash()
+        if self._winner_cache is not None and self._winner_cache[0] == position_hash:
+            return self._winner_cache[1]
+        winner = self._compute_winner()
+        self._winner_cache = (position_hash, winner)
+        return winner
+
+    def _compute_winner(self) -> Optional[Player]:
         if not self.is_over:
             return None
 
         if self.last_move and self.last_move.is_resign:
             if not self.move_history: return None
             player_who_resigned = self.move_history[-1][1]
-            logger.info(f"Game over: Player {player_who_resigned.name} resigned.")
+            if _state_trace.info_enabled:
+                _state_trace.info("Game over: Player %s resigned.", player_who_resigned.name)
             return player_who_resigned.other
         game_result = compute_game_result(self)
-        logger.info(f"Game over by passes/full board. Result: {game_result}")
+        if _state_trace.info_enabled:
+            _state_trace.info("Game over by passes/full board. Result: %s", game_result)
         return game_result.winner
 
     def print_history(self):
@@ -566,7 +966,7 @@ class GameState:
             board=new_board,
             previous=new_previous,
             move=self.last_move,
-            move_history=list(self.move_history),
+            move_history=self.move_history,
             pending_opponent_captures=self.pending_opponent_captures,
             pending_self_capture=self.pending_self_capture
         )
@@ -0,0 +1,154 @@
+from typing import Iterable, Iterator, List, Optional, Dict
+
+__all__ = [
+    'MoveHistory',
+    'PositionHistory'
+]
+
+
+class MoveHistory:
+    # Неизменяемый односвязный список ходов: каждое состояние разделяет хвост с предыдущим.
+    __slots__ = ('_last', '_previous', '_length')
+
+    def __init__(self, last=None, previous: Optional['MoveHistory'] = None):
+        self._last = last
+        self._previous = previous
+        self._length = 0 if previous is None else previous._length + 1
+
+    @classmethod
+    def from_iterable(cls, items: Iterable) -> 'MoveHistory':
+        if isinstance(items, MoveHistory):
+            return items
+        history = EMPTY_MOVE_HISTORY
+        for item in items:
+            history = history.append(item)
+        return history
+
+    def append(self, item) -> 'MoveHistory':
+        return MoveHistory(item, self)
+
+    def __len__(self):
+        return self._length
+
+    def __bool__(self):
+        return self._length > 0
+
+    def __iter__(self) -> Iterator:
+        items = []
+        node = self
+        while node._length:
+            items.append(node._last)
+            node = node._previous
+        return reversed(items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("move history index out of range")
+        node = self
+        for _ in range(self._length - 1 - index):
+            node = node._previous
+        return node._last
+
+    def __add__(self, other) -> List:
+        return list(self) + list(other)
+
+    def __eq__(self, other):
+        if isinstance(other, MoveHistory):
+            if self is other:
+                return True
+            return self._length == other._length and list(self) == list(other)
+        if isinstance(other, (list, tuple)):
+            return self._length == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"MoveHistory({list(self)!r})"
+
+
+EMPTY_MOVE_HISTORY = MoveHistory()
+
+
+class _HashLog:
+    # Общий журнал хешей позиций для всех состояний одной линии игры.
+    __slots__ = ('hashes', 'first_seen', 'distinct_counts')
+
+    def __init__(self):
+        self.hashes: List[int] = []
+        self.first_seen: Dict[int, int] = {}
+        self.distinct_counts: List[int] = [0]
+
+    def append(self, position_hash: int):
+        if position_hash not in self.first_seen:
+            self.first_seen[position_hash] = len(self.hashes)
+            self.distinct_counts.append(self.distinct_counts[-1] + 1)
+        else:
+            self.distinct_counts.append(self.distinct_counts[-1])
+        self.hashes.append(position_hash)
+
+    def fork(self, length: int) -> '_HashLog':
+        log = _HashLog()
+        for position_hash in self.hashes[:length]:
+            log.append(position_hash)
+        return log
+
+
+class PositionHistory:
+    # Множество хешей предыдущих позиций: общий журнал плюс длина префикса этого состояния.
+    __slots__ = ('_log', '_length')
+
+    def __init__(self, log: Optional[_HashLog] = None, length: int = 0):
+        self._log = log if log is not None else _HashLog()
+        self._length = length
+
+    @classmethod
+    def from_hashes(cls, hashes: Iterable[int]) -> 'PositionHistory':
+        if isinstance(hashes, PositionHistory):
+            return hashes
+        log = _HashLog()
+        for position_hash in hashes:
+            log.append(position_hash)
+        return cls(log, len(log.hashes))
+
+    def with_hash(self, position_hash: int) -> 'PositionHistory':
+        log = self._log
+        if len(log.hashes) > self._length:
+            if log.hashes[self._length] == position_hash:
+                return PositionHistory(log, self._length + 1)
+            log = log.fork(self._length)
+        log.append(position_hash)
+        return PositionHistory(log, self._length + 1)
+
+    def __contains__(self, position_hash) -> bool:
+        position = self._log.first_seen.get(position_hash)
+        return position is not None and position < self._length
+
+    def __len__(self):
+        return self._log.distinct_counts[self._length]
+
+    def __iter__(self) -> Iterator[int]:
+        first_seen = self._log.first_seen
+        for position, position_hash in enumerate(self._log.hashes[:self._length]):
+            if first_seen[position_hash] == position:
+                yield position_hash
+
+    def __or__(self, other) -> frozenset:
+        return frozenset(self) | frozenset(other)
+
+    __ror__ = __or__
+
+    def __eq__(self, other):
+        if isinstance(other, PositionHistory):
+            return frozenset(self) == frozenset(other)
+        if isinstance(other, (set, frozenset)):
+            return frozenset(self) == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(frozenset(self))
+
+    def __repr__(self):
+        return f"<PositionHistory of {len(self)} positions>"
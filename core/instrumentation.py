@@ -0,0 +1,155 @@
+import contextlib
+import contextvars
+import functools
+import os
+import time
+from typing import Dict, Iterator, List, Mapping, NamedTuple
+
+__all__ = [
+    'Measurement',
+    'Stats',
+    'Probe',
+    'probe',
+    'timed',
+    'enable',
+    'disable',
+    'is_enabled',
+    'snapshot',
+    'reset',
+    'scope',
+    'configure_from_env'
+]
+
+
+class Measurement(NamedTuple):
+    count: int
+    seconds: float
+
+
+class Stats:
+    # Счётчики по имени: [число вызовов, суммарное время в секундах]. Для чистых счётчиков время остаётся 0.
+    __slots__ = ('_values',)
+
+    def __init__(self):
+        self._values: Dict[str, List] = {}
+
+    def add(self, name: str, count: int, seconds: float):
+        values = self._values.get(name)
+        if values is None:
+            self._values[name] = [count, seconds]
+        else:
+            values[0] += count
+            values[1] += seconds
+
+    def snapshot(self) -> Dict[str, Measurement]:
+        return {name: Measurement(count, seconds) for name, (count, seconds) in sorted(self._values.items())}
+
+    def reset(self):
+        self._values.clear()
+
+
+_totals = Stats()
+_scopes: contextvars.ContextVar = contextvars.ContextVar('go_instrumentation_scopes', default=())
+_probes: Dict[str, 'Probe'] = {}
+_enabled = False
+_active_scopes = 0
+
+
+class Probe:
+    # Как и у трассировки, вызывающий код сначала проверяет флаг:
+    #     if _copy_probe.enabled: _copy_probe.add()
+    # Выключенный замер стоит одного чтения атрибута.
+    __slots__ = ('name', 'enabled')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.enabled = _enabled or _active_scopes > 0
+
+    def add(self, seconds: float = 0.0, count: int = 1):
+        _totals.add(self.name, count, seconds)
+        for stats in _scopes.get():
+            stats.add(self.name, count, seconds)
+
+
+def probe(name: str) -> Probe:
+    named_probe = _probes.get(name)
+    if named_probe is None:
+        named_probe = Probe(name)
+        _probes[name] = named_probe
+    return named_probe
+
+
+def timed(name: str):
+    # Декоратор для методов ядра: при выключенных замерах — один лишний вызов и проверка флага.
+    named_probe = probe(name)
+
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not named_probe.enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                named_probe.add(time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+
+def _apply():
+    enabled = _enabled or _active_scopes > 0
+    for named_probe in _probes.values():
+        named_probe.enabled = enabled
+
+
+def enable():
+    global _enabled
+    _enabled = True
+    _apply()
+
+
+def disable():
+    global _enabled
+    _enabled = False
+    _apply()
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def snapshot() -> Dict[str, Measurement]:
+    return _totals.snapshot()
+
+
+def reset():
+    _totals.reset()
+
+
+@contextlib.contextmanager
+def scope() -> Iterator[Stats]:
+    # Счётчики одного запроса или одного хода бота. Пока открыт хотя бы один scope, замеры включены
+    # во всём процессе и попадают и в общие итоги, но в Stats scope — только из его контекста.
+    global _active_scopes
+    stats = Stats()
+    token = _scopes.set(_scopes.get() + (stats,))
+    _active_scopes += 1
+    _apply()
+    try:
+        yield stats
+    finally:
+        _active_scopes -= 1
+        _apply()
+        _scopes.reset(token)
+
+
+def configure_from_env(environ: Mapping[str, str] = os.environ):
+    # GO_INSTRUMENT=1 включает замеры с момента импорта.
+    if environ.get('GO_INSTRUMENT', '').lower() in ('1', 'true', 'yes', 'on'):
+        enable()
+    else:
+        disable()
+
+
+configure_from_env()
@@ -0,0 +1,87 @@
+from typing import List, Optional, Set, Tuple
+
+from core.geometry import geometry
+from core.gotypes import Player
+
+__all__ = [
+    'LegalPointTracker'
+]
+
+
+class LegalPointTracker:
+    # Точки, куда цвет может сходить без учёта истории позиций (не занято и не самоубийство), и те из них,
+    # что снимают камни соперника. Доска отмечает каждую изменённую точку, а пересчёт идёт лениво и только
+    # в окрестности изменений: сама точка, её соседи и свободы строк, которые её касаются.
+    __slots__ = ('_offsets', '_point_at', '_indexes', '_legal', '_captures', '_dirty', '_max_dirty')
+
+    def __init__(self, num_rows, num_cols):
+        board_geometry = geometry(num_rows, num_cols)
+        stride = board_geometry.stride
+        self._offsets = (-stride, stride, -1, 1)
+        self._point_at = board_geometry.point_at
+        self._indexes = board_geometry.indexes
+        # Индексируются цветом: [1] — чёрные, [2] — белые.
+        self._legal: Tuple[Set[int], ...] = (set(), set(), set())
+        self._captures: Tuple[Set[int], ...] = (set(), set(), set())
+        # None — пересчитать все точки при следующем запросе.
+        self._dirty: Optional[List[int]] = None
+        self._max_dirty = num_rows * num_cols
+
+    def mark(self, index: int):
+        dirty = self._dirty
+        if dirty is not None:
+            if len(dirty) < self._max_dirty:
+                dirty.append(index)
+            else:
+                self._dirty = None
+
+    def _refresh(self, board):
+        dirty = self._dirty
+        if dirty is not None and not dirty:
+            return
+        point_at = self._point_at
+        if dirty is None:
+            affected = self._indexes
+            for points in self._legal + self._captures:
+                points.clear()
+        else:
+            affected = set()
+            for index in dirty:
+                affected.add(index)
+                affected.update(board._string_liberty_indexes(index))
+                for offset in self._offsets:
+                    neighbor = index + offset
+                    if point_at[neighbor] is not None:
+                        affected.add(neighbor)
+                        affected.update(board._string_liberty_indexes(neighbor))
+        for player in (Player.black, Player.white):
+            legal = self._legal[player.value]
+            captures = self._captures[player.value]
+            for index in affected:
+                probe = board.probe_play(player, point_at[index])
+                if probe.is_occupied or probe.is_self_capture:
+                    legal.discard(index)
+                    captures.discard(index)
+                else:
+                    legal.add(index)
+                    if probe.captures_opponent:
+                        captures.add(index)
+                    else:
+                        captures.discard(index)
+        self._dirty = []
+
+    def legal_indexes(self, board, player: Player) -> Tuple[Set[int], Set[int]]:
+        # Возвращаются рабочие множества трекера — вызывающий код не должен их изменять.
+        self._refresh(board)
+        return self._legal[player.value], self._captures[player.value]
+
+    def copy(self) -> 'LegalPointTracker':
+        tracker = LegalPointTracker.__new__(LegalPointTracker)
+        tracker._offsets = self._offsets
+        tracker._point_at = self._point_at
+        tracker._indexes = self._indexes
+        tracker._legal = tuple(points.copy() for points in self._legal)
+        tracker._captures = tuple(points.copy() for points in self._captures)
+        tracker._dirty = None if self._dirty is None else self._dirty[:]
+        tracker._max_dirty = self._max_dirty
+        return tracker
@@ -0,0 +1,107 @@
+from array import array
+from typing import Dict, List, Optional, Set, Tuple
+
+from core.geometry import geometry
+
+__all__ = [
+    'LibertyIndex'
+]
+
+# Класс «две и больше свободы».
+MANY = 2
+
+
+class LibertyIndex:
+    # Строки доски, разложенные по числу настоящих свобод: 0, 1 (атари) и 2+. Строка представлена якорем —
+    # минимальным индексом своего камня. Доска отмечает изменённые точки, пересчёт ленивый: только строки,
+    # которые содержат изменённую точку или касаются её.
+    __slots__ = ('_offsets', '_indexes', '_anchors', '_buckets', '_bucket_of', '_dirty', '_max_dirty')
+
+    def __init__(self, num_rows, num_cols):
+        board_geometry = geometry(num_rows, num_cols)
+        stride = board_geometry.stride
+        self._offsets = (-stride, stride, -1, 1)
+        self._indexes = board_geometry.indexes
+        # Якорь строки для каждого камня, 0 для пустых точек.
+        self._anchors = array('i', [0]) * ((num_rows + 2) * stride)
+        self._buckets: Tuple[Set[int], ...] = (set(), set(), set())
+        self._bucket_of: Dict[int, int] = {}
+        # None — пересчитать всю доску при следующем запросе.
+        self._dirty: Optional[List[int]] = None
+        self._max_dirty = num_rows * num_cols
+
+    def mark(self, index: int):
+        dirty = self._dirty
+        if dirty is not None:
+            if len(dirty) < self._max_dirty:
+                dirty.append(index)
+            else:
+                self._dirty = None
+
+    def _discard(self, anchor: int):
+        bucket = self._bucket_of.pop(anchor, None)
+        if bucket is not None:
+            self._buckets[bucket].discard(anchor)
+
+    def _refresh(self, board):
+        dirty = self._dirty
+        if dirty is not None and not dirty:
+            return
+        anchors = self._anchors
+        if dirty is None:
+            self._anchors = anchors = array('i', [0]) * len(anchors)
+            self._buckets = (set(), set(), set())
+            self._bucket_of = {}
+            candidates = self._indexes
+        else:
+            candidates = set()
+            for index in dirty:
+                candidates.add(index)
+                for offset in self._offsets:
+                    candidates.add(index + offset)
+        # Якоря, уже пересчитанные в этом проходе: старые записи с тем же номером удалять нельзя.
+        fresh: Set[int] = set()
+        processed: Set[int] = set()
+        for index in candidates:
+            if index in processed:
+                continue
+            stones, liberties = board._string_stones_and_liberties(index)
+            if not stones:
+                old_anchor = anchors[index]
+                if old_anchor:
+                    if old_anchor not in fresh:
+                        self._discard(old_anchor)
+                    anchors[index] = 0
+                continue
+            anchor = min(stones)
+            for stone in stones:
+                old_anchor = anchors[stone]
+                if old_anchor and old_anchor not in fresh:
+                    self._discard(old_anchor)
+                anchors[stone] = anchor
+                processed.add(stone)
+            bucket = min(len(liberties), MANY)
+            self._buckets[bucket].add(anchor)
+            self._bucket_of[anchor] = bucket
+            fresh.add(anchor)
+        self._dirty = []
+
+    def anchors(self, board, num_liberties: int) -> Set[int]:
+        # Рабочее множество индекса — вызывающий код не должен его изменять.
+        self._refresh(board)
+        return self._buckets[min(num_liberties, MANY)]
+
+    def liberty_class(self, board, index: int) -> Optional[int]:
+        self._refresh(board)
+        return self._bucket_of.get(self._anchors[index])
+
+    def copy(self) -> 'LibertyIndex':
+        index = LibertyIndex.__new__(LibertyIndex)
+        index._offsets = self._offsets
+        index._indexes = self._indexes
+        index._anchors = self._anchors[:]
+        index._buckets = tuple(anchors.copy() for anchors in self._buckets)
+        index._bucket_of = self._bucket_of.copy()
+        index._dirty = None if self._dirty is None else self._dirty[:]
+        index._max_dirty = self._max_dirty
+        return index
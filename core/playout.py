@@ -0,0 +1,521 @@
+import random
+from typing import List, Tuple, Optional
+
+import numpy as np
+from numba import njit
+
+from core import zobrist
+from core.array_scoring import label_territory
+from core.deterministic_queue import DeterministicQueue
+from core.goboard import GameState, GoString, Move
+from core.gotypes import Player, Point
+from core.scoring import DEFAULT_KOMI, GameResult
+
+__all__ = [
+    'PlayoutEngine'
+]
+
+EMPTY = 0
+BORDER = 3
+_RULES = {'opponent': 0, 'both': 1, 'self': 2}
+
+
+# Строки хранятся как в ArrayBoard: корень, кольцевой список камней и псевдо-свободы
+# (количество, сумма индексов и сумма квадратов индексов).
+@njit(cache=True)
+def _build_strings(colors, offsets, ids, nxt, sizes, libs, sums, squares):
+    stack = np.empty(colors.size, np.int64)
+    for start in range(colors.size):
+        color = colors[start]
+        if (color != 1 and color != 2) or ids[start] != -1:
+            continue
+        ids[start] = start
+        nxt[start] = start
+        sizes[start] = 1
+        stack[0] = start
+        top = 1
+        while top:
+            top -= 1
+            stone = stack[top]
+            for offset in offsets:
+                neighbor = stone + offset
+                if colors[neighbor] == EMPTY:
+                    libs[start] += 1
+                    sums[start] += neighbor
+                    squares[start] += neighbor * neighbor
+                elif colors[neighbor] == color and ids[neighbor] == -1:
+                    ids[neighbor] = start
+                    nxt[neighbor] = nxt[start]
+                    nxt[start] = neighbor
+                    sizes[start] += 1
+                    stack[top] = neighbor
+                    top += 1
+
+
+@njit(cache=True)
+def _is_in_atari(root, libs, sums, squares):
+    count = libs[root]
+    return count > 0 and sums[root] * sums[root] == count * squares[root]
+
+
+@njit(cache=True)
+def _string_hash(root, codes, colors, nxt):
+    string_hash = np.uint64(0)
+    color = colors[root]
+    stone = root
+    while True:
+        string_hash ^= codes[stone, color]
+        stone = nxt[stone]
+        if stone == root:
+            return string_hash
+
+
+@njit(cache=True)
+def _merge(root, other, ids, nxt, sizes, libs, sums, squares):
+    if sizes[root] < sizes[other]:
+        root, other = other, root
+    stone = other
+    while True:
+        ids[stone] = root
+        stone = nxt[stone]
+        if stone == other:
+            break
+    nxt[root], nxt[other] = nxt[other], nxt[root]
+    sizes[root] += sizes[other]
+    libs[root] += libs[other]
+    sums[root] += sums[other]
+    squares[root] += squares[other]
+    return root
+
+
+@njit(cache=True)
+def _remove(root, codes, offsets, colors, ids, nxt, libs, sums, squares):
+    removed_hash = _string_hash(root, codes, colors, nxt)
+    stone = root
+    while True:
+        colors[stone] = EMPTY
+        stone = nxt[stone]
+        if stone == root:
+            break
+    while True:
+        ids[stone] = -1
+        for offset in offsets:
+            neighbor = stone + offset
+            if colors[neighbor] == EMPTY or colors[neighbor] == BORDER:
+                continue
+            neighbor_root = ids[neighbor]
+            libs[neighbor_root] += 1
+            sums[neighbor_root] += stone
+            squares[neighbor_root] += stone * stone
+        stone = nxt[stone]
+        if stone == root:
+            break
+    return removed_hash
+
+
+@njit(cache=True)
+def _place(index, color, offsets, colors, ids, nxt, sizes, libs, sums, squares, captured):
+    colors[index] = color
+    ids[index] = index
+    nxt[index] = index
+    sizes[index] = 1
+    libs[index] = 0
+    sums[index] = 0
+    squares[index] = 0
+    for offset in offsets:
+        neighbor = index + offset
+        if colors[neighbor] == EMPTY:
+            libs[index] += 1
+            sums[index] += neighbor
+            squares[index] += neighbor * neighbor
+        elif colors[neighbor] != BORDER:
+            neighbor_root = ids[neighbor]
+            libs[neighbor_root] -= 1
+            sums[neighbor_root] -= index
+            squares[neighbor_root] -= index * index
+
+    root = index
+    num_captured = 0
+    for offset in offsets:
+        neighbor = index + offset
+        neighbor_color = colors[neighbor]
+        if neighbor_color == color:
+            if ids[neighbor] != root:
+                root = _merge(root, ids[neighbor], ids, nxt, sizes, libs, sums, squares)
+        elif neighbor_color != EMPTY and neighbor_color != BORDER:
+            neighbor_root = ids[neighbor]
+            if libs[neighbor_root] == 0:
+                seen = False
+                for i in range(num_captured):
+                    if captured[i] == neighbor_root:
+                        seen = True
+                if not seen:
+                    captured[num_captured] = neighbor_root
+                    num_captured += 1
+    return root, num_captured
+
+
+@njit(cache=True)
+def _is_eye(index, color, offsets, diagonals, colors):
+    # Та же эвристика, что и в helpers.is_point_an_eye.
+    for offset in offsets:
+        if colors[index + offset] == color:
+            return True
+    friendly_corners = 0
+    off_board_corners = 0
+    for offset in diagonals:
+        corner_color = colors[index + offset]
+        if corner_color == BORDER:
+            off_board_corners += 1
+        elif corner_color == color:
+            friendly_corners += 1
+    if off_board_corners > 0:
+        return off_board_corners + friendly_corners == 4
+    return friendly_corners >= 3
+
+
+@njit(cache=True)
+def _probe_hash(index, color, position_hash, codes, offsets, colors, ids, nxt, libs, sums, squares, captured):
+    # Возвращает (допустим ли ход без учёта ко, хеш следующей позиции) — как ArrayBoard.probe_play.
+    has_liberty = False
+    next_hash = position_hash ^ codes[index, color]
+    num_captured = 0
+    for offset in offsets:
+        neighbor = index + offset
+        neighbor_color = colors[neighbor]
+        if neighbor_color == EMPTY:
+            has_liberty = True
+        elif neighbor_color == BORDER:
+            continue
+        elif neighbor_color == color:
+            if not _is_in_atari(ids[neighbor], libs, sums, squares):
+                has_liberty = True
+        else:
+            neighbor_root = ids[neighbor]
+            if _is_in_atari(neighbor_root, libs, sums, squares):
+                seen = False
+                for i in range(num_captured):
+                    if captured[i] == neighbor_root:
+                        seen = True
+                if not seen:
+                    captured[num_captured] = neighbor_root
+                    num_captured += 1
+                    next_hash ^= _string_hash(neighbor_root, codes, colors, nxt)
+    return has_liberty or num_captured > 0, next_hash
+
+
+@njit(cache=True)
+def _history_add(keys, used, position_hash):
+    mask = keys.size - 1
+    slot = np.int64(position_hash & np.uint64(mask))
+    while used[slot]:
+        if keys[slot] == position_hash:
+            return
+        slot = (slot + 1) & mask
+    keys[slot] = position_hash
+    used[slot] = True
+
+
+@njit(cache=True)
+def _history_contains(keys, used, position_hash):
+    mask = keys.size - 1
+    slot = np.int64(position_hash & np.uint64(mask))
+    while used[slot]:
+        if keys[slot] == position_hash:
+            return True
+        slot = (slot + 1) & mask
+    return False
+
+
+@njit(cache=True)
+def _record_is_on_board(record, rep, color, size, fingerprint, codes, colors, ids, nxt, sizes):
+    stone = rep[record]
+    if colors[stone] != color[record]:
+        return False
+    root = ids[stone]
+    return sizes[root] == size[record] and _string_hash(root, codes, colors, nxt) == fingerprint[record]
+
+
+@njit(cache=True)
+def _records_equal(a, b, color, size, fingerprint):
+    return color[a] == color[b] and size[a] == size[b] and fingerprint[a] == fingerprint[b]
+
+
+@njit(cache=True)
+def _playout(colors, stride, codes, history, pattern, turn, last_pass, rule, delayed,
+             rep, color, size, fingerprint, num_records, has_self, max_moves, moves_out):
+    # Записи отложенных взятий: 0..capacity-1 — группы соперника, capacity — своя группа.
+    offsets = np.array([-stride, stride, -1, 1], np.int64)
+    diagonals = np.array([-stride - 1, -stride + 1, stride - 1, stride + 1], np.int64)
+    num_points = colors.size
+    ids = np.full(num_points, -1, np.int64)
+    nxt = np.zeros(num_points, np.int64)
+    sizes = np.zeros(num_points, np.int64)
+    libs = np.zeros(num_points, np.int64)
+    sums = np.zeros(num_points, np.int64)
+    squares = np.zeros(num_points, np.int64)
+    _build_strings(colors, offsets, ids, nxt, sizes, libs, sums, squares)
+
+    position_hash = np.uint64(0)
+    num_empty = 0
+    for index in range(num_points):
+        if colors[index] == 1 or colors[index] == 2:
+            position_hash ^= codes[index, colors[index]]
+        elif colors[index] == EMPTY:
+            num_empty += 1
+
+    capacity = 1
+    while capacity < 2 * (history.size + 2 * max_moves + 2):
+        capacity *= 2
+    keys = np.zeros(capacity, np.uint64)
+    used = np.zeros(capacity, np.bool_)
+    for position_hash_seen in history:
+        _history_add(keys, used, position_hash_seen)
+
+    self_record = rep.size - 1
+    in_removal = np.zeros(rep.size, np.bool_)
+    captured = np.full(4, -1, np.int64)
+    candidates = np.empty(num_points, np.int64)
+    num_moves = 0
+    while num_moves < max_moves and num_empty > 0:
+        player = pattern[turn % pattern.size]
+        turn += 1
+
+        # Отложенные взятия снимаются перед ходом игрока их цвета, как в GameState.resolve_pending_captures.
+        if delayed and (num_records > 0 or has_self):
+            in_removal[:] = False
+            if num_records > 0 and has_self:
+                if rule == 0 or rule == 1:
+                    for record in range(num_records):
+                        in_removal[record] = color[record] == player
+                if color[self_record] == player and (rule == 1 or rule == 2):
+                    in_removal[self_record] = True
+            elif num_records > 0:
+                for record in range(num_records):
+                    in_removal[record] = color[record] == player
+            elif color[self_record] == player:
+                in_removal[self_record] = True
+
+            if in_removal.any():
+                removed = 0
+                cleanup_hash = position_hash
+                for record in range(rep.size):
+                    if not in_removal[record]:
+                        continue
+                    if record == self_record and not has_self:
+                        continue
+                    if _record_is_on_board(record, rep, color, size, fingerprint, codes, colors, ids, nxt, sizes):
+                        root = ids[rep[record]]
+                        if libs[root] == 0:
+                            num_empty += sizes[root]
+                            position_hash ^= _remove(root, codes, offsets, colors, ids, nxt, libs, sums, squares)
+                            removed += 1
+                if removed > 0:
+                    _history_add(keys, used, cleanup_hash)
+                else:
+                    in_removal[:] = False
+                    for record in range(num_records):
+                        in_removal[record] = color[record] == player
+                    if has_self and color[self_record] == player:
+                        in_removal[self_record] = True
+
+                kept = 0
+                for record in range(num_records):
+                    dropped = in_removal[record]
+                    if not dropped and has_self and in_removal[self_record]:
+                        dropped = _records_equal(record, self_record, color, size, fingerprint)
+                    if not dropped:
+                        rep[kept], color[kept], size[kept], fingerprint[kept] = \
+                            rep[record], color[record], size[record], fingerprint[record]
+                        kept += 1
+                if has_self and not in_removal[self_record]:
+                    for record in range(num_records):
+                        if in_removal[record] and _records_equal(record, self_record, color, size, fingerprint):
+                            has_self = False
+                elif has_self:
+                    has_self = False
+                num_records = kept
+
+        num_candidates = 0
+        for index in range(num_points):
+            if colors[index] == EMPTY:
+                candidates[num_candidates] = index
+                num_candidates += 1
+        move = -1
+        next_hash = position_hash
+        while num_candidates > 0:
+            pick = np.random.randint(num_candidates)
+            index = candidates[pick]
+            num_candidates -= 1
+            candidates[pick] = candidates[num_candidates]
+            if _is_eye(index, player, offsets, diagonals, colors):
+                continue
+            legal, next_hash = _probe_hash(index, player, position_hash, codes, offsets,
+                                           colors, ids, nxt, libs, sums, squares, captured)
+            if legal and not _history_contains(keys, used, next_hash):
+                move = index
+                break
+
+        _history_add(keys, used, position_hash)
+        moves_out[num_moves, 0] = player
+        moves_out[num_moves, 1] = move
+        num_moves += 1
+        if move < 0:
+            if last_pass != 0 and last_pass != player:
+                break
+            last_pass = player
+            continue
+        last_pass = 0
+
+        root, num_captured = _place(move, player, offsets, colors, ids, nxt, sizes, libs, sums, squares, captured)
+        num_empty -= 1
+        position_hash ^= codes[move, player]
+        player_zero_libs = libs[root] == 0
+        if delayed:
+            for i in range(num_captured):
+                captured_root = captured[i]
+                captured_hash = _string_hash(captured_root, codes, colors, nxt)
+                duplicate = False
+                for record in range(num_records):
+                    if color[record] == colors[captured_root] and size[record] == sizes[captured_root] \
+                            and fingerprint[record] == captured_hash:
+                        duplicate = True
+                if not duplicate and num_records < self_record:
+                    rep[num_records] = captured_root
+                    color[num_records] = colors[captured_root]
+                    size[num_records] = sizes[captured_root]
+                    fingerprint[num_records] = captured_hash
+                    num_records += 1
+            if player_zero_libs:
+                rep[self_record] = root
+                color[self_record] = player
+                size[self_record] = sizes[root]
+                fingerprint[self_record] = _string_hash(root, codes, colors, nxt)
+                has_self = True
+            continue
+
+        remove_opponent = False
+        remove_self = False
+        if num_captured > 0 and player_zero_libs:
+            remove_opponent = rule == 0 or rule == 1
+            remove_self = rule == 1 or rule == 2
+        elif num_captured > 0:
+            remove_opponent = True
+        elif player_zero_libs:
+            remove_self = True
+        if remove_opponent:
+            for i in range(num_captured):
+                num_empty += sizes[captured[i]]
+                position_hash ^= _remove(captured[i], codes, offsets, colors, ids, nxt, libs, sums, squares)
+        if remove_self:
+            num_empty += sizes[root]
+            position_hash ^= _remove(root, codes, offsets, colors, ids, nxt, libs, sums, squares)
+
+    # Подсчёт по площади как в scoring.compute_game_result: камни плюс пустые области одного цвета.
+    owners = np.empty(num_points, np.int8)
+    black_stones, white_stones, black_territory, white_territory = label_territory(colors, stride, owners)
+    return black_stones + black_territory, white_stones + white_territory, num_moves
+
+
+@njit(cache=True)
+def _seed(seed):
+    np.random.seed(seed)
+
+
+@njit(cache=True)
+def _playouts(count, colors, stride, codes, history, pattern, turn, last_pass, rule, delayed,
+              rep, color, size, fingerprint, num_records, has_self, max_moves):
+    scores = np.empty((count, 2), np.int64)
+    moves_out = np.empty((max_moves, 2), np.int64)
+    for game in range(count):
+        black, white, _ = _playout(colors.copy(), stride, codes, history, pattern, turn, last_pass, rule, delayed,
+                                   rep.copy(), color.copy(), size.copy(), fingerprint.copy(),
+                                   num_records, has_self, max_moves, moves_out)
+        scores[game, 0] = black
+        scores[game, 1] = white
+    return scores
+
+
+class PlayoutEngine:
+    def __init__(self,
+                 game_state: GameState,
+                 queue: DeterministicQueue,
+                 simultaneous_capture_rule: str = 'opponent',
+                 delayed_capture: bool = False,
+                 max_moves: Optional[int] = None,
+                 komi: float = DEFAULT_KOMI):
+        if simultaneous_capture_rule not in _RULES:
+            raise ValueError(f"Unknown simultaneous capture rule: {simultaneous_capture_rule}")
+        board = game_state.board
+        self.num_rows = board.num_rows
+        self.num_cols = board.num_cols
+        self._stride = board.num_cols + 2
+        self._colors = np.pad(board.to_array(), 1, constant_values=BORDER).ravel()
+        self._codes = zobrist.table(board.num_rows, board.num_cols)
+        self._history = np.fromiter(game_state.previous_states, dtype=np.uint64,
+                                    count=len(game_state.previous_states))
+        self._pattern = np.array([player.value for player in queue.pattern], dtype=np.int64)
+        self._turn = queue.current_index
+        self._last_pass = 0
+        if game_state.move_history and game_state.move_history[-1][0].is_pass:
+            self._last_pass = game_state.move_history[-1][1].value
+        self._rule = _RULES[simultaneous_capture_rule]
+        self._delayed = delayed_capture
+        self.max_moves = max_moves if max_moves is not None else 3 * board.num_rows * board.num_cols
+        self._is_over = game_state.is_over
+        self.komi = komi
+
+        capacity = 4 * board.num_rows * board.num_cols
+        self._rep = np.zeros(capacity + 1, np.int64)
+        self._color = np.zeros(capacity + 1, np.int64)
+        self._size = np.zeros(capacity + 1, np.int64)
+        self._fingerprint = np.zeros(capacity + 1, np.uint64)
+        self._num_records = 0
+        for group in game_state.pending_opponent_captures:
+            self._set_record(self._num_records, group)
+            self._num_records += 1
+        self._has_self = game_state.pending_self_capture is not None
+        if self._has_self:
+            self._set_record(capacity, game_state.pending_self_capture)
+        self._moves = np.empty((self.max_moves, 2), np.int64)
+        self._num_moves = 0
+
+    def _set_record(self, record: int, group: GoString):
+        fingerprint = np.uint64(0)
+        for stone in group.stones:
+            fingerprint ^= self._codes[stone.row * self._stride + stone.col, group.color.value]
+        stone = next(iter(group.stones))
+        self._rep[record] = stone.row * self._stride + stone.col
+        self._color[record] = group.color.value
+        self._size[record] = len(group.stones)
+        self._fingerprint[record] = fingerprint
+
+    def _arguments(self):
+        return (self._stride, self._codes, self._history, self._pattern, self._turn, self._last_pass,
+                self._rule, self._delayed)
+
+    def playout(self, seed: Optional[int] = None) -> GameResult:
+        _seed(seed if seed is not None else random.randrange(2 ** 32))
+        max_moves = 0 if self._is_over else self.max_moves
+        black, white, self._num_moves = _playout(
+            self._colors.copy(), *self._arguments(), self._rep.copy(), self._color.copy(), self._size.copy(),
+            self._fingerprint.copy(), self._num_records, self._has_self, max_moves, self._moves)
+        return GameResult(black, white, komi=self.komi)
+
+    def playouts(self, count: int, seed: Optional[int] = None) -> np.ndarray:
+        # Площадь (black, white) для каждой партии; без накладных расходов Python между партиями.
+        _seed(seed if seed is not None else random.randrange(2 ** 32))
+        max_moves = 0 if self._is_over else self.max_moves
+        return _playouts(count, self._colors, *self._arguments(), self._rep, self._color, self._size,
+                         self._fingerprint, self._num_records, self._has_self, max_moves)
+
+    @property
+    def last_moves(self) -> List[Tuple[Player, Move]]:
+        moves = []
+        for color, index in self._moves[:self._num_moves]:
+            if index < 0:
+                moves.append((Player(int(color)), Move.pass_turn()))
+            else:
+                moves.append((Player(int(color)), Move.play(Point(int(index) // self._stride,
+                                                                  int(index) % self._stride))))
+        return moves
@@ -0,0 +1,92 @@
+from typing import Iterable, List, Mapping, NamedTuple, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from core.geometry import geometry
+from core.gotypes import Player, Point
+from core.setup_mode import SetupState
+
+__all__ = [
+    'PositionString',
+    'position_colors',
+    'position_strings'
+]
+
+EMPTY = 0
+BORDER = 3
+
+Position = Union[SetupState, np.ndarray, Mapping[Point, Player], Iterable[Tuple[Point, Player]]]
+
+
+class PositionString(NamedTuple):
+    color: int
+    stones: List[int]
+    liberties: Set[int]
+
+
+def position_colors(position: Position,
+                    num_rows: Optional[int] = None,
+                    num_cols: Optional[int] = None) -> Tuple[int, int, bytearray]:
+    # Позиция целиком в раскладке с рамкой: SetupState, массив (rows, cols) из board.to_array()
+    # или камни (словарь точка -> цвет либо пары (точка, цвет)). Для камней нужен размер доски.
+    if isinstance(position, SetupState):
+        num_rows, num_cols = position.num_rows, position.num_cols
+        stones = position.get_positions().items()
+    elif isinstance(position, np.ndarray):
+        if position.ndim != 2:
+            raise ValueError(f"Position array must be two-dimensional, got shape {position.shape}")
+        if num_rows is not None and (num_rows, num_cols) != position.shape:
+            raise ValueError(f"Position array shape {position.shape} does not match board {num_rows}x{num_cols}")
+        if not np.isin(position, (EMPTY, Player.black.value, Player.white.value)).all():
+            raise ValueError("Position array may only contain 0 (empty), 1 (black) and 2 (white)")
+        num_rows, num_cols = position.shape
+        padded = np.full((num_rows + 2, num_cols + 2), BORDER, dtype=np.uint8)
+        padded[1:-1, 1:-1] = position
+        return num_rows, num_cols, bytearray(padded.tobytes())
+    else:
+        if num_rows is None or num_cols is None:
+            raise ValueError("Board size is required when loading a position from a list of stones")
+        stones = position.items() if isinstance(position, Mapping) else position
+
+    stride = num_cols + 2
+    colors = bytearray([BORDER]) * ((num_rows + 2) * stride)
+    for r in range(1, num_rows + 1):
+        colors[r * stride + 1:r * stride + 1 + num_cols] = bytes(num_cols)
+    for point, color in stones:
+        row, col = point
+        if not (1 <= row <= num_rows and 1 <= col <= num_cols):
+            raise ValueError(f"Stone at {point} is outside the board ({num_rows}x{num_cols})")
+        colors[row * stride + col] = color.value if isinstance(color, Player) else Player(color).value
+    return num_rows, num_cols, colors
+
+
+def position_strings(num_rows, num_cols, colors: bytearray) -> List[PositionString]:
+    # Один проход заливки: строки камней вместе с точными свободами. Позиция без свобод у строки недопустима.
+    stride = num_cols + 2
+    offsets = (-stride, stride, -1, 1)
+    point_at = geometry(num_rows, num_cols).point_at
+    seen = bytearray(len(colors))
+    strings = []
+    for start in range(stride, len(colors) - stride):
+        color = colors[start]
+        if color == EMPTY or color == BORDER or seen[start]:
+            continue
+        seen[start] = 1
+        stack = [start]
+        stones = []
+        liberties = set()
+        while stack:
+            index = stack.pop()
+            stones.append(index)
+            for offset in offsets:
+                neighbor = index + offset
+                neighbor_color = colors[neighbor]
+                if neighbor_color == EMPTY:
+                    liberties.add(neighbor)
+                elif neighbor_color == color and not seen[neighbor]:
+                    seen[neighbor] = 1
+                    stack.append(neighbor)
+        if not liberties:
+            raise ValueError(f"{Player(color).name} group at {point_at[min(stones)]} has no liberties")
+        strings.append(PositionString(color, stones, liberties))
+    return strings
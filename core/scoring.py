@@ -1,6 +1,15 @@
-from core.gotypes import Point, Player
+from array import array
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from core import instrumentation
+from core.geometry import geometry
+from core.gotypes import Player
 from collections import namedtuple
 
+EMPTY = 0
+BORDER = 3
+
 
 class Territory:
     def __init__(self, territory_map):
@@ -24,6 +33,22 @@ class Territory:
                 self.num_dame += 1
                 self.dame_points.append(point)
 
+    @classmethod
+    def from_counts(cls, num_black_territory, num_white_territory, num_black_stones, num_white_stones,
+                    dame_points) -> 'Territory':
+        territory = cls({})
+        territory.num_black_territory = num_black_territory
+        territory.num_white_territory = num_white_territory
+        territory.num_black_stones = num_black_stones
+        territory.num_white_stones = num_white_stones
+        territory.num_dame = len(dame_points)
+        territory.dame_points = list(dame_points)
+        return territory
+
+
+# Общее значение коми для всех подсчётов: compute_game_result, пакетный подсчёт и плейауты.
+DEFAULT_KOMI = 7.5
+
 
 class GameResult(namedtuple('GameResult', 'b w komi')):
     @property
@@ -45,30 +70,172 @@ class GameResult(namedtuple('GameResult', 'b w komi')):
         return f'W+{total_white - self.b:.1f}'
 
 
+class AreaTracker:
+    # Счёт по площади, который доска обновляет на каждом изменении точки. Пустые области
+    # пересчитываются лениво и только рядом с изменёнными точками.
+    __slots__ = ('num_rows', 'num_cols', '_offsets', '_colors', '_region_ids', '_regions', '_next_region_id',
+                 '_dirty', '_max_dirty', '_owned', 'num_black_stones', 'num_white_stones')
+
+    def __init__(self, num_rows, num_cols):
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        stride = num_cols + 2
+        self._offsets = (-stride, stride, -1, 1)
+        self._colors = bytearray([BORDER]) * ((num_rows + 2) * stride)
+        for r in range(1, num_rows + 1):
+            self._colors[r * stride + 1:r * stride + 1 + num_cols] = bytes(num_cols)
+        self._region_ids = array('i', [0]) * len(self._colors)
+        # id области -> (индексы точек, владелец: 0 — дамэ, 1 — чёрные, 2 — белые)
+        self._regions: Dict[int, Tuple[Tuple[int, ...], int]] = {}
+        self._next_region_id = 1
+        # None — пересчитать все области при следующем запросе.
+        self._dirty: Optional[List[int]] = None
+        self._max_dirty = num_rows * num_cols
+        self._owned = [0, 0, 0]
+        self.num_black_stones = 0
+        self.num_white_stones = 0
+
+    def set_color(self, index: int, color: int):
+        old_color = self._colors[index]
+        if old_color == color:
+            return
+        self._colors[index] = color
+        if old_color == Player.black.value:
+            self.num_black_stones -= 1
+        elif old_color == Player.white.value:
+            self.num_white_stones -= 1
+        if color == Player.black.value:
+            self.num_black_stones += 1
+        elif color == Player.white.value:
+            self.num_white_stones += 1
+        dirty = self._dirty
+        if dirty is not None:
+            if len(dirty) < self._max_dirty:
+                dirty.append(index)
+            else:
+                self._dirty = None
+
+    def load(self, colors: bytearray):
+        # Вся позиция сразу в той же раскладке с рамкой; области пересчитаются при первом запросе.
+        self._colors[:] = colors
+        self.num_black_stones = colors.count(Player.black.value)
+        self.num_white_stones = colors.count(Player.white.value)
+        self._dirty = None
+
+    @instrumentation.timed('scoring.flood_fill')
+    def _fill(self, start: int):
+        colors = self._colors
+        region_ids = self._region_ids
+        region_id = self._next_region_id
+        self._next_region_id += 1
+        region_ids[start] = region_id
+        stack = [start]
+        indexes = []
+        borders = 0
+        while stack:
+            index = stack.pop()
+            indexes.append(index)
+            for offset in self._offsets:
+                neighbor = index + offset
+                color = colors[neighbor]
+                if color == EMPTY:
+                    if not region_ids[neighbor]:
+                        region_ids[neighbor] = region_id
+                        stack.append(neighbor)
+                elif color != BORDER:
+                    borders |= color
+        owner = borders if borders != 3 else 0
+        self._regions[region_id] = (tuple(sorted(indexes)), owner)
+        self._owned[owner] += len(indexes)
+
+    def _refresh(self):
+        dirty = self._dirty
+        if dirty is not None and not dirty:
+            return
+        region_ids = self._region_ids
+        if dirty is None:
+            stride = self.num_cols + 2
+            self._region_ids = region_ids = array('i', [0]) * len(self._colors)
+            self._regions = {}
+            self._owned = [0, 0, 0]
+            seeds = [r * stride + c for r in range(1, self.num_rows + 1) for c in range(1, self.num_cols + 1)]
+        else:
+            seeds = []
+            regions = self._regions
+            for index in dirty:
+                seeds.append(index)
+                for neighbor in (index, index + self._offsets[0], index + self._offsets[1],
+                                 index - 1, index + 1):
+                    region_id = region_ids[neighbor]
+                    if region_id:
+                        indexes, owner = regions.pop(region_id)
+                        self._owned[owner] -= len(indexes)
+                        for region_index in indexes:
+                            region_ids[region_index] = 0
+                        seeds.extend(indexes)
+                    elif neighbor != index:
+                        seeds.append(neighbor)
+        colors = self._colors
+        for seed in seeds:
+            if colors[seed] == EMPTY and not region_ids[seed]:
+                self._fill(seed)
+        self._dirty = []
+
+    def scores(self) -> Tuple[int, int]:
+        self._refresh()
+        return self.num_black_stones + self._owned[1], self.num_white_stones + self._owned[2]
+
+    def territory(self) -> Territory:
+        self._refresh()
+        point_at = geometry(self.num_rows, self.num_cols).point_at
+        dame_points = sorted(index for indexes, owner in self._regions.values() if owner == 0 for index in indexes)
+        return Territory.from_counts(self._owned[1], self._owned[2], self.num_black_stones, self.num_white_stones,
+                                     [point_at[index] for index in dame_points])
+
+    def copy(self) -> 'AreaTracker':
+        tracker = AreaTracker.__new__(AreaTracker)
+        tracker.num_rows = self.num_rows
+        tracker.num_cols = self.num_cols
+        tracker._offsets = self._offsets
+        tracker._colors = self._colors[:]
+        tracker._region_ids = self._region_ids[:]
+        tracker._regions = self._regions.copy()
+        tracker._next_region_id = self._next_region_id
+        tracker._dirty = None if self._dirty is None else self._dirty[:]
+        tracker._max_dirty = self._max_dirty
+        tracker._owned = self._owned[:]
+        tracker.num_black_stones = self.num_black_stones
+        tracker.num_white_stones = self.num_white_stones
+        return tracker
+
+
+@instrumentation.timed('scoring.evaluate_territory')
 def evaluate_territory(board):
     status = {}
-    for r in range(1, board.num_rows + 1):
-        for c in range(1, board.num_cols + 1):
-            p = Point(row=r, col=c)
-            if p in status:
-                continue
-
-            stone = board.get(p)
-            if stone is not None:
-                status[p] = stone
+    board_geometry = geometry(board.num_rows, board.num_cols)
+    for p in board_geometry.points:
+        if p in status:
+            continue
+
+        stone = board.get(p)
+        if stone is not None:
+            status[p] = stone
+        else:
+            group, neighbor_stones = _collect_region_iterative(p, board, board_geometry)
+            if len(neighbor_stones) == 1:
+                owner = neighbor_stones.pop()
+                fill_status = 'territory_b' if owner == Player.black else 'territory_w'
             else:
-                group, neighbor_stones = _collect_region_iterative(p, board)
-                if len(neighbor_stones) == 1:
-                    owner = neighbor_stones.pop()
-                    fill_status = 'territory_b' if owner == Player.black else 'territory_w'
-                else:
-                    fill_status = 'dame'
-                for pos in group:
-                    status[pos] = fill_status
+                fill_status = 'dame'
+            for pos in group:
+                status[pos] = fill_status
     return Territory(status)
 
 
-def _collect_region_iterative(start_pos, board):
+@instrumentation.timed('scoring.flood_fill')
+def _collect_region_iterative(start_pos, board, board_geometry=None):
+    if board_geometry is None:
+        board_geometry = geometry(board.num_rows, board.num_cols)
     region = []
     borders = set()
     visited = set()
@@ -79,10 +246,7 @@ def _collect_region_iterative(start_pos, board):
     while stack:
         pos = stack.pop()
         region.append(pos)
-        for delta_r, delta_c in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            next_pos = Point(row=pos.row + delta_r, col=pos.col + delta_c)
-            if not board.is_on_grid(next_pos):
-                continue
+        for next_pos in board_geometry.neighbors[pos]:
             neighbor = board.get(next_pos)
             if neighbor is None:
                 if next_pos not in visited:
@@ -93,8 +257,62 @@ def _collect_region_iterative(start_pos, board):
     return region, borders
 
 
-def compute_game_result(game_state):
-    territory = evaluate_territory(game_state.board)
-    black_score = territory.num_black_territory + territory.num_black_stones
-    white_score = territory.num_white_territory + territory.num_white_stones
-    return GameResult(black_score, white_score, komi=7.5)
+class ResultCache:
+    # Ограниченный LRU-кэш результатов подсчёта, общий для всех партий и состояний.
+    # Ключ начинается с Zobrist-хэша позиции и размера доски, так что одинаковые позиции делят запись.
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Hashable, object]' = OrderedDict()
+
+    def get(self, key: Hashable):
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+RESULT_CACHE = ResultCache()
+
+
+def _position_key(board) -> Tuple[int, int, int]:
+    return board.zobrist_hash(), board.num_rows, board.num_cols
+
+
+def board_territory(board) -> Territory:
+    # Возвращаемый Territory общий для всех вызовов с той же позицией — его нельзя изменять.
+    key = ('territory',) + _position_key(board)
+    territory = RESULT_CACHE.get(key)
+    if territory is None:
+        territory = board.territory()
+        RESULT_CACHE.put(key, territory)
+    return territory
+
+
+def compute_game_result(game_state, komi: float = DEFAULT_KOMI):
+    board = game_state.board
+    key = ('result',) + _position_key(board) + (komi,)
+    game_result = RESULT_CACHE.get(key)
+    if game_result is None:
+        black_score, white_score = board.area_scores()
+        game_result = GameResult(black_score, white_score, komi=komi)
+        RESULT_CACHE.put(key, game_result)
+    return game_result
@@ -0,0 +1,37 @@
+from typing import Iterable, Optional, Tuple
+
+from core.goboard import Board, GameState
+from core.gotypes import Player, Point
+from core.scoring import ResultCache
+
+__all__ = [
+    'START_STATES',
+    'canonical_stones',
+    'start_state'
+]
+
+# Общие начальные состояния по содержимому позиции. GameState не меняется на месте: apply_move копирует
+# доску, поэтому партии из одной расстановки делят состояние, пока не сделан первый ход.
+START_STATES = ResultCache(maxsize=1024)
+
+
+def canonical_stones(stones: Iterable[Tuple[Point, Player]]) -> Tuple[Tuple[int, int, int], ...]:
+    # Как в SetupState: при повторе точки побеждает последний камень.
+    positions = {(point.row, point.col): color.value for point, color in stones}
+    return tuple(sorted((row, col, color) for (row, col), color in positions.items()))
+
+
+def start_state(num_rows, num_cols, stones: Iterable[Tuple[Point, Player]],
+                board_cls: Optional[type] = None) -> GameState:
+    board_cls = board_cls or Board
+    canonical = canonical_stones(stones)
+    key = (board_cls.__name__, num_rows, num_cols, canonical)
+    state = START_STATES.get(key)
+    if state is None:
+        try:
+            state = GameState.from_position([(Point(row, col), Player(color)) for row, col, color in canonical],
+                                            board_cls=board_cls, num_rows=num_rows, num_cols=num_cols)
+        except ValueError as e:
+            raise ValueError(f"Invalid initial setup: {e}") from e
+        START_STATES.put(key, state)
+    return state
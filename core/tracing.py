@@ -0,0 +1,148 @@
+import contextlib
+import contextvars
+import logging
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Union
+
+__all__ = [
+    'CATEGORIES',
+    'TraceRecord',
+    'RingBufferSink',
+    'Tracer',
+    'tracer',
+    'configure',
+    'configure_from_env',
+    'game_context',
+    'sink'
+]
+
+# board — установка камней и строки, captures — снятие групп, state — переходы GameState, api — обработчики.
+CATEGORIES = ('board', 'captures', 'state', 'api')
+
+DEFAULT_BUFFER_SIZE = 1000
+
+
+class TraceRecord(NamedTuple):
+    timestamp: float
+    game_id: Optional[str]
+    category: str
+    level: int
+    message: str
+
+
+class RingBufferSink:
+    # Последние записи трассировки одной выбранной партии.
+    def __init__(self, game_id: str, capacity: int = DEFAULT_BUFFER_SIZE):
+        self.game_id = game_id
+        self.records: Deque[TraceRecord] = deque(maxlen=capacity)
+
+    def record(self, record: TraceRecord):
+        self.records.append(record)
+
+    def snapshot(self) -> List[TraceRecord]:
+        return list(self.records)
+
+    def clear(self):
+        self.records.clear()
+
+
+_current_game: contextvars.ContextVar = contextvars.ContextVar('go_trace_game', default=None)
+_tracers: Dict[str, 'Tracer'] = {}
+_level: Optional[int] = None
+_categories = frozenset(CATEGORIES)
+_sink: Optional[RingBufferSink] = None
+
+
+class Tracer:
+    # Флаги уровней пересчитываются в configure(); вызывающий код проверяет атрибут до форматирования:
+    #     if _trace.debug_enabled: _trace.debug("Placing %s at %s", player, point)
+    # Аргументы подставляются через %, и только если запись действительно уходит в приёмник.
+    __slots__ = ('category', 'logger', 'debug_enabled', 'info_enabled')
+
+    def __init__(self, category: str):
+        self.category = category
+        self.logger = logging.getLogger(f"core.trace.{category}")
+        self.debug_enabled = False
+        self.info_enabled = False
+
+    def _apply(self):
+        enabled = _level is not None and self.category in _categories
+        self.debug_enabled = enabled and _level <= logging.DEBUG
+        self.info_enabled = enabled and _level <= logging.INFO
+
+    def debug(self, message: str, *args):
+        self._emit(logging.DEBUG, message, args)
+
+    def info(self, message: str, *args):
+        self._emit(logging.INFO, message, args)
+
+    def _emit(self, level: int, message: str, args):
+        sink = _sink
+        if sink is None:
+            self.logger.log(level, message, *args)
+            return
+        game_id = _current_game.get()
+        if game_id == sink.game_id:
+            sink.record(TraceRecord(time.time(), game_id, self.category, level, message % args if args else message))
+
+
+def tracer(category: str) -> Tracer:
+    if category not in CATEGORIES:
+        raise ValueError(f"Unknown trace category: {category}")
+    category_tracer = _tracers.get(category)
+    if category_tracer is None:
+        category_tracer = Tracer(category)
+        category_tracer._apply()
+        _tracers[category] = category_tracer
+    return category_tracer
+
+
+def configure(level: Optional[Union[int, str]] = None,
+              categories: Optional[Iterable[str]] = None,
+              game_id: Optional[str] = None,
+              buffer_size: int = DEFAULT_BUFFER_SIZE) -> Optional[RingBufferSink]:
+    # level=None выключает трассировку целиком. С game_id записи идут не в logging, а в кольцевой буфер
+    # только этой партии.
+    global _level, _categories, _sink
+    if isinstance(level, str):
+        level_name = level.upper()
+        if level_name not in ('DEBUG', 'INFO'):
+            raise ValueError(f"Unsupported trace level: {level}")
+        level = logging.getLevelName(level_name)
+    selected = frozenset(CATEGORIES if categories is None else categories)
+    unknown = selected - set(CATEGORIES)
+    if unknown:
+        raise ValueError(f"Unknown trace categories: {sorted(unknown)}")
+    _level = level
+    _categories = selected
+    _sink = RingBufferSink(game_id, buffer_size) if game_id is not None and level is not None else None
+    for category_tracer in _tracers.values():
+        category_tracer._apply()
+    return _sink
+
+
+def configure_from_env(environ: Mapping[str, str] = os.environ) -> Optional[RingBufferSink]:
+    # GO_TRACE_LEVEL=DEBUG|INFO, GO_TRACE_CATEGORIES=board,captures, GO_TRACE_GAME=<game_id>, GO_TRACE_BUFFER=<n>
+    categories = environ.get('GO_TRACE_CATEGORIES')
+    return configure(level=environ.get('GO_TRACE_LEVEL') or None,
+                     categories=[c.strip() for c in categories.split(',') if c.strip()] if categories else None,
+                     game_id=environ.get('GO_TRACE_GAME') or None,
+                     buffer_size=int(environ.get('GO_TRACE_BUFFER', DEFAULT_BUFFER_SIZE)))
+
+
+@contextlib.contextmanager
+def game_context(game_id: Optional[str]) -> Iterator[None]:
+    token = _current_game.set(game_id)
+    try:
+        yield
+    finally:
+        _current_game.reset(token)
+
+
+def sink() -> Optional[RingBufferSink]:
+    return _sink
+
+
+configure_from_env()
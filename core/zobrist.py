@@ -1,730 +1,125 @@
-from core.gotypes import Player, Point
+from typing import Iterable, List, Optional
 
-__all__ = ['HASH_CODE', 'EMPTY_BOARD']
+import numpy as np
 
-HASH_CODE = {
-    (Point(row=1, col=1), Player.black): 3255002324548574262,
-    (Point(row=1, col=1), Player.white): 1555575255651675767,
-    (Point(row=1, col=2), Player.black): 2770073200229668584,
-    (Point(row=1, col=2), Player.white): 1317035452033387213,
-    (Point(row=1, col=3), Player.black): 8521096880008174534,
-    (Point(row=1, col=3), Player.white): 5734326887511537792,
-    (Point(row=1, col=4), Player.black): 4048205953836653028,
-    (Point(row=1, col=4), Player.white): 3881966577910540082,
-    (Point(row=1, col=5), Player.black): 29418125183391521,
-    (Point(row=1, col=5), Player.white): 8818664305530805469,
-    (Point(row=1, col=6), Player.black): 4837037592160913954,
-    (Point(row=1, col=6), Player.white): 7248740819007994928,
-    (Point(row=1, col=7), Player.black): 7983134263980565601,
-    (Point(row=1, col=7), Player.white): 1541697146297062250,
-    (Point(row=1, col=8), Player.black): 1161508356692505009,
-    (Point(row=1, col=8), Player.white): 5019784963417952262,
-    (Point(row=1, col=9), Player.black): 4595964179889434928,
-    (Point(row=1, col=9), Player.white): 591479228725320457,
-    (Point(row=1, col=10), Player.black): 5335064598357370486,
-    (Point(row=1, col=10), Player.white): 3865571964582087202,
-    (Point(row=1, col=11), Player.black): 8988575742805886821,
-    (Point(row=1, col=11), Player.white): 3464197465157783230,
-    (Point(row=1, col=12), Player.black): 8974051063755926558,
-    (Point(row=1, col=12), Player.white): 9100751312982311316,
-    (Point(row=1, col=13), Player.black): 3883785610404190298,
-    (Point(row=1, col=13), Player.white): 7594177412753109440,
-    (Point(row=1, col=14), Player.black): 4292764639984451195,
-    (Point(row=1, col=14), Player.white): 935505105175641386,
-    (Point(row=1, col=15), Player.black): 2247772273957413390,
-    (Point(row=1, col=15), Player.white): 5996792413586597173,
-    (Point(row=1, col=16), Player.black): 95529230666657018,
-    (Point(row=1, col=16), Player.white): 1581690971080616421,
-    (Point(row=1, col=17), Player.black): 6245238097385495038,
-    (Point(row=1, col=17), Player.white): 2850747323546841332,
-    (Point(row=1, col=18), Player.black): 8817424609864819196,
-    (Point(row=1, col=18), Player.white): 1134090018433784970,
-    (Point(row=1, col=19), Player.black): 347687558452554920,
-    (Point(row=1, col=19), Player.white): 44060543768361279,
-    (Point(row=2, col=1), Player.black): 4017204042629663382,
-    (Point(row=2, col=1), Player.white): 7530117914791953885,
-    (Point(row=2, col=2), Player.black): 9222579419439954519,
-    (Point(row=2, col=2), Player.white): 8194408826778083568,
-    (Point(row=2, col=3), Player.black): 3118587388116767449,
-    (Point(row=2, col=3), Player.white): 4156416654833454956,
-    (Point(row=2, col=4), Player.black): 8449310637950487151,
-    (Point(row=2, col=4), Player.white): 4092009883331671198,
-    (Point(row=2, col=5), Player.black): 6891455686669424802,
-    (Point(row=2, col=5), Player.white): 2334302608876622351,
-    (Point(row=2, col=6), Player.black): 3438339860470745649,
-    (Point(row=2, col=6), Player.white): 7845726245130957010,
-    (Point(row=2, col=7), Player.black): 8642074049837525219,
-    (Point(row=2, col=7), Player.white): 4340687294097532185,
-    (Point(row=2, col=8), Player.black): 3786633128338590516,
-    (Point(row=2, col=8), Player.white): 2147961219836905293,
-    (Point(row=2, col=9), Player.black): 5944417133867262458,
-    (Point(row=2, col=9), Player.white): 5425800823374891906,
-    (Point(row=2, col=10), Player.black): 8313066295469964098,
-    (Point(row=2, col=10), Player.white): 4458297019667969805,
-    (Point(row=2, col=11), Player.black): 7996358378164950718,
-    (Point(row=2, col=11), Player.white): 3752683123025801762,
-    (Point(row=2, col=12), Player.black): 474476053126027006,
-    (Point(row=2, col=12), Player.white): 937750424611433520,
-    (Point(row=2, col=13), Player.black): 5891073666087957793,
-    (Point(row=2, col=13), Player.white): 6861842692239548239,
-    (Point(row=2, col=14), Player.black): 3495003499645602014,
-    (Point(row=2, col=14), Player.white): 7952489230254796849,
-    (Point(row=2, col=15), Player.black): 7188744529296331103,
-    (Point(row=2, col=15), Player.white): 1784054942863941304,
-    (Point(row=2, col=16), Player.black): 1147936904478054097,
-    (Point(row=2, col=16), Player.white): 7897683932074879454,
-    (Point(row=2, col=17), Player.black): 8164693024811769359,
-    (Point(row=2, col=17), Player.white): 1024948677084490477,
-    (Point(row=2, col=18), Player.black): 8131677897464290105,
-    (Point(row=2, col=18), Player.white): 4774610815815032322,
-    (Point(row=2, col=19), Player.black): 8222173987922983463,
-    (Point(row=2, col=19), Player.white): 932052069842709072,
-    (Point(row=3, col=1), Player.black): 8280280753684955345,
-    (Point(row=3, col=1), Player.white): 5603556757028373234,
-    (Point(row=3, col=2), Player.black): 1149002988989887762,
-    (Point(row=3, col=2), Player.white): 7760997488758214585,
-    (Point(row=3, col=3), Player.black): 8401721328617219116,
-    (Point(row=3, col=3), Player.white): 4256726194373919927,
-    (Point(row=3, col=4), Player.black): 8542736581939892169,
-    (Point(row=3, col=4), Player.white): 4444400164263208590,
-    (Point(row=3, col=5), Player.black): 5646827560344700140,
-    (Point(row=3, col=5), Player.white): 2648412046980949838,
-    (Point(row=3, col=6), Player.black): 8731435624838163186,
-    (Point(row=3, col=6), Player.white): 1198174773642149639,
-    (Point(row=3, col=7), Player.black): 2443945445235186216,
-    (Point(row=3, col=7), Player.white): 1615144934243177378,
-    (Point(row=3, col=8), Player.black): 6525638974646516312,
-    (Point(row=3, col=8), Player.white): 7867864637276797599,
-    (Point(row=3, col=9), Player.black): 2561135906097624360,
-    (Point(row=3, col=9), Player.white): 3835343806887870603,
-    (Point(row=3, col=10), Player.black): 6562970852283974756,
-    (Point(row=3, col=10), Player.white): 5447757418306695809,
-    (Point(row=3, col=11), Player.black): 1831767871973120860,
-    (Point(row=3, col=11), Player.white): 390910441525960361,
-    (Point(row=3, col=12), Player.black): 8174320641756258315,
-    (Point(row=3, col=12), Player.white): 4236729827482846674,
-    (Point(row=3, col=13), Player.black): 6477882902820617197,
-    (Point(row=3, col=13), Player.white): 8235845152809114434,
-    (Point(row=3, col=14), Player.black): 1687882563112127024,
-    (Point(row=3, col=14), Player.white): 4134733152577843192,
-    (Point(row=3, col=15), Player.black): 7510689074488568645,
-    (Point(row=3, col=15), Player.white): 7776325979825241683,
-    (Point(row=3, col=16), Player.black): 2309311629252520765,
-    (Point(row=3, col=16), Player.white): 2185040980229824541,
-    (Point(row=3, col=17), Player.black): 5947252931607526009,
-    (Point(row=3, col=17), Player.white): 2246325964141116467,
-    (Point(row=3, col=18), Player.black): 167691428268514120,
-    (Point(row=3, col=18), Player.white): 6393995224276389981,
-    (Point(row=3, col=19), Player.black): 8002915702886686102,
-    (Point(row=3, col=19), Player.white): 6321711063663650466,
-    (Point(row=4, col=1), Player.black): 1670932139830266873,
-    (Point(row=4, col=1), Player.white): 2155178068769663889,
-    (Point(row=4, col=2), Player.black): 5668135414712858466,
-    (Point(row=4, col=2), Player.white): 2925892689590888793,
-    (Point(row=4, col=3), Player.black): 3953075141680904809,
-    (Point(row=4, col=3), Player.white): 3436501286457950482,
-    (Point(row=4, col=4), Player.black): 5622739383959532946,
-    (Point(row=4, col=4), Player.white): 3231671282159516344,
-    (Point(row=4, col=5), Player.black): 4777023377384204092,
-    (Point(row=4, col=5), Player.white): 3297327676933272861,
-    (Point(row=4, col=6), Player.black): 5880993000879338211,
-    (Point(row=4, col=6), Player.white): 3213166726072590696,
-    (Point(row=4, col=7), Player.black): 1614615393486095044,
-    (Point(row=4, col=7), Player.white): 4779908533856041036,
-    (Point(row=4, col=8), Player.black): 7977249039765093558,
-    (Point(row=4, col=8), Player.white): 3122842761617539497,
-    (Point(row=4, col=9), Player.black): 1429502940657620114,
-    (Point(row=4, col=9), Player.white): 4630339604355768345,
-    (Point(row=4, col=10), Player.black): 1784465239955726254,
-    (Point(row=4, col=10), Player.white): 2367387416486867959,
-    (Point(row=4, col=11), Player.black): 1225673103539199037,
-    (Point(row=4, col=11), Player.white): 8774048259039263307,
-    (Point(row=4, col=12), Player.black): 6014522977488622536,
-    (Point(row=4, col=12), Player.white): 8193147287202278219,
-    (Point(row=4, col=13), Player.black): 2115881548265666012,
-    (Point(row=4, col=13), Player.white): 3758622733891940201,
-    (Point(row=4, col=14), Player.black): 1199621543328574471,
-    (Point(row=4, col=14), Player.white): 5645386280693277776,
-    (Point(row=4, col=15), Player.black): 4163729368835238205,
-    (Point(row=4, col=15), Player.white): 2610118952179756977,
-    (Point(row=4, col=16), Player.black): 408778072683245822,
-    (Point(row=4, col=16), Player.white): 7166208246147112818,
-    (Point(row=4, col=17), Player.black): 5095259033072142199,
-    (Point(row=4, col=17), Player.white): 168793486522779954,
-    (Point(row=4, col=18), Player.black): 261935694642000712,
-    (Point(row=4, col=18), Player.white): 7383399263276854805,
-    (Point(row=4, col=19), Player.black): 7818329108707122965,
-    (Point(row=4, col=19), Player.white): 2881375913792736960,
-    (Point(row=5, col=1), Player.black): 4179322578202000547,
-    (Point(row=5, col=1), Player.white): 2427538940155528495,
-    (Point(row=5, col=2), Player.black): 949971139018367178,
-    (Point(row=5, col=2), Player.white): 6882421966183481387,
-    (Point(row=5, col=3), Player.black): 6941721756536807106,
-    (Point(row=5, col=3), Player.white): 7465477634597004425,
-    (Point(row=5, col=4), Player.black): 6319456442149765222,
-    (Point(row=5, col=4), Player.white): 3749561267239198050,
-    (Point(row=5, col=5), Player.black): 2359411641930143708,
-    (Point(row=5, col=5), Player.white): 137720199996254415,
-    (Point(row=5, col=6), Player.black): 5699334029208124500,
-    (Point(row=5, col=6), Player.white): 6003665294620628971,
-    (Point(row=5, col=7), Player.black): 3794185519521019662,
-    (Point(row=5, col=7), Player.white): 581627544543318918,
-    (Point(row=5, col=8), Player.black): 3719730469468560052,
-    (Point(row=5, col=8), Player.white): 4006444584425907950,
-    (Point(row=5, col=9), Player.black): 513530488550831408,
-    (Point(row=5, col=9), Player.white): 7809457283352204876,
-    (Point(row=5, col=10), Player.black): 3605693798493228366,
-    (Point(row=5, col=10), Player.white): 2264749863671217082,
-    (Point(row=5, col=11), Player.black): 1230357597034619140,
-    (Point(row=5, col=11), Player.white): 2833147665020959930,
-    (Point(row=5, col=12), Player.black): 6336537961050631685,
-    (Point(row=5, col=12), Player.white): 5984486180627940829,
-    (Point(row=5, col=13), Player.black): 1798374376100148343,
-    (Point(row=5, col=13), Player.white): 527132053980798317,
-    (Point(row=5, col=14), Player.black): 2284711655145821698,
-    (Point(row=5, col=14), Player.white): 8964206748710717582,
-    (Point(row=5, col=15), Player.black): 720104529945732764,
-    (Point(row=5, col=15), Player.white): 6356454139793802960,
-    (Point(row=5, col=16), Player.black): 7028604164169420761,
-    (Point(row=5, col=16), Player.white): 5029808601328770534,
-    (Point(row=5, col=17), Player.black): 8715411174486858331,
-    (Point(row=5, col=17), Player.white): 329539461129758244,
-    (Point(row=5, col=18), Player.black): 5296043089465230456,
-    (Point(row=5, col=18), Player.white): 3810099821387192658,
-    (Point(row=5, col=19), Player.black): 7249413346476322265,
-    (Point(row=5, col=19), Player.white): 6302925093983820187,
-    (Point(row=6, col=1), Player.black): 525155530146875997,
-    (Point(row=6, col=1), Player.white): 5795747613464544955,
-    (Point(row=6, col=2), Player.black): 8241988883799907547,
-    (Point(row=6, col=2), Player.white): 2994524499784170299,
-    (Point(row=6, col=3), Player.black): 8711946943709204610,
-    (Point(row=6, col=3), Player.white): 4012591925030026585,
-    (Point(row=6, col=4), Player.black): 3181485206335543795,
-    (Point(row=6, col=4), Player.white): 3760708151737236172,
-    (Point(row=6, col=5), Player.black): 7622880000810823897,
-    (Point(row=6, col=5), Player.white): 4553595742389273913,
-    (Point(row=6, col=6), Player.black): 9010216406006118408,
-    (Point(row=6, col=6), Player.white): 548104624002295525,
-    (Point(row=6, col=7), Player.black): 7298951093450347026,
-    (Point(row=6, col=7), Player.white): 1760843233189650971,
-    (Point(row=6, col=8), Player.black): 5820014778098540720,
-    (Point(row=6, col=8), Player.white): 7635016653293660949,
-    (Point(row=6, col=9), Player.black): 4776655955991284895,
-    (Point(row=6, col=9), Player.white): 5649373793806004725,
-    (Point(row=6, col=10), Player.black): 3450215114535744033,
-    (Point(row=6, col=10), Player.white): 9058828782980338507,
-    (Point(row=6, col=11), Player.black): 7812479503084597401,
-    (Point(row=6, col=11), Player.white): 5796353826490696092,
-    (Point(row=6, col=12), Player.black): 4943011128985598253,
-    (Point(row=6, col=12), Player.white): 2613096056541123234,
-    (Point(row=6, col=13), Player.black): 1510858879288763904,
-    (Point(row=6, col=13), Player.white): 3174145948668698582,
-    (Point(row=6, col=14), Player.black): 4923377705561232707,
-    (Point(row=6, col=14), Player.white): 7369579880025672728,
-    (Point(row=6, col=15), Player.black): 8407120200016917159,
-    (Point(row=6, col=15), Player.white): 6746418011825497237,
-    (Point(row=6, col=16), Player.black): 2711274529274857732,
-    (Point(row=6, col=16), Player.white): 5336895410087286708,
-    (Point(row=6, col=17), Player.black): 5160688934942403052,
-    (Point(row=6, col=17), Player.white): 8707837543883267978,
-    (Point(row=6, col=18), Player.black): 1201593988631366224,
-    (Point(row=6, col=18), Player.white): 7286034633786851603,
-    (Point(row=6, col=19), Player.black): 2713948255254755564,
-    (Point(row=6, col=19), Player.white): 2901572683193153221,
-    (Point(row=7, col=1), Player.black): 2647782844658469096,
-    (Point(row=7, col=1), Player.white): 363875156239567863,
-    (Point(row=7, col=2), Player.black): 5174248643642500279,
-    (Point(row=7, col=2), Player.white): 2708298321387937889,
-    (Point(row=7, col=3), Player.black): 9036040459702742301,
-    (Point(row=7, col=3), Player.white): 6026731427324415345,
-    (Point(row=7, col=4), Player.black): 5534749069885216588,
-    (Point(row=7, col=4), Player.white): 774023722022599881,
-    (Point(row=7, col=5), Player.black): 7287931507161059617,
-    (Point(row=7, col=5), Player.white): 3489089144681037234,
-    (Point(row=7, col=6), Player.black): 7037674445657240292,
-    (Point(row=7, col=6), Player.white): 7901714464833406742,
-    (Point(row=7, col=7), Player.black): 1686062916513078874,
-    (Point(row=7, col=7), Player.white): 5988029534362718120,
-    (Point(row=7, col=8), Player.black): 3464903159558066710,
-    (Point(row=7, col=8), Player.white): 5307143604781101825,
-    (Point(row=7, col=9), Player.black): 697486343346749849,
-    (Point(row=7, col=9), Player.white): 6415204008468266158,
-    (Point(row=7, col=10), Player.black): 6259490829652362910,
-    (Point(row=7, col=10), Player.white): 9011512682326808677,
-    (Point(row=7, col=11), Player.black): 8189467561078071232,
-    (Point(row=7, col=11), Player.white): 7161251670322480208,
-    (Point(row=7, col=12), Player.black): 4398240286718266692,
-    (Point(row=7, col=12), Player.white): 5702141421730136765,
-    (Point(row=7, col=13), Player.black): 6118549841018147589,
-    (Point(row=7, col=13), Player.white): 4033425965083032410,
-    (Point(row=7, col=14), Player.black): 4985865600320323030,
-    (Point(row=7, col=14), Player.white): 7574315495334855920,
-    (Point(row=7, col=15), Player.black): 1176674097529155428,
-    (Point(row=7, col=15), Player.white): 8412144433246956009,
-    (Point(row=7, col=16), Player.black): 3555232080688468246,
-    (Point(row=7, col=16), Player.white): 7130675101647880260,
-    (Point(row=7, col=17), Player.black): 8986548781926839383,
-    (Point(row=7, col=17), Player.white): 4899040231940804005,
-    (Point(row=7, col=18), Player.black): 455690893773663107,
-    (Point(row=7, col=18), Player.white): 6337128767923022847,
-    (Point(row=7, col=19), Player.black): 5482787620682203566,
-    (Point(row=7, col=19), Player.white): 8646297157243240309,
-    (Point(row=8, col=1), Player.black): 7953313859334581192,
-    (Point(row=8, col=1), Player.white): 1102158970566266477,
-    (Point(row=8, col=2), Player.black): 2662570525934729208,
-    (Point(row=8, col=2), Player.white): 408982077389550216,
-    (Point(row=8, col=3), Player.black): 5283533888853196856,
-    (Point(row=8, col=3), Player.white): 5975785969486645428,
-    (Point(row=8, col=4), Player.black): 6429099207871334964,
-    (Point(row=8, col=4), Player.white): 1874652761832704500,
-    (Point(row=8, col=5), Player.black): 1396843340644895049,
-    (Point(row=8, col=5), Player.white): 5964943941188229308,
-    (Point(row=8, col=6), Player.black): 1277074373767037381,
-    (Point(row=8, col=6), Player.white): 3867651840797258303,
-    (Point(row=8, col=7), Player.black): 4782797595702218271,
-    (Point(row=8, col=7), Player.white): 2064664642716220548,
-    (Point(row=8, col=8), Player.black): 598430487847666873,
-    (Point(row=8, col=8), Player.white): 5985411146482557955,
-    (Point(row=8, col=9), Player.black): 322549688260105593,
-    (Point(row=8, col=9), Player.white): 7775330332384691822,
-    (Point(row=8, col=10), Player.black): 6645795411994847556,
-    (Point(row=8, col=10), Player.white): 8751093472288792347,
-    (Point(row=8, col=11), Player.black): 8332994699031623520,
-    (Point(row=8, col=11), Player.white): 4629479999543468095,
-    (Point(row=8, col=12), Player.black): 3618310638243019985,
-    (Point(row=8, col=12), Player.white): 2558680486321110848,
-    (Point(row=8, col=13), Player.black): 7037014198215672637,
-    (Point(row=8, col=13), Player.white): 3108086905795947765,
-    (Point(row=8, col=14), Player.black): 7487350232320204368,
-    (Point(row=8, col=14), Player.white): 3981615491096209350,
-    (Point(row=8, col=15), Player.black): 543290725852515550,
-    (Point(row=8, col=15), Player.white): 1382319703595143323,
-    (Point(row=8, col=16), Player.black): 2401961962153520407,
-    (Point(row=8, col=16), Player.white): 5900084740707143325,
-    (Point(row=8, col=17), Player.black): 2609380271704501151,
-    (Point(row=8, col=17), Player.white): 8657501538759088487,
-    (Point(row=8, col=18), Player.black): 5033961445635018943,
-    (Point(row=8, col=18), Player.white): 7159188886562285578,
-    (Point(row=8, col=19), Player.black): 6809507774466969099,
-    (Point(row=8, col=19), Player.white): 4284129220755433495,
-    (Point(row=9, col=1), Player.black): 3197085412347016823,
-    (Point(row=9, col=1), Player.white): 2449905101532605626,
-    (Point(row=9, col=2), Player.black): 4239731267190849392,
-    (Point(row=9, col=2), Player.white): 2226163949584996582,
-    (Point(row=9, col=3), Player.black): 8860600676134569649,
-    (Point(row=9, col=3), Player.white): 2850370989813667513,
-    (Point(row=9, col=4), Player.black): 5158321598201906592,
-    (Point(row=9, col=4), Player.white): 5432066875361101889,
-    (Point(row=9, col=5), Player.black): 1807974803811379205,
-    (Point(row=9, col=5), Player.white): 1038935547157125657,
-    (Point(row=9, col=6), Player.black): 5173463712383622083,
-    (Point(row=9, col=6), Player.white): 374943746268081886,
-    (Point(row=9, col=7), Player.black): 6437051143604532778,
-    (Point(row=9, col=7), Player.white): 1069202491287156483,
-    (Point(row=9, col=8), Player.black): 80528211486190186,
-    (Point(row=9, col=8), Player.white): 8992317855766072873,
-    (Point(row=9, col=9), Player.black): 2972463578644521882,
-    (Point(row=9, col=9), Player.white): 4688814637160913945,
-    (Point(row=9, col=10), Player.black): 8809727469782324346,
-    (Point(row=9, col=10), Player.white): 8012306186313812486,
-    (Point(row=9, col=11), Player.black): 1803259916889686529,
-    (Point(row=9, col=11), Player.white): 2391277169793043816,
-    (Point(row=9, col=12), Player.black): 4542823823923221915,
-    (Point(row=9, col=12), Player.white): 4247776095263966035,
-    (Point(row=9, col=13), Player.black): 8583284732062237457,
-    (Point(row=9, col=13), Player.white): 3169620454753445084,
-    (Point(row=9, col=14), Player.black): 5231067779711548760,
-    (Point(row=9, col=14), Player.white): 8657646663661896653,
-    (Point(row=9, col=15), Player.black): 8016045777741909394,
-    (Point(row=9, col=15), Player.white): 2436629676238661146,
-    (Point(row=9, col=16), Player.black): 2514904533934909904,
-    (Point(row=9, col=16), Player.white): 7522183424562970062,
-    (Point(row=9, col=17), Player.black): 6032752414789283684,
-    (Point(row=9, col=17), Player.white): 6743476236392799517,
-    (Point(row=9, col=18), Player.black): 3252626313307656495,
-    (Point(row=9, col=18), Player.white): 5878788369215237182,
-    (Point(row=9, col=19), Player.black): 1851950745288417450,
-    (Point(row=9, col=19), Player.white): 370236410720938186,
-    (Point(row=10, col=1), Player.black): 2624301910612826199,
-    (Point(row=10, col=1), Player.white): 2385975777822503294,
-    (Point(row=10, col=2), Player.black): 390966751843314585,
-    (Point(row=10, col=2), Player.white): 3478398610606256262,
-    (Point(row=10, col=3), Player.black): 7362551447015030319,
-    (Point(row=10, col=3), Player.white): 8814885185293892106,
-    (Point(row=10, col=4), Player.black): 2224241053367352738,
-    (Point(row=10, col=4), Player.white): 2181485209337472222,
-    (Point(row=10, col=5), Player.black): 8036763379013125289,
-    (Point(row=10, col=5), Player.white): 8816705923066233516,
-    (Point(row=10, col=6), Player.black): 1500307783872848159,
-    (Point(row=10, col=6), Player.white): 6963954326860006568,
-    (Point(row=10, col=7), Player.black): 3828734292629101820,
-    (Point(row=10, col=7), Player.white): 6788397873645354923,
-    (Point(row=10, col=8), Player.black): 2782346555068569704,
-    (Point(row=10, col=8), Player.white): 593535646420622560,
-    (Point(row=10, col=9), Player.black): 5768637534683121621,
-    (Point(row=10, col=9), Player.white): 421173264216846613,
-    (Point(row=10, col=10), Player.black): 7369244746968302619,
-    (Point(row=10, col=10), Player.white): 5828859924855500440,
-    (Point(row=10, col=11), Player.black): 4300331394978045969,
-    (Point(row=10, col=11), Player.white): 166453718287439685,
-    (Point(row=10, col=12), Player.black): 1497604494927955492,
-    (Point(row=10, col=12), Player.white): 2066736293659763383,
-    (Point(row=10, col=13), Player.black): 4813332562115630205,
-    (Point(row=10, col=13), Player.white): 1688168735345581911,
-    (Point(row=10, col=14), Player.black): 7776849143449007092,
-    (Point(row=10, col=14), Player.white): 6271994880683566632,
-    (Point(row=10, col=15), Player.black): 567287216062782365,
-    (Point(row=10, col=15), Player.white): 9222644363511513911,
-    (Point(row=10, col=16), Player.black): 6384183699214228580,
-    (Point(row=10, col=16), Player.white): 4650689694509940290,
-    (Point(row=10, col=17), Player.black): 4977325893067917816,
-    (Point(row=10, col=17), Player.white): 2233745755535517986,
-    (Point(row=10, col=18), Player.black): 273400656912545883,
-    (Point(row=10, col=18), Player.white): 4285098467440346694,
-    (Point(row=10, col=19), Player.black): 7224646197576023297,
-    (Point(row=10, col=19), Player.white): 8502866924462124426,
-    (Point(row=11, col=1), Player.black): 1403036813605745113,
-    (Point(row=11, col=1), Player.white): 4215825240294202960,
-    (Point(row=11, col=2), Player.black): 101425577968539136,
-    (Point(row=11, col=2), Player.white): 5890182374550290593,
-    (Point(row=11, col=3), Player.black): 3965335601329760194,
-    (Point(row=11, col=3), Player.white): 7455289298899002300,
-    (Point(row=11, col=4), Player.black): 1783714501093542400,
-    (Point(row=11, col=4), Player.white): 5459501680856727064,
-    (Point(row=11, col=5), Player.black): 8720317084156248621,
-    (Point(row=11, col=5), Player.white): 7615206779385143429,
-    (Point(row=11, col=6), Player.black): 1242293638063175982,
-    (Point(row=11, col=6), Player.white): 5291705536829365095,
-    (Point(row=11, col=7), Player.black): 3676607687212853467,
-    (Point(row=11, col=7), Player.white): 4518632342310174958,
-    (Point(row=11, col=8), Player.black): 7515445633973574159,
-    (Point(row=11, col=8), Player.white): 7833043274149163509,
-    (Point(row=11, col=9), Player.black): 8313907001222941838,
-    (Point(row=11, col=9), Player.white): 5585815135298435841,
-    (Point(row=11, col=10), Player.black): 5649494430240472086,
-    (Point(row=11, col=10), Player.white): 3219492631095345956,
-    (Point(row=11, col=11), Player.black): 5860051476381619186,
-    (Point(row=11, col=11), Player.white): 2971232318090514559,
-    (Point(row=11, col=12), Player.black): 8027739159857854736,
-    (Point(row=11, col=12), Player.white): 311438948720567386,
-    (Point(row=11, col=13), Player.black): 1360966053892468784,
-    (Point(row=11, col=13), Player.white): 6212678834309286323,
-    (Point(row=11, col=14), Player.black): 1254318312198665464,
-    (Point(row=11, col=14), Player.white): 467967904253783656,
-    (Point(row=11, col=15), Player.black): 3120436349405789276,
-    (Point(row=11, col=15), Player.white): 1283501227100252464,
-    (Point(row=11, col=16), Player.black): 232028388295396667,
-    (Point(row=11, col=16), Player.white): 8799464987013618004,
-    (Point(row=11, col=17), Player.black): 1979563135405470621,
-    (Point(row=11, col=17), Player.white): 6901786248556564664,
-    (Point(row=11, col=18), Player.black): 5946127187734317706,
-    (Point(row=11, col=18), Player.white): 8894177069449596459,
-    (Point(row=11, col=19), Player.black): 5165741389688546488,
-    (Point(row=11, col=19), Player.white): 1858893487629235660,
-    (Point(row=12, col=1), Player.black): 6809842715212086612,
-    (Point(row=12, col=1), Player.white): 4216989911009692328,
-    (Point(row=12, col=2), Player.black): 6789955158145743705,
-    (Point(row=12, col=2), Player.white): 5102580445850908364,
-    (Point(row=12, col=3), Player.black): 4107276448986705010,
-    (Point(row=12, col=3), Player.white): 5025378414122956995,
-    (Point(row=12, col=4), Player.black): 5477621401083915189,
-    (Point(row=12, col=4), Player.white): 6639646199124652413,
-    (Point(row=12, col=5), Player.black): 7367235633595955118,
-    (Point(row=12, col=5), Player.white): 361236979692559934,
-    (Point(row=12, col=6), Player.black): 2859675909628796499,
-    (Point(row=12, col=6), Player.white): 5977706572284864615,
-    (Point(row=12, col=7), Player.black): 7002145473094096061,
-    (Point(row=12, col=7), Player.white): 2227874915443390659,
-    (Point(row=12, col=8), Player.black): 5981636355949229765,
-    (Point(row=12, col=8), Player.white): 1668362838698637912,
-    (Point(row=12, col=9), Player.black): 8227687632667768026,
-    (Point(row=12, col=9), Player.white): 5835512553473466436,
-    (Point(row=12, col=10), Player.black): 7827497060001686605,
-    (Point(row=12, col=10), Player.white): 1742010520883101222,
-    (Point(row=12, col=11), Player.black): 4815786971993084420,
-    (Point(row=12, col=11), Player.white): 9008950138088959698,
-    (Point(row=12, col=12), Player.black): 4682048378273549415,
-    (Point(row=12, col=12), Player.white): 1072069429514999481,
-    (Point(row=12, col=13), Player.black): 7072064313094915108,
-    (Point(row=12, col=13), Player.white): 2516441526704767182,
-    (Point(row=12, col=14), Player.black): 2562662014015728707,
-    (Point(row=12, col=14), Player.white): 7850493011945896105,
-    (Point(row=12, col=15), Player.black): 4595385042623649153,
-    (Point(row=12, col=15), Player.white): 2941775571779685966,
-    (Point(row=12, col=16), Player.black): 8895965629110858895,
-    (Point(row=12, col=16), Player.white): 6599558186500889557,
-    (Point(row=12, col=17), Player.black): 2451686936300979436,
-    (Point(row=12, col=17), Player.white): 5706584221956460477,
-    (Point(row=12, col=18), Player.black): 6138905333117869428,
-    (Point(row=12, col=18), Player.white): 6537850253977428905,
-    (Point(row=12, col=19), Player.black): 3564776753837426284,
-    (Point(row=12, col=19), Player.white): 3037626984323604995,
-    (Point(row=13, col=1), Player.black): 4579410671520817465,
-    (Point(row=13, col=1), Player.white): 8340845144024766817,
-    (Point(row=13, col=2), Player.black): 4567195029604946870,
-    (Point(row=13, col=2), Player.white): 7534791795585774930,
-    (Point(row=13, col=3), Player.black): 775203592976651345,
-    (Point(row=13, col=3), Player.white): 3483025714713557311,
-    (Point(row=13, col=4), Player.black): 2638942915924065940,
-    (Point(row=13, col=4), Player.white): 4012683736454881505,
-    (Point(row=13, col=5), Player.black): 7126653156199503303,
-    (Point(row=13, col=5), Player.white): 7507696349065221792,
-    (Point(row=13, col=6), Player.black): 783479332682224674,
-    (Point(row=13, col=6), Player.white): 8694354331273212100,
-    (Point(row=13, col=7), Player.black): 1754882306050401645,
-    (Point(row=13, col=7), Player.white): 6712893564234843669,
-    (Point(row=13, col=8), Player.black): 3463823854490855211,
-    (Point(row=13, col=8), Player.white): 7509739483997901737,
-    (Point(row=13, col=9), Player.black): 3225788976307724534,
-    (Point(row=13, col=9), Player.white): 3449418103153101430,
-    (Point(row=13, col=10), Player.black): 5300160341539682054,
-    (Point(row=13, col=10), Player.white): 2405461961093083921,
-    (Point(row=13, col=11), Player.black): 5729604370563688201,
-    (Point(row=13, col=11), Player.white): 8283687513455860054,
-    (Point(row=13, col=12), Player.black): 4566144815604180937,
-    (Point(row=13, col=12), Player.white): 8620747592881468977,
-    (Point(row=13, col=13), Player.black): 7182258555678224864,
-    (Point(row=13, col=13), Player.white): 8384205346635626909,
-    (Point(row=13, col=14), Player.black): 7312204715763301099,
-    (Point(row=13, col=14), Player.white): 4607928661269388903,
-    (Point(row=13, col=15), Player.black): 8545095798459045822,
-    (Point(row=13, col=15), Player.white): 7286211906472617641,
-    (Point(row=13, col=16), Player.black): 1507969913631575017,
-    (Point(row=13, col=16), Player.white): 6010306240218079297,
-    (Point(row=13, col=17), Player.black): 4391773075593769347,
-    (Point(row=13, col=17), Player.white): 6827561475944693831,
-    (Point(row=13, col=18), Player.black): 6009591403896722366,
-    (Point(row=13, col=18), Player.white): 859349608951693052,
-    (Point(row=13, col=19), Player.black): 384457646271398894,
-    (Point(row=13, col=19), Player.white): 1839886352664060770,
-    (Point(row=14, col=1), Player.black): 2977540417224445764,
-    (Point(row=14, col=1), Player.white): 6106986921272678,
-    (Point(row=14, col=2), Player.black): 8689356292110586366,
-    (Point(row=14, col=2), Player.white): 9012153850201261436,
-    (Point(row=14, col=3), Player.black): 2249351551958483326,
-    (Point(row=14, col=3), Player.white): 2014265981328130313,
-    (Point(row=14, col=4), Player.black): 8162765767455859826,
-    (Point(row=14, col=4), Player.white): 4975914998912294081,
-    (Point(row=14, col=5), Player.black): 2438307799125891810,
-    (Point(row=14, col=5), Player.white): 2564269013313788010,
-    (Point(row=14, col=6), Player.black): 4366730590437180046,
-    (Point(row=14, col=6), Player.white): 4934915662451540122,
-    (Point(row=14, col=7), Player.black): 6569752096970739791,
-    (Point(row=14, col=7), Player.white): 3802124336350412481,
-    (Point(row=14, col=8), Player.black): 5797346323904847119,
-    (Point(row=14, col=8), Player.white): 1853501100511234767,
-    (Point(row=14, col=9), Player.black): 2421455848261113288,
-    (Point(row=14, col=9), Player.white): 7568485373723259670,
-    (Point(row=14, col=10), Player.black): 8373786380700677973,
-    (Point(row=14, col=10), Player.white): 8798072693944405174,
-    (Point(row=14, col=11), Player.black): 753684457206020723,
-    (Point(row=14, col=11), Player.white): 4837438625424172399,
-    (Point(row=14, col=12), Player.black): 6249456032578438536,
-    (Point(row=14, col=12), Player.white): 1486349336625278033,
-    (Point(row=14, col=13), Player.black): 8559433020530833221,
-    (Point(row=14, col=13), Player.white): 2803090066945134405,
-    (Point(row=14, col=14), Player.black): 2632489540271692065,
-    (Point(row=14, col=14), Player.white): 8295343899341029666,
-    (Point(row=14, col=15), Player.black): 5202725229789771585,
-    (Point(row=14, col=15), Player.white): 4577686514638598599,
-    (Point(row=14, col=16), Player.black): 5878522342573610548,
-    (Point(row=14, col=16), Player.white): 726887628982927195,
-    (Point(row=14, col=17), Player.black): 3582209036608175566,
-    (Point(row=14, col=17), Player.white): 5388667399160768798,
-    (Point(row=14, col=18), Player.black): 2465314835491905866,
-    (Point(row=14, col=18), Player.white): 3221351957716060436,
-    (Point(row=14, col=19), Player.black): 5087281810161734614,
-    (Point(row=14, col=19), Player.white): 4294880308955090197,
-    (Point(row=15, col=1), Player.black): 7748342957238176533,
-    (Point(row=15, col=1), Player.white): 8908329746854425785,
-    (Point(row=15, col=2), Player.black): 1655543223926425709,
-    (Point(row=15, col=2), Player.white): 142911726618034559,
-    (Point(row=15, col=3), Player.black): 217575144235246944,
-    (Point(row=15, col=3), Player.white): 4279556107637659958,
-    (Point(row=15, col=4), Player.black): 83403849597170126,
-    (Point(row=15, col=4), Player.white): 282617101459131795,
-    (Point(row=15, col=5), Player.black): 3578124331881896427,
-    (Point(row=15, col=5), Player.white): 7601389375720390118,
-    (Point(row=15, col=6), Player.black): 5495202280953229694,
-    (Point(row=15, col=6), Player.white): 3291435697787440814,
-    (Point(row=15, col=7), Player.black): 7500523259524662027,
-    (Point(row=15, col=7), Player.white): 909581273819106420,
-    (Point(row=15, col=8), Player.black): 353283915082508777,
-    (Point(row=15, col=8), Player.white): 542853876134725231,
-    (Point(row=15, col=9), Player.black): 6386851396081907323,
-    (Point(row=15, col=9), Player.white): 2836701617810788985,
-    (Point(row=15, col=10), Player.black): 8332314361148363433,
-    (Point(row=15, col=10), Player.white): 2377016290043837233,
-    (Point(row=15, col=11), Player.black): 5485928009526797032,
-    (Point(row=15, col=11), Player.white): 8558975398480631585,
-    (Point(row=15, col=12), Player.black): 6707056742298724399,
-    (Point(row=15, col=12), Player.white): 234477757731341703,
-    (Point(row=15, col=13), Player.black): 3399562909937802107,
-    (Point(row=15, col=13), Player.white): 8554744640916467733,
-    (Point(row=15, col=14), Player.black): 8111221808310363194,
-    (Point(row=15, col=14), Player.white): 1079708911508509396,
-    (Point(row=15, col=15), Player.black): 2762944082895811211,
-    (Point(row=15, col=15), Player.white): 6465605452086650288,
-    (Point(row=15, col=16), Player.black): 299206863913856916,
-    (Point(row=15, col=16), Player.white): 5836004676209719841,
-    (Point(row=15, col=17), Player.black): 4242254898815403606,
-    (Point(row=15, col=17), Player.white): 7886300423355061247,
-    (Point(row=15, col=18), Player.black): 6146346997938199236,
-    (Point(row=15, col=18), Player.white): 8320725278360438114,
-    (Point(row=15, col=19), Player.black): 8772670206105018279,
-    (Point(row=15, col=19), Player.white): 1542672487012677293,
-    (Point(row=16, col=1), Player.black): 66154788158047120,
-    (Point(row=16, col=1), Player.white): 490708855606530813,
-    (Point(row=16, col=2), Player.black): 7943863860566321735,
-    (Point(row=16, col=2), Player.white): 881002190489357036,
-    (Point(row=16, col=3), Player.black): 2176708665102341463,
-    (Point(row=16, col=3), Player.white): 3861683998223721761,
-    (Point(row=16, col=4), Player.black): 4242119536791042442,
-    (Point(row=16, col=4), Player.white): 7441426287369938700,
-    (Point(row=16, col=5), Player.black): 6998962142190716565,
-    (Point(row=16, col=5), Player.white): 7481174692641292235,
-    (Point(row=16, col=6), Player.black): 7549836954753874819,
-    (Point(row=16, col=6), Player.white): 8934536176455616473,
-    (Point(row=16, col=7), Player.black): 2710946474960826878,
-    (Point(row=16, col=7), Player.white): 7210072167493468896,
-    (Point(row=16, col=8), Player.black): 4879328364717586880,
-    (Point(row=16, col=8), Player.white): 2254471262780021750,
-    (Point(row=16, col=9), Player.black): 6629663274348567654,
-    (Point(row=16, col=9), Player.white): 3307898114692012407,
-    (Point(row=16, col=10), Player.black): 85639509740222259,
-    (Point(row=16, col=10), Player.white): 3500964379919562879,
-    (Point(row=16, col=11), Player.black): 6845418504089743301,
-    (Point(row=16, col=11), Player.white): 908904651565303685,
-    (Point(row=16, col=12), Player.black): 1325129127857334894,
-    (Point(row=16, col=12), Player.white): 8086619859571434587,
-    (Point(row=16, col=13), Player.black): 3422349437925973720,
-    (Point(row=16, col=13), Player.white): 7530716038244757650,
-    (Point(row=16, col=14), Player.black): 2992820715942101017,
-    (Point(row=16, col=14), Player.white): 1518541832498836349,
-    (Point(row=16, col=15), Player.black): 7309145283626545224,
-    (Point(row=16, col=15), Player.white): 7225714062755354533,
-    (Point(row=16, col=16), Player.black): 1411401073228250008,
-    (Point(row=16, col=16), Player.white): 4220996969622180595,
-    (Point(row=16, col=17), Player.black): 644924458406380286,
-    (Point(row=16, col=17), Player.white): 7710441942624323291,
-    (Point(row=16, col=18), Player.black): 4480194352879543233,
-    (Point(row=16, col=18), Player.white): 6503343488898027054,
-    (Point(row=16, col=19), Player.black): 7413471810780307935,
-    (Point(row=16, col=19), Player.white): 8623532631358867488,
-    (Point(row=17, col=1), Player.black): 299569750834596457,
-    (Point(row=17, col=1), Player.white): 8833623184564026626,
-    (Point(row=17, col=2), Player.black): 6041004822477259659,
-    (Point(row=17, col=2), Player.white): 5117518148856953707,
-    (Point(row=17, col=3), Player.black): 705761023730362058,
-    (Point(row=17, col=3), Player.white): 6222975273997188294,
-    (Point(row=17, col=4), Player.black): 9070508635045764285,
-    (Point(row=17, col=4), Player.white): 5164311909923862817,
-    (Point(row=17, col=5), Player.black): 1422928627903282136,
-    (Point(row=17, col=5), Player.white): 1034791157452222101,
-    (Point(row=17, col=6), Player.black): 4721584271008270827,
-    (Point(row=17, col=6), Player.white): 3424816786510804799,
-    (Point(row=17, col=7), Player.black): 7292419840091587462,
-    (Point(row=17, col=7), Player.white): 547362095476721256,
-    (Point(row=17, col=8), Player.black): 6934181312601435739,
-    (Point(row=17, col=8), Player.white): 7544337000650954969,
-    (Point(row=17, col=9), Player.black): 2410477446976328997,
-    (Point(row=17, col=9), Player.white): 8542860877793410695,
-    (Point(row=17, col=10), Player.black): 3847009501503487617,
-    (Point(row=17, col=10), Player.white): 6216692789863342623,
-    (Point(row=17, col=11), Player.black): 3507776408587676047,
-    (Point(row=17, col=11), Player.white): 7841462900428276598,
-    (Point(row=17, col=12), Player.black): 3513291130160069608,
-    (Point(row=17, col=12), Player.white): 6123971532113482569,
-    (Point(row=17, col=13), Player.black): 3414882759130098236,
-    (Point(row=17, col=13), Player.white): 8462511730206566024,
-    (Point(row=17, col=14), Player.black): 8480425912222417178,
-    (Point(row=17, col=14), Player.white): 9053561865425776918,
-    (Point(row=17, col=15), Player.black): 4561119643330879895,
-    (Point(row=17, col=15), Player.white): 5979125161646169111,
-    (Point(row=17, col=16), Player.black): 6241303392498176710,
-    (Point(row=17, col=16), Player.white): 4227771396534980776,
-    (Point(row=17, col=17), Player.black): 4608035609551090394,
-    (Point(row=17, col=17), Player.white): 1695824157366983383,
-    (Point(row=17, col=18), Player.black): 1986978063865240241,
-    (Point(row=17, col=18), Player.white): 338904897959440827,
-    (Point(row=17, col=19), Player.black): 3332337667230083397,
-    (Point(row=17, col=19), Player.white): 6224970816252534344,
-    (Point(row=18, col=1), Player.black): 5838608187026204864,
-    (Point(row=18, col=1), Player.white): 7906118951893228380,
-    (Point(row=18, col=2), Player.black): 8468974599262845914,
-    (Point(row=18, col=2), Player.white): 6388676432831951702,
-    (Point(row=18, col=3), Player.black): 2389722536966927036,
-    (Point(row=18, col=3), Player.white): 9158812860004330463,
-    (Point(row=18, col=4), Player.black): 6513931665833253607,
-    (Point(row=18, col=4), Player.white): 8128227618610570116,
-    (Point(row=18, col=5), Player.black): 3511933711491949323,
-    (Point(row=18, col=5), Player.white): 4711321169047971727,
-    (Point(row=18, col=6), Player.black): 7856843952099722763,
-    (Point(row=18, col=6), Player.white): 4498876180236285664,
-    (Point(row=18, col=7), Player.black): 5565592920586272120,
-    (Point(row=18, col=7), Player.white): 4138773681171826678,
-    (Point(row=18, col=8), Player.black): 6571542890487391902,
-    (Point(row=18, col=8), Player.white): 7425109401012562463,
-    (Point(row=18, col=9), Player.black): 695842202342968610,
-    (Point(row=18, col=9), Player.white): 3334742375380814586,
-    (Point(row=18, col=10), Player.black): 1026546809703872078,
-    (Point(row=18, col=10), Player.white): 3487722502890636456,
-    (Point(row=18, col=11), Player.black): 4534301469928370786,
-    (Point(row=18, col=11), Player.white): 7065635820950589980,
-    (Point(row=18, col=12), Player.black): 8009707815561765393,
-    (Point(row=18, col=12), Player.white): 6701525131972241723,
-    (Point(row=18, col=13), Player.black): 1517174253017015437,
-    (Point(row=18, col=13), Player.white): 263970495254177726,
-    (Point(row=18, col=14), Player.black): 5978686861205086729,
-    (Point(row=18, col=14), Player.white): 8520606353465334814,
-    (Point(row=18, col=15), Player.black): 6160210954490084274,
-    (Point(row=18, col=15), Player.white): 1901847979190374742,
-    (Point(row=18, col=16), Player.black): 6782881017630801423,
-    (Point(row=18, col=16), Player.white): 1329846970529915952,
-    (Point(row=18, col=17), Player.black): 8200663925940564074,
-    (Point(row=18, col=17), Player.white): 5468058972047125954,
-    (Point(row=18, col=18), Player.black): 3366264211552985409,
-    (Point(row=18, col=18), Player.white): 3247940852740962782,
-    (Point(row=18, col=19), Player.black): 4030639093959286485,
-    (Point(row=18, col=19), Player.white): 1323790444272510288,
-    (Point(row=19, col=1), Player.black): 7857889151189409576,
-    (Point(row=19, col=1), Player.white): 1580629859944220460,
-    (Point(row=19, col=2), Player.black): 3065322994802395498,
-    (Point(row=19, col=2), Player.white): 8471213579578672970,
-    (Point(row=19, col=3), Player.black): 7960378750169694622,
-    (Point(row=19, col=3), Player.white): 8000110853658582366,
-    (Point(row=19, col=4), Player.black): 2048062115576388622,
-    (Point(row=19, col=4), Player.white): 7917193424169385162,
-    (Point(row=19, col=5), Player.black): 5125813997777521753,
-    (Point(row=19, col=5), Player.white): 2781066576722452378,
-    (Point(row=19, col=6), Player.black): 8397227870484730589,
-    (Point(row=19, col=6), Player.white): 7751044038436222577,
-    (Point(row=19, col=7), Player.black): 5193033082547810611,
-    (Point(row=19, col=7), Player.white): 1775166524643258040,
-    (Point(row=19, col=8), Player.black): 8495144620444993657,
-    (Point(row=19, col=8), Player.white): 3619879622814778482,
-    (Point(row=19, col=9), Player.black): 870549677583547417,
-    (Point(row=19, col=9), Player.white): 1784979422402727630,
-    (Point(row=19, col=10), Player.black): 5320870574052224855,
-    (Point(row=19, col=10), Player.white): 536450490979720242,
-    (Point(row=19, col=11), Player.black): 1037144638032791332,
-    (Point(row=19, col=11), Player.white): 432546644182942982,
-    (Point(row=19, col=12), Player.black): 3581625978551331328,
-    (Point(row=19, col=12), Player.white): 4793473424856525447,
-    (Point(row=19, col=13), Player.black): 5931680801155483128,
-    (Point(row=19, col=13), Player.white): 236796525664187008,
-    (Point(row=19, col=14), Player.black): 839098199113074481,
-    (Point(row=19, col=14), Player.white): 1575314337797916382,
-    (Point(row=19, col=15), Player.black): 7549796100679542893,
-    (Point(row=19, col=15), Player.white): 3975056319229106036,
-    (Point(row=19, col=16), Player.black): 7731660559229517215,
-    (Point(row=19, col=16), Player.white): 4384449855382529290,
-    (Point(row=19, col=17), Player.black): 2654066839435989379,
-    (Point(row=19, col=17), Player.white): 1771093963567385192,
-    (Point(row=19, col=18), Player.black): 4019375097780130967,
-    (Point(row=19, col=18), Player.white): 5913943477590223528,
-    (Point(row=19, col=19), Player.black): 6797401444844649705,
-    (Point(row=19, col=19), Player.white): 8390750871189034370,
-}
+from core.deterministic_queue import DeterministicQueue, MoveQueue
+from core.gotypes import Player
+from core.random_queue import RandomQueue
 
+__all__ = [
+    'EMPTY_BOARD',
+    'SEED',
+    'SIDE_TO_MOVE',
+    'table',
+    'padded_table',
+    'queue_hash',
+    'pending_hash',
+    'situation_hash'
+]
+
+SEED = 0x5EED_60
 EMPTY_BOARD = 0
+MAX_SIZE = 25
+
+_MASK = (1 << 64) - 1
+_SPLITMIX_GAMMA = 0x9E3779B97F4A7C15
+
+
+def _random_codes(key, shape) -> np.ndarray:
+    rng = np.random.default_rng([SEED, *key])
+    return rng.integers(1, _MASK, size=shape, dtype=np.uint64, endpoint=True)
+
+
+# Коды камней по (row, col, color) одинаковы для досок любого размера до MAX_SIZE.
+_STONE_CODES = _random_codes((0,), (MAX_SIZE + 2, MAX_SIZE + 2, 3))
+_PENDING_OPPONENT_CODES = _random_codes((1,), (MAX_SIZE + 2, MAX_SIZE + 2, 3))
+_PENDING_SELF_CODES = _random_codes((2,), (MAX_SIZE + 2, MAX_SIZE + 2, 3))
+SIDE_TO_MOVE = int(_random_codes((3,), 1)[0])
+
+_KIND_CODES = (_STONE_CODES, _PENDING_OPPONENT_CODES, _PENDING_SELF_CODES)
+_TABLES = {}
+_PADDED_TABLES = {}
+_QUEUE_CODES: List[List[int]] = []
+
+
+def _padded(kind, num_rows, num_cols) -> np.ndarray:
+    key = (kind, num_rows, num_cols)
+    padded = _TABLES.get(key)
+    if padded is None:
+        codes = _KIND_CODES[kind]
+        if num_rows > MAX_SIZE or num_cols > MAX_SIZE:
+            codes = _random_codes(key, (num_rows + 2, num_cols + 2, 3))
+        padded = codes[:num_rows + 2, :num_cols + 2].copy()
+        padded[0, :] = padded[-1, :] = padded[:, 0] = padded[:, -1] = 0
+        padded[:, :, 0] = 0
+        padded = padded.reshape(-1, 3)
+        padded.setflags(write=False)
+        _TABLES[key] = padded
+    return padded
+
+
+def table(num_rows, num_cols) -> np.ndarray:
+    # uint64-коды, индексируемые (индекс с рамкой row * (num_cols + 2) + col, цвет); у рамки и пустоты — 0.
+    return _padded(0, num_rows, num_cols)
+
+
+def padded_table(num_rows, num_cols) -> List[List[int]]:
+    # Те же коды как списки int по цветам (table[color][index]): в чистом Python так быстрее, чем np.uint64.
+    key = (num_rows, num_cols)
+    codes = _PADDED_TABLES.get(key)
+    if codes is None:
+        codes = [column.tolist() for column in table(num_rows, num_cols).T]
+        _PADDED_TABLES[key] = codes
+    return codes
+
+
+def _queue_code(offset: int, player: Player) -> int:
+    while offset >= len(_QUEUE_CODES):
+        block = _random_codes((4, len(_QUEUE_CODES)), (64, 3))
+        _QUEUE_CODES.extend(block.tolist())
+    return _QUEUE_CODES[offset][player.value]
+
+
+def queue_hash(queue: MoveQueue) -> int:
+    if isinstance(queue, DeterministicQueue):
+        # Очередь описывается ближайшим циклом ходов, начиная с текущей позиции.
+        pattern = queue.pattern
+        queue_code = 0
+        for offset in range(len(pattern)):
+            queue_code ^= _queue_code(offset, pattern[(queue.current_index + offset) % len(pattern)])
+        return queue_code
+    if isinstance(queue, RandomQueue):
+        # Будущая последовательность определяется зерном и позицией в ней.
+        mixed = (queue.seed * _SPLITMIX_GAMMA + queue._index) & _MASK
+        mixed = ((mixed ^ (mixed >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+        mixed = ((mixed ^ (mixed >> 27)) * 0x94D049BB133111EB) & _MASK
+        return mixed ^ (mixed >> 31)
+    raise ValueError(f"Unsupported queue type for hashing: {type(queue).__name__}")
+
+
+def pending_hash(num_rows, num_cols, opponent_groups: Iterable, self_group=None) -> int:
+    stride = num_cols + 2
+    pending_code = 0
+    if opponent_groups:
+        codes = _padded(1, num_rows, num_cols)
+        for group in opponent_groups:
+            for stone in group.stones:
+                pending_code ^= int(codes[stone.row * stride + stone.col, group.color.value])
+    if self_group is not None:
+        codes = _padded(2, num_rows, num_cols)
+        for stone in self_group.stones:
+            pending_code ^= int(codes[stone.row * stride + stone.col, self_group.color.value])
+    return pending_code
+
+
+def situation_hash(game_state, player: Player, queue: Optional[MoveQueue] = None) -> int:
+    # Ситуация целиком: камни, очередь хода, положение в очереди и отложенные взятия.
+    board = game_state.board
+    situation_code = board.zobrist_hash()
+    if player == Player.white:
+        situation_code ^= SIDE_TO_MOVE
+    if queue is not None:
+        situation_code ^= queue_hash(queue)
+    situation_code ^= pending_hash(board.num_rows, board.num_cols,
+                                   game_state.pending_opponent_captures, game_state.pending_self_capture)
+    return situation_code
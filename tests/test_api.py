@@ -1,8 +1,17 @@
+import asyncio
+import io
+import json
+import logging
+import pstats
 import pytest
 from fastapi.testclient import TestClient
 import uuid
 
+import api_logging
+import api_metrics
+import api_profiling
 from api import app, active_games
+from core import instrumentation
 from core.gotypes import Point
 
 
@@ -248,3 +257,175 @@ def test_get_history_after_moves(client, started_game):
     assert history[2]["row"] == 1
     assert history[2]["col"] == 1
     assert history[2]["move_number"] == 3
+
+
+def test_start_game_initial_stones_without_liberties(client):
+    stones = [{"row": 1, "col": 1, "color": "white"},
+              {"row": 1, "col": 2, "color": "black"},
+              {"row": 2, "col": 1, "color": "black"}]
+    response = client.post("/start", json={"board_size": 5, "initial_stones": stones})
+    assert response.status_code == 400
+
+
+def test_start_games_share_initial_state(client):
+    stones = [{"row": 3, "col": 3, "color": "black"}, {"row": 4, "col": 4, "color": "white"}]
+    first = client.post("/start", json={"board_size": 5, "initial_stones": stones}).json()["game_id"]
+    second = client.post("/start", json={"board_size": 5, "initial_stones": stones[::-1],
+                                         "queue_pattern": "WB"}).json()["game_id"]
+    initial = active_games[first]["state"]
+    assert active_games[second]["state"] is initial
+
+    response = client.post(f"/game/{first}/play", json={"row": 1, "col": 1})
+    assert response.status_code == 200
+    assert initial.board.get(Point(1, 1)) is None
+    assert active_games[second]["state"].board.get(Point(1, 1)) is None
+    assert active_games[first]["state"].previous_state is initial
+
+
+def test_structured_log_pipeline_writes_json_lines_on_shutdown():
+    stream = io.StringIO()
+    api_logging.setup_logging(stream=stream)
+    active_games.clear()
+    try:
+        with TestClient(app) as c:
+            game_id = c.post("/start", json={}).json()["game_id"]
+            c.post(f"/game/{game_id}/play", json={"row": 1, "col": 1})
+        # Остановка приложения дописывает очередь в поток.
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    finally:
+        api_logging.shutdown_logging()
+        active_games.clear()
+    access = [line for line in lines if line["logger"] == "api.access"]
+    assert [line["endpoint"] for line in access] == ["start_new_game", "play_stone"]
+    assert access[1]["game_id"] == game_id and access[1]["status"] == 200
+    assert all(line["latency_ms"] >= 0 for line in access)
+    assert any(line["logger"] == "api" and line.get("game_id") == game_id for line in lines)
+
+
+def test_sampling_filter_thins_debug_records_per_category():
+    sampler = api_logging.SamplingFilter({"board": 0.25})
+
+    def record(name, level):
+        return logging.LogRecord(name, level, __file__, 0, "message", None, None)
+
+    kept = [sampler.filter(record("core.trace.board", logging.DEBUG)) for _ in range(8)]
+    assert kept.count(True) == 2
+    assert sampler.filter(record("core.trace.board", logging.INFO))
+    assert all(sampler.filter(record("core.trace.captures", logging.DEBUG)) for _ in range(3))
+    assert api_logging.parse_sample_rates("board=0.25, captures=1") == {"board": 0.25, "captures": 1.0}
+    with pytest.raises(ValueError):
+        api_logging.SamplingFilter({"board": 2})
+
+
+def test_engine_stats_endpoint(client):
+    instrumentation.reset()
+    instrumentation.enable()
+    try:
+        game_id = client.post("/start", json={"board_size": 5}).json()["game_id"]
+        client.post(f"/game/{game_id}/play", json={"row": 1, "col": 1})
+        client.get(f"/game/{game_id}/legal_moves")
+        data = client.get("/engine_stats").json()
+    finally:
+        instrumentation.disable()
+        instrumentation.reset()
+    assert data["enabled"]
+    assert data["measurements"]["board.place_stone"]["count"] == 1
+    assert data["measurements"]["state.legal_moves"]["count"] == 1
+
+
+def test_metrics_endpoint_exposes_prometheus_text(client):
+    api_metrics.REQUEST_METRICS.reset()
+    game_id = client.post("/start", json={"board_size": 5, "delayed_capture": True}).json()["game_id"]
+    client.post(f"/game/{game_id}/play", json={"row": 1, "col": 1})
+    client.get(f"/game/{game_id}/legal_moves")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = response.text.splitlines()
+    route = 'method="GET",route="/game/{game_id}/legal_moves"'
+    assert f'go_http_requests_total{{{route},status="200"}} 1' in lines
+    assert f'go_http_request_duration_seconds_bucket{{{route},le="+Inf"}} 1' in lines
+    assert f'go_http_request_duration_seconds_count{{{route}}} 1' in lines
+    assert "go_active_games 1" in lines and "go_moves_in_flight 0" in lines
+    assert 'go_games{queue_type="deterministic",capture_rule="opponent",delayed_capture="true"} 1' in lines
+    assert "go_engine_instrumentation_enabled 0" in lines
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = api_metrics.Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+    assert histogram.cumulative() == [("0.1", 2), ("1.0", 3), ("+Inf", 4)]
+    assert histogram.count == 4 and histogram.total == pytest.approx(3.65)
+
+
+def test_profiling_middleware_writes_profiles_only_when_enabled(client, tmp_path):
+    game_id = client.post("/start", json={"board_size": 9}).json()["game_id"]
+    client.get(f"/game/{game_id}/legal_moves", headers={"X-Go-Profile": "1"})
+    assert api_profiling.settings() is None and list(tmp_path.iterdir()) == []
+    try:
+        api_profiling.configure(directory=str(tmp_path))
+        client.get(f"/game/{game_id}/legal_moves")
+        assert list(tmp_path.iterdir()) == []
+        client.get(f"/game/{game_id}/legal_moves", headers={"X-Go-Profile": "1"})
+        profiles = list(tmp_path.glob("*.prof"))
+        assert len(profiles) == 1
+        assert game_id in profiles[0].name and profiles[0].name.endswith("GET_game_game_id_legal_moves.prof")
+        stats = pstats.Stats(str(profiles[0]))
+        assert any(function == "legal_moves" for _, _, function in stats.stats)
+
+        # Порог задержки: медленные запросы сохраняются, быстрые — нет.
+        api_profiling.configure(directory=str(tmp_path), slow_ms=60_000, output_format="collapsed")
+        client.post(f"/game/{game_id}/play", json={"row": 3, "col": 3})
+        assert list(tmp_path.glob("*.collapsed")) == []
+        # По порогу пишется свёрнутый стек сэмплера даже при формате pstats.
+        api_profiling.configure(directory=str(tmp_path), slow_ms=0)
+        client.post(f"/game/{game_id}/pass")
+        assert len(list(tmp_path.glob("*_c0_*_POST_game_game_id_pass.collapsed"))) == 1
+        with pytest.raises(ValueError):
+            api_profiling.configure(directory=str(tmp_path), output_format="svg")
+    finally:
+        api_profiling.configure()
+
+
+def test_profiling_middleware_profiles_requested_requests_under_load(tmp_path):
+    release = asyncio.Event()
+    entered = []
+
+    async def endpoint(scope, receive, send):
+        entered.append(scope["path"])
+        if scope["path"].startswith("/slow"):
+            await release.wait()
+
+    def http_scope(path, profile):
+        headers = [(b"x-go-profile", b"1")] if profile else []
+        return {"type": "http", "method": "GET", "path": path, "headers": headers}
+
+    async def run():
+        middleware = api_profiling.ProfilingMiddleware(endpoint)
+        # Запрос с заголовком профилируется и при другом запросе в обработке, тот учитывается в _c<n>.
+        slow = asyncio.create_task(middleware(http_scope("/slow", False), None, None))
+        await asyncio.sleep(0)
+        await middleware(http_scope("/busy", True), None, None)
+        release.set()
+        await slow
+
+        # Второй запрос с заголовком ждёт окончания идущего профиля, а не пропускается.
+        release.clear()
+        profiled = asyncio.create_task(middleware(http_scope("/slow_profiled", True), None, None))
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(middleware(http_scope("/waiting", True), None, None))
+        await asyncio.sleep(0)
+        assert entered[-1] == "/slow_profiled"
+        release.set()
+        await asyncio.gather(profiled, waiting)
+
+    try:
+        api_profiling.configure(directory=str(tmp_path))
+        asyncio.run(run())
+        profiles = sorted(path.name.split("ms_", 1)[1] for path in tmp_path.iterdir())
+        assert profiles[:2] == ["c1_nogame_GET_busy.prof", "c1_nogame_GET_slow_profiled.prof"]
+        assert len(profiles) == 3 and profiles[2].endswith("_nogame_GET_waiting.prof")
+        assert entered == ["/slow", "/busy", "/slow_profiled", "/waiting"]
+    finally:
+        api_profiling.configure()
@@ -0,0 +1,375 @@
+import copy
+import random
+
+import pytest
+from core.arrayboard import ArrayBoard
+from core.goboard import Board, GameState, Move, IllegalMoveError
+from core.gotypes import Player, Point
+from core.scoring import evaluate_territory
+from core.setup_mode import SetupState
+
+
+def assert_same_position(board, array_board):
+    assert board.zobrist_hash() == array_board.zobrist_hash()
+    assert board.count_empty_points == array_board.count_empty_points
+    for r in range(1, board.num_rows + 1):
+        for c in range(1, board.num_cols + 1):
+            assert board.get(Point(r, c)) == array_board.get(Point(r, c))
+
+
+def test_arrayboard_init():
+    board = ArrayBoard(9, 9)
+    assert board.num_rows == 9
+    assert board.num_cols == 9
+    assert board.count_empty_points == 81
+    assert not board.is_full()
+    assert board.get(Point(0, 1)) is None
+    assert board.get(Point(10, 10)) is None
+
+
+def test_arrayboard_place_stone_occupied():
+    board = ArrayBoard(5, 5)
+    board.place_stone(Player.black, Point(3, 3))
+    with pytest.raises(IllegalMoveError):
+        board.place_stone(Player.white, Point(3, 3))
+
+
+def test_arrayboard_capture_and_strings():
+    board = ArrayBoard(5, 5)
+    board.place_stone(Player.black, Point(2, 3))
+    board.place_stone(Player.black, Point(3, 2))
+    board.place_stone(Player.black, Point(4, 3))
+    board.place_stone(Player.white, Point(3, 3))
+    captures = board.place_stone(Player.black, Point(3, 4))
+    assert board.get(Point(3, 3)) is None
+    assert len(captures.opponent_groups) == 1
+    string = board.get_go_string(Point(2, 3))
+    assert len(string.stones) == 1
+    assert string.num_liberties == 4
+
+
+def test_arrayboard_deepcopy_is_independent():
+    board = ArrayBoard(5, 5)
+    board.place_stone(Player.black, Point(1, 1))
+    board_copy = copy.deepcopy(board)
+    board_copy.place_stone(Player.white, Point(1, 2))
+    assert board.get(Point(1, 2)) is None
+    assert board_copy.get(Point(1, 2)) == Player.white
+    assert board != board_copy
+
+
+@pytest.mark.parametrize("rule", ['opponent', 'both', 'self'])
+def test_arrayboard_matches_board_in_random_games(rule):
+    rng = random.Random(rule)
+    board = Board(7, 7)
+    array_board = ArrayBoard(7, 7)
+    player = Player.black
+    for _ in range(300):
+        point = Point(rng.randint(1, 7), rng.randint(1, 7))
+        if board.get(point) is not None:
+            continue
+        captures = board.place_stone(player, point, simultaneous_capture_rule=rule)
+        array_captures = array_board.place_stone(player, point, simultaneous_capture_rule=rule)
+        assert captures.opponent_groups == array_captures.opponent_groups
+        assert captures.player_group == array_captures.player_group
+        assert_same_position(board, array_board)
+        player = player.other
+
+
+def test_gamestate_from_setup_with_arrayboard():
+    setup = SetupState(5, 5)
+    setup.place_stone(Player.black, Point(3, 3))
+    state = GameState.from_setup(setup, board_cls=ArrayBoard)
+    assert isinstance(state.board, ArrayBoard)
+    state = state.apply_move(Player.white, Move.play(Point(3, 4)))
+    assert state.board.get(Point(3, 4)) == Player.white
+    assert state.previous_state.board.get(Point(3, 4)) is None
+
+
+def test_arrayboard_liberty_counters_match_exact_liberties():
+    rng = random.Random(7)
+    board = ArrayBoard(9, 9)
+    player = Player.black
+    for _ in range(400):
+        point = Point(rng.randint(1, 9), rng.randint(1, 9))
+        if board.get(point) is not None:
+            continue
+        board.place_stone(player, point)
+        player = player.other
+        for r in range(1, 10):
+            for c in range(1, 10):
+                string = board.get_go_string(Point(r, c))
+                if string is None:
+                    continue
+                root = board._string_ids[board._index(Point(r, c))]
+                assert board._string_sizes[root] == len(string.stones)
+                assert (board._pseudo_liberties[root] == 0) == (string.num_liberties == 0)
+                assert board._is_in_atari(root) == (string.num_liberties == 1)
+
+
+@pytest.mark.parametrize("board_cls", [Board, ArrayBoard])
+@pytest.mark.parametrize("delayed", [False, True])
+def test_play_undo_restores_position(board_cls, delayed):
+    rng = random.Random(11)
+    board = board_cls(7, 7)
+    reference = copy.deepcopy(board)
+    played = 0
+    player = Player.black
+    for _ in range(200):
+        point = Point(rng.randint(1, 7), rng.randint(1, 7))
+        if board.get(point) is not None:
+            continue
+        board.play(player, point, simultaneous_capture_rule='both', delayed_capture=delayed)
+        played += 1
+        player = player.other
+    assert board != reference
+    for _ in range(played):
+        board.undo()
+    assert board == reference
+    assert board.pending_opponent_captures == frozenset()
+    assert board.pending_self_capture is None
+    with pytest.raises(IndexError):
+        board.undo()
+
+
+@pytest.mark.parametrize("board_cls", [Board, ArrayBoard])
+def test_undo_restores_strings_and_trackers(board_cls):
+    rng = random.Random(5)
+    board = board_cls(6, 6)
+    player = Player.black
+    for _ in range(60):
+        point = Point(rng.randint(1, 6), rng.randint(1, 6))
+        if board.get(point) is not None:
+            continue
+        before = copy.deepcopy(board)
+        board.play(player, point, simultaneous_capture_rule='opponent')
+        board.undo()
+        assert board == before
+        assert board.area_scores() == before.area_scores()
+        for color in (Player.black, Player.white):
+            assert board.legal_indexes(color) == before.legal_indexes(color)
+        for p in [Point(r, c) for r in range(1, 7) for c in range(1, 7)]:
+            assert board.get_go_string(p) == before.get_go_string(p)
+            assert board.liberty_class(p) == before.liberty_class(p)
+            if board.get(p) is not None:
+                assert board.get_go_string(p).liberties == before.get_go_string(p).liberties
+        board.place_stone(player, point)
+        player = player.other
+
+
+def test_arrayboard_undo_restores_strings_and_counters():
+    board = ArrayBoard(5, 5)
+    for point in [Point(2, 3), Point(3, 2), Point(4, 3)]:
+        board.place_stone(Player.black, point)
+    board.place_stone(Player.white, Point(3, 3))
+    tables = [table[:] for table in board._tables]
+    captures = board.play(Player.black, Point(3, 4))
+    assert board.get(Point(3, 3)) is None
+    assert len(captures.opponent_groups) == 1
+    board.undo()
+    assert board.get(Point(3, 3)) == Player.white
+    assert [table[:] for table in board._tables] == tables
+    assert board.get_go_string(Point(3, 3)).num_liberties == 1
+
+
+def simulated_probe(board, player, point):
+    next_board = copy.deepcopy(board)
+    captures = next_board.place_stone(player, point)
+    is_self_capture = captures.player_group is not None and not captures.opponent_groups
+    return is_self_capture, bool(captures.opponent_groups), next_board.zobrist_hash()
+
+
+@pytest.mark.parametrize("board_cls", [Board, ArrayBoard])
+@pytest.mark.parametrize("delayed", [False, True])
+def test_probe_play_matches_simulated_placement(board_cls, delayed):
+    rng = random.Random(5)
+    board = board_cls(6, 6)
+    player = Player.black
+    for _ in range(60):
+        point = Point(rng.randint(1, 6), rng.randint(1, 6))
+        if board.get(point) is not None:
+            continue
+        board.place_stone(player, point, delayed_capture=delayed)
+        player = player.other
+        for r in range(1, 7):
+            for c in range(1, 7):
+                candidate = Point(r, c)
+                for color in Player:
+                    probe = board.probe_play(color, candidate)
+                    if board.get(candidate) is not None:
+                        assert probe.is_occupied
+                        continue
+                    assert not probe.is_occupied
+                    assert (probe.is_self_capture, probe.captures_opponent, probe.next_hash) == \
+                        simulated_probe(board, color, candidate)
+
+
+@pytest.mark.parametrize("board_cls", [Board, ArrayBoard])
+@pytest.mark.parametrize("rule", ['opponent', 'both', 'self'])
+def test_area_tracker_matches_full_territory_evaluation(board_cls, rule):
+    rng = random.Random(rule)
+    board = board_cls(6, 6)
+    player = Player.black
+    snapshots = []
+    for _ in range(150):
+        point = Point(rng.randint(1, 6), rng.randint(1, 6))
+        if board.get(point) is not None:
+            continue
+        board_copy = copy.deepcopy(board)
+        board.play(player, point, simultaneous_capture_rule=rule)
+        snapshots.append(board_copy)
+        player = player.other
+        if rng.random() < 0.3:
+            continue
+        expected = evaluate_territory(board)
+        assert board.area_scores() == (expected.num_black_territory + expected.num_black_stones,
+                                       expected.num_white_territory + expected.num_white_stones)
+        territory = board.territory()
+        assert sorted(territory.dame_points) == sorted(expected.dame_points)
+        assert (territory.num_black_territory, territory.num_white_territory) == \
+            (expected.num_black_territory, expected.num_white_territory)
+    while snapshots:
+        board.undo()
+        previous = snapshots.pop()
+        assert board.area_scores() == previous.area_scores()
+
+
+def full_legal_indexes(board, player):
+    legal, capturing = set(), set()
+    for r in range(1, board.num_rows + 1):
+        for c in range(1, board.num_cols + 1):
+            probe = board.probe_play(player, Point(r, c))
+            if not probe.is_occupied and not probe.is_self_capture:
+                legal.add(r * (board.num_cols + 2) + c)
+                if probe.captures_opponent:
+                    capturing.add(r * (board.num_cols + 2) + c)
+    return legal, capturing
+
+
+@pytest.mark.parametrize("board_cls", [Board, ArrayBoard])
+@pytest.mark.parametrize("rule,delayed", [('opponent', False), ('both', False), ('self', False), ('both', True)])
+def test_legal_point_tracker_matches_full_scan(board_cls, rule, delayed):
+    rng = random.Random(f"{rule}{delayed}")
+    board = board_cls(6, 6)
+    player = Player.black
+    snapshots = []
+    for _ in range(150):
+        point = Point(rng.randint(1, 6), rng.randint(1, 6))
+        if board.get(point) is not None:
+            continue
+        snapshots.append(full_legal_indexes(board, player) + full_legal_indexes(board, player.other))
+        board.play(player, point, simultaneous_capture_rule=rule, delayed_capture=delayed)
+        player = player.other
+        if rng.random() < 0.3:
+            continue
+        for color in Player:
+            assert board.legal_indexes(color) == full_legal_indexes(board, color)
+    while snapshots:
+        board.undo()
+        player = player.other
+        expected = snapshots.pop()
+        assert board.legal_indexes(player) + board.legal_indexes(player.other) == expected
+
+
+def full_liberty_classes(board):
+    classes = {}
+    for r in range(1, board.num_rows + 1):
+        for c in range(1, board.num_cols + 1):
+            string = board.get_go_string(Point(r, c))
+            if string is not None:
+                liberties = {n for p in string.stones for n in p.neighbors()
+                             if board.is_on_grid(n) and board.get(n) is None}
+                classes[Point(r, c)] = min(len(liberties), 2)
+    return classes
+
+
+@pytest.mark.parametrize("board_cls", [Board, ArrayBoard])
+@pytest.mark.parametrize("rule,delayed", [('opponent', False), ('self', False), ('both', True)])
+def test_liberty_index_matches_full_scan(board_cls, rule, delayed):
+    rng = random.Random(f"liberties{rule}{delayed}")
+    board = board_cls(6, 6)
+    player = Player.black
+    snapshots = []
+    for _ in range(150):
+        point = Point(rng.randint(1, 6), rng.randint(1, 6))
+        if board.get(point) is not None:
+            continue
+        snapshots.append(full_liberty_classes(board))
+        board.play(player, point, simultaneous_capture_rule=rule, delayed_capture=delayed)
+        player = player.other
+        if rng.random() < 0.3:
+            continue
+        expected = full_liberty_classes(board)
+        assert {p: board.liberty_class(p) for p in expected} == expected
+        for num_liberties in range(3):
+            for color in Player:
+                strings = board.strings_by_liberties(num_liberties, color)
+                assert sorted(p for string in strings for p in string.stones) == \
+                    sorted(p for p, value in expected.items() if value == num_liberties and board.get(p) == color)
+    while snapshots:
+        board.undo()
+        expected = snapshots.pop()
+        classes = {Point(r, c): board.liberty_class(Point(r, c)) for r in range(1, 7) for c in range(1, 7)}
+        assert {p: value for p, value in classes.items() if value is not None} == expected
+
+
+@pytest.mark.parametrize("board_cls", [Board, ArrayBoard])
+def test_from_position_matches_played_position(board_cls):
+    rng = random.Random(19)
+    played = board_cls(7, 7)
+    player = Player.black
+    for _ in range(60):
+        point = Point(rng.randint(1, 7), rng.randint(1, 7))
+        if played.get(point) is None and not played.probe_play(player, point).is_self_capture:
+            played.place_stone(player, point)
+            player = player.other
+    stones = [(Point(r, c), played.get(Point(r, c))) for r in range(1, 8) for c in range(1, 8)
+              if played.get(Point(r, c)) is not None]
+    for position, size in ((played.to_array(), {}), (stones, {'num_rows': 7, 'num_cols': 7})):
+        loaded = board_cls.from_position(position, **size)
+        assert_same_position(played, loaded)
+        assert loaded.area_scores() == played.area_scores()
+        for point, _ in stones:
+            assert loaded.get_go_string(point).stones == played.get_go_string(point).stones
+            assert loaded.liberty_class(point) == played.liberty_class(point)
+        for color in Player:
+            assert loaded.legal_indexes(color) == played.legal_indexes(color)
+        point = next(Point(r, c) for r in range(1, 8) for c in range(1, 8) if played.get(Point(r, c)) is None)
+        loaded.place_stone(player, point)
+        reference = copy.deepcopy(played)
+        reference.place_stone(player, point)
+        assert_same_position(reference, loaded)
+
+
+def test_from_position_rejects_groups_without_liberties():
+    with pytest.raises(ValueError):
+        ArrayBoard.from_position({Point(1, 1): Player.white, Point(1, 2): Player.black, Point(2, 1): Player.black},
+                                 num_rows=5, num_cols=5)
+    with pytest.raises(ValueError):
+        Board.from_position([(Point(1, 1), Player.black)])
+    setup = SetupState(3, 3)
+    setup.place_stone(Player.black, Point(2, 2))
+    for point in Point(2, 2).neighbors():
+        setup.place_stone(Player.white, point)
+    with pytest.raises(ValueError):
+        GameState.from_setup(setup, board_cls=ArrayBoard)
+
+
+def test_arrayboard_copy_shares_trackers_until_written():
+    board = ArrayBoard(5, 5)
+    board.place_stone(Player.black, Point(3, 3))
+    scores = board.area_scores()
+    legal = set(board.legal_indexes(Player.white)[0])
+    board_copy = copy.deepcopy(board)
+    assert board_copy._area is board._area and board_copy._legal is board._legal
+    assert board_copy.area_scores() == scores
+
+    board_copy.place_stone(Player.white, Point(3, 4))
+    assert board_copy._area is not board._area and board_copy._liberties is not board._liberties
+    assert board.area_scores() == scores and board.legal_indexes(Player.white)[0] == legal
+    assert board.liberty_class(Point(3, 3)) == 2 and board_copy.liberty_class(Point(3, 3)) == 2
+
+    # Исходная доска тоже копирует трекеры перед своим ходом.
+    other_copy = copy.deepcopy(board)
+    board.place_stone(Player.white, Point(1, 1))
+    assert other_copy.area_scores() == scores
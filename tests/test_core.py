@@ -1,12 +1,21 @@
 import pytest
 import copy
+import random
+import numpy as np
+from core.analysis import move_masks
+from core.array_scoring import area_scores, compute_game_results, evaluate_territory_array
+from core.arrayboard import ArrayBoard
 from core.goboard import Board, GameState, Move, GoString, IllegalMoveError
 from core.gotypes import Player, Point
 from core.deterministic_queue import DeterministicQueue
 from core.random_queue import RandomQueue
 from core.setup_mode import SetupState
-from core.scoring import compute_game_result, evaluate_territory
+from core.scoring import DEFAULT_KOMI, RESULT_CACHE, ResultCache, board_territory, compute_game_result, evaluate_territory
 from core.agent.helpers import is_point_an_eye
+from core.capture_rules import cleanup_delayed_captures
+from core.playout import PlayoutEngine
+from core import instrumentation, tracing, zobrist
+from core.geometry import geometry
 
 def test_board_init():
     board = Board(9, 9)
@@ -401,4 +410,386 @@ def test_is_point_an_eye_simple(basic_game):
 
 def test_is_point_an_eye_occupied(basic_game):
     state = basic_game.apply_move(Player.black, Move.play(Point(2,2)))
-    assert not is_point_an_eye(state.board, Point(2,2), Player.black)
\ No newline at end of file
+    assert not is_point_an_eye(state.board, Point(2,2), Player.black)
+
+def test_move_history_shares_tail_between_states(basic_game):
+    state1 = basic_game.apply_move(Player.black, Move.play(Point(1, 1)))
+    state2 = state1.apply_move(Player.white, Move.play(Point(2, 2)))
+    assert state2.move_history._previous is state1.move_history
+    assert list(state2.move_history) == [(Move.play(Point(1, 1)), Player.black),
+                                         (Move.play(Point(2, 2)), Player.white)]
+    assert state2.move_history[-1] == (Move.play(Point(2, 2)), Player.white)
+    assert len(state1.move_history) == 1
+
+
+def test_previous_states_are_scoped_to_each_branch(basic_game):
+    state1 = basic_game.apply_move(Player.black, Move.play(Point(1, 1)))
+    branch_a = state1.apply_move(Player.white, Move.play(Point(2, 2)))
+    branch_b = state1.apply_move(Player.white, Move.play(Point(3, 3)))
+    leaf_a = branch_a.apply_move(Player.black, Move.pass_turn())
+    leaf_b = branch_b.apply_move(Player.black, Move.pass_turn())
+    assert branch_a.board.zobrist_hash() in leaf_a.previous_states
+    assert branch_a.board.zobrist_hash() not in leaf_b.previous_states
+    assert branch_b.board.zobrist_hash() in leaf_b.previous_states
+    assert state1.board.zobrist_hash() in leaf_a.previous_states
+    assert state1.board.zobrist_hash() not in state1.previous_states
+    assert leaf_b.previous_states == {basic_game.board.zobrist_hash(), state1.board.zobrist_hash(),
+                                      branch_b.board.zobrist_hash()}
+
+
+@pytest.mark.parametrize("board_cls", [Board, ArrayBoard])
+def test_legal_moves_matches_is_valid_move(board_cls):
+    rng = random.Random(3)
+    state = GameState.from_setup(SetupState(6, 6), board_cls=board_cls)
+    player = Player.black
+    for _ in range(80):
+        for color in Player:
+            expected = {Point(r, c) for r in range(1, 7) for c in range(1, 7)
+                        if state.is_valid_move(color, Move.play(Point(r, c)))}
+            legal = {move.point for move in state.legal_moves(color) if move.is_play}
+            assert legal == expected
+        candidates = [move for move in state.legal_moves(player) if move.is_play]
+        if not candidates:
+            break
+        state = state.apply_move(player, rng.choice(candidates))
+        player = player.other
+
+
+def test_legal_moves_excludes_ko_point(basic_game):
+    state = basic_game.apply_move(Player.black, Move.play(Point(1, 2)))
+    state = state.apply_move(Player.black, Move.play(Point(2, 1)))
+    state = state.apply_move(Player.black, Move.play(Point(3, 2)))
+    state = state.apply_move(Player.white, Move.play(Point(1, 3)))
+    state = state.apply_move(Player.white, Move.play(Point(2, 2)))
+    state = state.apply_move(Player.white, Move.play(Point(3, 3)))
+    state = state.apply_move(Player.white, Move.play(Point(1, 1)))
+    legal_points = {move.point for move in state.legal_moves(Player.black) if move.is_play}
+    assert Point(1, 2) not in legal_points
+    assert Point(4, 4) in legal_points
+    assert not move_masks(state, Player.black).legal[0, 1]
+
+
+@pytest.mark.parametrize("board_cls", [Board, ArrayBoard])
+def test_move_masks_match_per_point_checks(board_cls):
+    rng = random.Random(9)
+    state = GameState.from_setup(SetupState(6, 6), board_cls=board_cls)
+    player = Player.black
+    for _ in range(80):
+        for color in Player:
+            masks = move_masks(state, color)
+            for r in range(1, 7):
+                for c in range(1, 7):
+                    point = Point(r, c)
+                    legal = state.is_valid_move(color, Move.play(point))
+                    assert masks.legal[r - 1, c - 1] == legal
+                    atari = state.board.get(point) is None and any(
+                        state.board.get(n) == color.other and state.board.get_go_string(n).num_liberties == 1
+                        for n in point.neighbors() if state.board.is_on_grid(n))
+                    assert masks.atari[r - 1, c - 1] == atari
+                    self_atari = False
+                    if legal and not atari:
+                        next_board = copy.deepcopy(state.board)
+                        next_board.place_stone(color, point)
+                        self_atari = next_board.get_go_string(point).num_liberties == 1
+                    assert masks.self_atari[r - 1, c - 1] == self_atari
+        candidates = [move for move in state.legal_moves(player) if move.is_play]
+        if not candidates:
+            break
+        state = state.apply_move(player, rng.choice(candidates))
+        player = player.other
+
+
+@pytest.mark.parametrize("rule", ['opponent', 'both', 'self'])
+@pytest.mark.parametrize("pattern", ["BW", "BBW"])
+def test_playout_replays_legally_and_matches_scoring(rule, pattern):
+    setup = SetupState(7, 7)
+    setup.place_stone(Player.black, Point(4, 4))
+    setup.place_stone(Player.white, Point(3, 4))
+    start = GameState.from_setup(setup, board_cls=ArrayBoard)
+    engine = PlayoutEngine(start, DeterministicQueue(pattern), simultaneous_capture_rule=rule)
+    for seed in range(5):
+        result = engine.playout(seed)
+        queue = DeterministicQueue(pattern)
+        state = start
+        for player, move in engine.last_moves:
+            assert player == queue.next_player()
+            if move.is_play:
+                assert state.is_valid_move(player, move)
+                assert not is_point_an_eye(state.board, move.point, player)
+            state = state.apply_move(player, move, simultaneous_capture_rule=rule)
+        # Под правилом 'self' взятие с самоснятием не меняет позицию, и партия упирается в лимит ходов.
+        assert state.is_over or len(engine.last_moves) == engine.max_moves
+        assert compute_game_result(state) == result
+
+
+@pytest.mark.parametrize("rule", ['opponent', 'both', 'self'])
+def test_delayed_playout_replays_through_gamestate(rule):
+    # Тот же порядок, что и в API: сначала отложенные взятия, затем ход с delayed_capture.
+    start = GameState.from_setup(SetupState(5, 5), board_cls=ArrayBoard)
+    engine = PlayoutEngine(start, DeterministicQueue("BBW"), simultaneous_capture_rule=rule, delayed_capture=True)
+    for seed in range(5):
+        result = engine.playout(seed)
+        queue = DeterministicQueue("BBW")
+        state = start
+        for player, move in engine.last_moves:
+            assert player == queue.next_player()
+            state = state.resolve_pending_captures(player, rule)
+            analysis = state.analyze_move(player, move, simultaneous_capture_rule=rule, delayed_capture=True)
+            assert analysis.is_legal, analysis.reason
+            state = state.apply_move(player, move, simultaneous_capture_rule=rule, delayed_capture=True,
+                                     analysis=analysis)
+        assert compute_game_result(state) == result
+
+
+def test_playout_engine_uses_given_komi():
+    engine = PlayoutEngine(GameState.from_setup(SetupState(5, 5), board_cls=ArrayBoard), DeterministicQueue("BW"),
+                           komi=0.5)
+    assert engine.playout(1).komi == 0.5
+    assert PlayoutEngine(GameState.from_setup(SetupState(5, 5)), DeterministicQueue("BW")).komi == DEFAULT_KOMI
+
+
+def test_playouts_batch_scores_are_area_counts():
+    engine = PlayoutEngine(GameState.from_setup(SetupState(9, 9), board_cls=ArrayBoard), DeterministicQueue("BW"))
+    scores = engine.playouts(50, seed=1)
+    assert scores.shape == (50, 2)
+    assert (scores.sum(axis=1) <= 81).all()
+    assert (scores == engine.playouts(50, seed=1)).all()
+
+
+def test_zobrist_table_is_seeded_and_shared_across_sizes():
+    small = zobrist.table(9, 9)
+    large = zobrist.table(19, 19)
+    assert small.shape == (11 * 11, 3)
+    assert (small[:, 0] == 0).all()
+    assert small[0, 1] == 0
+    assert small[1 * 11 + 1, 1] == large[1 * 21 + 1, 1]
+    assert small[2 * 11 + 3, 2] == large[2 * 21 + 3, 2]
+    assert zobrist.padded_table(9, 9)[2][2 * 11 + 3] == int(small[2 * 11 + 3, 2])
+    assert zobrist.table(30, 30).shape == (32 * 32, 3)
+
+
+def test_situation_hash_components(basic_game):
+    state = basic_game.apply_move(Player.black, Move.play(Point(3, 3)))
+    queue = DeterministicQueue("BBW")
+    base = zobrist.situation_hash(state, Player.black, queue)
+    assert zobrist.situation_hash(state, Player.white, queue) != base
+    queue.advance_turn()
+    assert zobrist.situation_hash(state, Player.black, queue) != base
+    queue.advance_turn()
+    queue.advance_turn()
+    assert zobrist.situation_hash(state, Player.black, queue) == base
+    pending = GameState(state.board, state.previous_state, state.last_move, state.move_history,
+                        frozenset({state.board.get_go_string(Point(3, 3))}), None)
+    assert zobrist.situation_hash(pending, Player.black, queue) != base
+    assert zobrist.situation_hash(state, Player.black, RandomQueue(seed=1)) != \
+        zobrist.situation_hash(state, Player.black, RandomQueue(seed=2))
+
+
+def test_geometry_tables():
+    board_geometry = geometry(5, 5)
+    assert board_geometry is geometry(5, 5)
+    assert len(board_geometry.points) == 25
+    corner = Point(1, 1)
+    assert set(board_geometry.neighbors[corner]) == {Point(2, 1), Point(1, 2)}
+    assert board_geometry.diagonals[corner] == (Point(2, 2),)
+    assert board_geometry.is_corner[corner] and board_geometry.is_edge[corner]
+    assert board_geometry.is_edge[Point(1, 3)] and not board_geometry.is_corner[Point(1, 3)]
+    assert not board_geometry.is_edge[Point(3, 3)]
+    assert len(board_geometry.neighbors[Point(3, 3)]) == 4
+    index = board_geometry.index_of[Point(2, 4)]
+    assert index == 2 * 7 + 4
+    assert board_geometry.point_at[index] is board_geometry.neighbors[Point(3, 4)][0]
+
+
+def test_moves_are_interned_and_slotted():
+    assert Move.play(Point(3, 4)) is Move.play(Point(3, 4))
+    assert Move.pass_turn() is Move.pass_turn()
+    assert Move.resign() is Move.resign()
+    assert Move.play(Point(3, 4)) == Move(point=Point(3, 4))
+    assert not hasattr(Move.pass_turn(), '__dict__')
+    string = GoString(Player.black, [Point(1, 1), Point(1, 2)], [Point(2, 1)])
+    assert not hasattr(string, '__dict__')
+    same_stones = GoString(Player.black, [Point(1, 2), Point(1, 1)], [])
+    assert string == same_stones and hash(string) == hash(same_stones)
+    assert string != GoString(Player.white, [Point(1, 1), Point(1, 2)], [Point(2, 1)])
+    assert len({string, same_stones}) == 1
+
+
+def test_array_territory_matches_evaluate_territory():
+    rng = random.Random(13)
+    boards = []
+    expected_scores = []
+    for _ in range(20):
+        board = ArrayBoard(7, 7)
+        for _ in range(rng.randint(0, 40)):
+            point = Point(rng.randint(1, 7), rng.randint(1, 7))
+            if board.get(point) is None:
+                board.place_stone(rng.choice([Player.black, Player.white]), point)
+        expected = evaluate_territory(board)
+        territory = evaluate_territory_array(board.to_array())
+        assert (territory.num_black_stones, territory.num_white_stones) == \
+            (expected.num_black_stones, expected.num_white_stones)
+        assert (territory.num_black_territory, territory.num_white_territory, territory.num_dame) == \
+            (expected.num_black_territory, expected.num_white_territory, expected.num_dame)
+        assert sorted(territory.dame_points) == sorted(expected.dame_points)
+        boards.append(board.to_array())
+        expected_scores.append(board.area_scores())
+    assert [tuple(score) for score in area_scores(np.stack(boards))] == expected_scores
+    assert compute_game_results(np.stack(boards))[0].komi == 7.5
+
+
+def test_result_cache_is_shared_and_bounded(basic_game):
+    RESULT_CACHE.clear()
+    state = basic_game.apply_move(Player.black, Move.play(Point(1, 1)))
+    state = state.apply_move(Player.white, Move.pass_turn())
+    state = state.apply_move(Player.black, Move.pass_turn())
+    result = compute_game_result(state)
+    # Другое состояние с той же позицией берёт результат из кэша.
+    same_position = GameState.from_setup(SetupState(5, 5)).apply_move(Player.black, Move.play(Point(1, 1)))
+    assert compute_game_result(same_position) is result
+    assert RESULT_CACHE.hits == 1
+    assert compute_game_result(state, komi=0.5).komi == 0.5
+    assert board_territory(state.board) is board_territory(same_position.board)
+
+    assert state.winner() == Player.black
+    assert state._winner_cache == (state.board.zobrist_hash(), Player.black)
+    # Изменение доски на месте сбрасывает кэш состояния.
+    state.board.place_stone(Player.white, Point(5, 5))
+    assert state.winner() == compute_game_result(state).winner
+
+    cache = ResultCache(maxsize=2)
+    for key in range(3):
+        cache.put(key, key)
+    assert len(cache) == 2 and cache.get(0) is None and cache.get(2) == 2
+
+
+@pytest.mark.parametrize("board_cls", [Board, ArrayBoard])
+def test_analyze_move_is_reused_by_apply_move(board_cls):
+    setup = SetupState(5, 5)
+    setup.place_stone(Player.black, Point(1, 2))
+    setup.place_stone(Player.white, Point(1, 1))
+    state = GameState.from_setup(setup, board_cls=board_cls)
+
+    analysis = state.analyze_move(Player.white, Move.play(Point(3, 3)))
+    assert analysis.is_legal and analysis.next_hash == analysis.board.zobrist_hash()
+    with pytest.raises(AttributeError):
+        analysis.is_legal = False
+    next_state = state.apply_move(Player.white, Move.play(Point(3, 3)), analysis=analysis)
+    assert next_state.board is analysis.board
+    assert next_state.board == state.apply_move(Player.white, Move.play(Point(3, 3))).board
+
+    illegal = state.analyze_move(Player.white, Move.play(Point(1, 1)))
+    assert not illegal.is_legal and illegal.board is None and "occupied" in illegal.reason
+    with pytest.raises(IllegalMoveError):
+        state.apply_move(Player.white, Move.play(Point(1, 1)), analysis=illegal)
+    with pytest.raises(ValueError):
+        state.apply_move(Player.black, Move.play(Point(3, 3)), analysis=analysis)
+
+    pass_analysis = state.analyze_move(Player.black, Move.pass_turn())
+    assert pass_analysis.is_legal and pass_analysis.board is state.board
+
+
+@pytest.mark.parametrize("board_cls", [Board, ArrayBoard])
+def test_cleanup_delayed_captures_removes_zero_liberty_strings(board_cls):
+    board = board_cls(5, 5)
+    board.place_stone(Player.white, Point(1, 1))
+    board.place_stone(Player.black, Point(1, 2))
+    board.place_stone(Player.black, Point(2, 1), delayed_capture=True)
+    assert board.get(Point(1, 1)) == Player.white
+    assert [string.stones for string in board.strings_by_liberties(0)] == [frozenset({Point(1, 1)})]
+    assert board.liberty_class(Point(1, 2)) == 2
+    cleanup_delayed_captures(board, Player.black)
+    assert board.get(Point(1, 1)) == Player.white
+    cleanup_delayed_captures(board, Player.white)
+    assert board.get(Point(1, 1)) is None
+    assert board.strings_by_liberties(0) == []
+
+
+@pytest.mark.parametrize("board_cls", [Board, ArrayBoard])
+def test_resolve_pending_captures_is_memoized_per_player(board_cls):
+    state = GameState.from_setup(SetupState(5, 5), board_cls=board_cls)
+    state = state.apply_move(Player.white, Move.play(Point(1, 1)), delayed_capture=True)
+    state = state.apply_move(Player.black, Move.play(Point(1, 2)), delayed_capture=True)
+    state = state.apply_move(Player.black, Move.play(Point(2, 1)), delayed_capture=True)
+    assert len(state.pending_opponent_captures) == 1
+
+    assert state.resolve_pending_captures(Player.black) is state
+    resolved = state.resolve_pending_captures(Player.white)
+    assert resolved is state.resolve_pending_captures(Player.white)
+    assert resolved.board.get(Point(1, 1)) is None and state.board.get(Point(1, 1)) == Player.white
+    assert not resolved.pending_opponent_captures
+    assert state.board.zobrist_hash() in resolved.previous_states
+    # История дописывается к общему журналу, а не собирается заново.
+    assert resolved.previous_states._log is state.previous_states._log
+    assert len(resolved.previous_states) == len(state.previous_states) + 1
+    assert resolved.resolve_pending_captures(Player.white) is resolved
+
+
+def test_tracing_is_gated_by_level_category_and_game():
+    board_trace = tracing.tracer('board')
+    try:
+        tracing.configure()
+        assert not board_trace.debug_enabled and not board_trace.info_enabled
+        tracing.configure(level='INFO', categories=['board'])
+        assert board_trace.info_enabled and not board_trace.debug_enabled
+        assert not tracing.tracer('captures').info_enabled
+
+        sink = tracing.configure(level='DEBUG', categories=['board', 'captures'], game_id='g1', buffer_size=10)
+        assert board_trace.debug_enabled and tracing.sink() is sink
+        with tracing.game_context('g2'):
+            Board(5, 5).place_stone(Player.black, Point(1, 1))
+        assert sink.snapshot() == []
+        with tracing.game_context('g1'):
+            board = Board(5, 5)
+            board.place_stone(Player.black, Point(1, 1))
+            board.place_stone(Player.white, Point(1, 2))
+            board.place_stone(Player.white, Point(2, 1))
+        records = sink.snapshot()
+        # Буфер хранит только последние записи.
+        assert len(records) == 10 and {record.game_id for record in records} == {'g1'}
+        assert any(record.category == 'captures' and 'Physically removing string' in record.message
+                   for record in records)
+        assert not any('Attempting to place black' in record.message for record in records)
+
+        tracing.configure_from_env({'GO_TRACE_LEVEL': 'debug', 'GO_TRACE_CATEGORIES': 'state'})
+        assert tracing.tracer('state').debug_enabled and not board_trace.info_enabled
+        with pytest.raises(ValueError):
+            tracing.configure(level='DEBUG', categories=['moves'])
+    finally:
+        tracing.configure()
+
+
+def test_instrumentation_counts_engine_work_only_when_enabled():
+    instrumentation.reset()
+    try:
+        state = GameState.from_position([], board_cls=ArrayBoard, num_rows=5, num_cols=5)
+        state = state.apply_move(Player.black, Move.play(Point(3, 3)))
+        assert instrumentation.snapshot() == {}
+
+        with instrumentation.scope() as stats:
+            assert state.is_valid_move(Player.white, Move.play(Point(3, 4)))
+            state.legal_moves(Player.white)
+            state = state.apply_move(Player.white, Move.play(Point(3, 4)))
+            evaluate_territory(state.board)
+        scoped = stats.snapshot()
+        assert scoped['board.place_stone'].count == 1 and scoped['board.copy'].count >= 1
+        assert scoped['state.self_capture_check'].count == scoped['state.ko_check'].count >= 1
+        assert scoped['state.legal_moves'].count == 1
+        assert scoped['scoring.evaluate_territory'].count == 1 and scoped['scoring.flood_fill'].count >= 1
+        assert all(m.seconds >= 0 for m in scoped.values())
+        # Итоги процесса получают те же замеры; после выхода из scope замеры снова выключены.
+        assert instrumentation.snapshot() == scoped
+        state.legal_moves(Player.black)
+        assert instrumentation.snapshot()['state.legal_moves'].count == 1
+
+        instrumentation.enable()
+        with instrumentation.scope() as outer:
+            state.legal_moves(Player.black)
+            with instrumentation.scope() as inner:
+                state.legal_moves(Player.white)
+        assert outer.snapshot()['state.legal_moves'].count == 2
+        assert inner.snapshot()['state.legal_moves'].count == 1
+        assert instrumentation.snapshot()['state.legal_moves'].count == 3
+    finally:
+        instrumentation.disable()
+        instrumentation.reset()